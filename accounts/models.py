@@ -70,6 +70,10 @@ class Message(models.Model):
     class Meta:
         db_table = "messages"  # Explicitly set table name to match Supabase
         ordering = ["timestamp"]
+        indexes = [
+            # Keyset pagination of chat history (chat.services.history)
+            models.Index(fields=["chat", "timestamp", "id"], name="messages_chat_ts_idx"),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.email} at {self.timestamp}"
@@ -6,7 +6,7 @@ from .models import BirthProfile, NatalChartCache, TransitCache, NakshatraPredic
 class BirthProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'city', 'country_code', 'timezone_str', 'created_at']
     search_fields = ['user__email', 'city', 'country_code']
-    readonly_fields = ['timezone_str', 'created_at', 'updated_at']
+    readonly_fields = ['latitude', 'longitude', 'timezone_str', 'created_at', 'updated_at']
 
 
 @admin.register(NatalChartCache)
@@ -5,3 +5,6 @@ class AstrologyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'astrology'
     verbose_name = 'Vedic Astrology'
+
+    def ready(self):
+        import astrology.signals
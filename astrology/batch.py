@@ -0,0 +1,240 @@
+"""
+Batch natal chart generation.
+
+A batch job takes birth profiles that already exist (e.g. created from
+family-tree members in one transaction) and fills their NatalChartCache.
+The astrology API calls go through one process-wide bounded thread pool
+(ASTROLOGY_NATAL_FETCH_WORKERS), and profiles with an identical birth
+(date, time and place) share a single set of fetches — also across batches
+running at the same time. Insight generation, when requested, then runs
+profile by profile in the batch's own thread instead of one thread per
+profile.
+
+Job state lives in NatalBatchJob rows, so the job can be polled through
+any worker, under a job id returned to the caller as the batch handle.
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone as dj_timezone
+
+from .gazetteer import normalize_place_name
+
+logger = logging.getLogger(__name__)
+
+# A job record stays visible this long after its last update
+_JOB_TTL = timedelta(hours=1)
+
+# NatalChartCache attribute -> AstrologyAPIClient method
+NATAL_FETCHES = {
+    "birth_details_data": "get_birth_details",
+    "divisional_data": "get_divisional_chart",
+    "ashtakvarga_data": "get_ashtakvarga",
+    "dasha_data": "get_vimshottari_dasha",
+    "kp_data": "get_kp_system",
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+# birth key -> Future of the natal responses, while a fetch is in flight
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "ASTROLOGY_NATAL_FETCH_WORKERS", 4),
+                thread_name_prefix="natal-fetch",
+            )
+        return _executor
+
+
+def birth_key(profile) -> tuple:
+    """Identifies births that produce the same natal chart."""
+    return (
+        profile.birth_year,
+        profile.birth_month,
+        profile.birth_day,
+        profile.birth_hour,
+        profile.birth_minute,
+        normalize_place_name(profile.city),
+        (profile.country_code or "").upper(),
+    )
+
+
+def _fetch_natal(profile) -> dict:
+    """Runs in the pool: API calls only, no database access."""
+    from .services import AstrologyAPIClient
+
+    client = AstrologyAPIClient()
+    return {attr: getattr(client, method)(profile) for attr, method in NATAL_FETCHES.items()}
+
+
+def fetch_natal_shared(profile):
+    """
+    Returns a Future of the natal API responses for `profile`, reusing the
+    in-flight fetch of any profile with the same birth key.
+    """
+    key = birth_key(profile)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = _get_executor().submit(_fetch_natal, profile)
+        _inflight[key] = future
+
+    def release(done):
+        with _inflight_lock:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+    # Outside the lock: runs immediately if the fetch has already finished
+    future.add_done_callback(release)
+    return future
+
+
+def get_batch_job(job_id: str):
+    """The job record, or None once it has expired / never existed."""
+    from .models import NatalBatchJob
+
+    job = NatalBatchJob.objects.filter(
+        job_id=job_id, updated_at__gte=dj_timezone.now() - _JOB_TTL
+    ).first()
+    return job.as_dict() if job else None
+
+
+def _update_job(job_id: str, profile_id: int = None, status: str = None, state: str = None, **counters):
+    from .models import NatalBatchJob
+
+    changes = {name: F(name) + increment for name, increment in counters.items()}
+    if state:
+        changes["state"] = state
+    with transaction.atomic():
+        job = NatalBatchJob.objects.select_for_update().filter(job_id=job_id).first()
+        if job is None:
+            return
+        if profile_id is not None:
+            for item in job.items:
+                if item["birth_profile_id"] == profile_id:
+                    item["status"] = status
+            changes["items"] = job.items
+        NatalBatchJob.objects.filter(pk=job.pk).update(updated_at=dj_timezone.now(), **changes)
+
+
+def start_natal_batch(user_id, items: list, generate_insights: bool = True) -> dict:
+    """
+    Registers a batch job and returns its record; the background thread
+    starts once the current transaction commits, so it sees the profiles
+    created in it.
+
+    `items` are dicts with at least "birth_profile_id"; any other keys
+    (e.g. "member_id") are kept in the job record.
+    """
+    from .models import NatalBatchJob
+
+    # Expired records of this user are no longer visible; drop them here
+    NatalBatchJob.objects.filter(
+        user_id=user_id, updated_at__lt=dj_timezone.now() - _JOB_TTL
+    ).delete()
+    job = NatalBatchJob.objects.create(
+        job_id=uuid.uuid4().hex,
+        user_id=user_id,
+        total=len(items),
+        items=[{**item, "status": "queued"} for item in items],
+    )
+    job_id = job.job_id
+    profile_ids = [item["birth_profile_id"] for item in items]
+    transaction.on_commit(
+        lambda: threading.Thread(
+            target=run_natal_batch, args=(job_id, profile_ids, generate_insights)
+        ).start()
+    )
+    return job.as_dict()
+
+
+def _store_natal(profile, responses: dict):
+    from .models import NatalChartCache
+
+    timezone_str = (
+        responses["birth_details_data"].get("data", {})
+        .get("calculation_info", {})
+        .get("location", {})
+        .get("timezone", "")
+    )
+    if timezone_str and not profile.timezone_str:
+        profile.timezone_str = timezone_str
+        profile.save(update_fields=["timezone_str"])
+
+    NatalChartCache.objects.update_or_create(birth_profile=profile, defaults=responses)
+
+
+def _fetch_batch(job_id: str, profile_ids: list) -> list:
+    """Fills the natal caches of the batch; returns the profiles now charted."""
+    from .models import BirthProfile, NatalChartCache
+
+    profiles = list(BirthProfile.objects.filter(id__in=profile_ids).order_by("id"))
+
+    # Profiles whose natal cache is already complete need no fetch
+    caches = (
+        NatalChartCache.objects.defer("chart_payload")
+        .filter(birth_profile__in=profiles)
+        .prefetch_related("blobs")
+    )
+    complete = {
+        natal_cache.birth_profile_id
+        for natal_cache in caches
+        if all(getattr(natal_cache, attr) for attr in NATAL_FETCHES)
+    }
+
+    births = {}
+    for profile in profiles:
+        if profile.id in complete:
+            _update_job(job_id, profile.id, "ready", reused=1)
+            continue
+        births.setdefault(birth_key(profile), []).append(profile)
+    _update_job(job_id, unique_births=len(births))
+    logger.info(
+        f"Natal batch {job_id}: {len(profiles)} profiles, {len(births)} unique births to fetch"
+    )
+
+    futures = [(group, fetch_natal_shared(group[0])) for group in births.values()]
+    ready = [profile for profile in profiles if profile.id in complete]
+    for group, future in futures:
+        for profile in group:
+            try:
+                _store_natal(profile, future.result())
+            except Exception as e:
+                logger.error(f"Natal batch {job_id}: profile {profile.id} failed: {e}")
+                _update_job(job_id, profile.id, "failed", failed=1)
+                continue
+            ready.append(profile)
+            _update_job(job_id, profile.id, "ready", fetched=1)
+    return ready
+
+
+def run_natal_batch(job_id: str, profile_ids: list, generate_insights: bool = True):
+    from .tasks import generate_all_insights_async
+
+    _update_job(job_id, state="running")
+    try:
+        ready = _fetch_batch(job_id, profile_ids)
+    except Exception as e:
+        # Per-profile errors are recorded on their items; this is the batch itself
+        logger.error(f"Natal batch {job_id} failed: {e}")
+        _update_job(job_id, state="failed")
+        return
+    _update_job(job_id, state="finished")
+
+    if generate_insights:
+        for profile in ready:
+            generate_all_insights_async(profile.id)
@@ -0,0 +1,286 @@
+"""
+Chart wheel diagrams for natal / divisional charts.
+
+A chart diagram depends only on the ascendant sign and the sign (and
+retrograde flag) of the nine grahas, so a chart is reduced to a short token
+— one character each, see chart_token() — and everything is keyed by
+(style, chart code, token). Two profiles with the same D9 placements share
+one token, one cached image and one URL.
+
+The North and South Indian layouts are computed once as drawing primitives
+in a unit square and emitted as SVG, PNG (Pillow) or a ReportLab Drawing for
+embedding in report PDFs. Rendered SVG / PNG bytes are kept in the Django
+cache under the token.
+"""
+
+import hashlib
+from xml.sax.saxutils import escape
+
+from django.core.cache import cache
+
+from .charts import DIVISIONAL_CHARTS, SIGN_INDEX, ZODIAC_SIGNS
+
+NORTH = "north"
+SOUTH = "south"
+STYLES = (NORTH, SOUTH)
+
+# format -> content type
+FORMATS = {"svg": "image/svg+xml", "png": "image/png"}
+
+# Bump when the drawing changes so cached images are not reused
+RENDER_VERSION = 1
+_IMAGE_TTL = 30 * 24 * 60 * 60
+DEFAULT_SIZE = 400
+
+GRAHAS = (
+    ("Sun", "Su"), ("Moon", "Mo"), ("Mars", "Ma"), ("Mercury", "Me"), ("Jupiter", "Ju"),
+    ("Venus", "Ve"), ("Saturn", "Sa"), ("Rahu", "Ra"), ("Ketu", "Ke"),
+)
+_GRAHA_INDEX = {name: i for i, (name, _) in enumerate(GRAHAS)}
+
+# Token characters: a-l = sign index 0-11 (upper case = retrograde), "-" = unknown
+_SIGN_CHARS = "abcdefghijkl"
+TOKEN_LENGTH = 1 + len(GRAHAS)
+
+_STROKE = "#4a4a8a"
+_COLORS = {"sign": "#888888", "planet": "#1a1a2e", "asc": "#b03a2e", "label": "#4a4a8a"}
+# Font size per text role, as a fraction of the image size
+_FONT_SIZES = {"sign": 0.03, "planet": 0.04, "asc": 0.04, "label": 0.05}
+_LINE_HEIGHT = 0.05
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Tokens
+# ──────────────────────────────────────────────────────────────────────────────
+
+def chart_token(positions: list) -> str:
+    """The token of a chart's `positions` list (divisional chart API format)."""
+    signs = ["-"] * TOKEN_LENGTH
+    for pos in positions or []:
+        planet = pos.get("planet")
+        sign = SIGN_INDEX.get(pos.get("sign"))
+        if sign is None:
+            continue
+        if planet == "Ascendant":
+            signs[0] = _SIGN_CHARS[sign]
+        elif planet in _GRAHA_INDEX:
+            char = _SIGN_CHARS[sign]
+            if pos.get("is_retrograde") in ("Yes", True):
+                char = char.upper()
+            signs[1 + _GRAHA_INDEX[planet]] = char
+    return "".join(signs)
+
+
+def divisional_positions(divisional: dict, chart: str) -> list:
+    """The `positions` of one chart in a stored divisional chart API response."""
+    for chart_obj in (divisional or {}).get("data", {}).get("charts", []):
+        if chart_obj.get("chart") == chart:
+            return chart_obj.get("positions", [])
+    return []
+
+
+def is_valid_token(token: str) -> bool:
+    return (
+        isinstance(token, str)
+        and len(token) == TOKEN_LENGTH
+        and all(c == "-" or c.lower() in _SIGN_CHARS for c in token)
+    )
+
+
+def _parse_token(token: str):
+    """(ascendant sign index or None, [(abbreviation, sign index, retrograde)])."""
+    asc = None if token[0] == "-" else _SIGN_CHARS.index(token[0].lower())
+    grahas = [
+        (abbreviation, _SIGN_CHARS.index(c.lower()), c.isupper())
+        for (_, abbreviation), c in zip(GRAHAS, token[1:])
+        if c != "-"
+    ]
+    return asc, grahas
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Layout (unit square, y pointing down)
+# ──────────────────────────────────────────────────────────────────────────────
+
+# South Indian: signs have fixed cells, Pisces top-left, running clockwise
+_SOUTH_CELLS = {
+    11: (0, 0), 0: (1, 0), 1: (2, 0), 2: (3, 0),
+    3: (3, 1), 4: (3, 2), 5: (3, 3), 6: (2, 3),
+    7: (1, 3), 8: (0, 3), 9: (0, 2), 10: (0, 1),
+}
+_SOUTH_LINES = (
+    (0, 0, 1, 0), (1, 0, 1, 1), (1, 1, 0, 1), (0, 1, 0, 0),
+    (0.25, 0, 0.25, 1), (0.75, 0, 0.75, 1), (0, 0.25, 1, 0.25), (0, 0.75, 1, 0.75),
+    (0.5, 0, 0.5, 0.25), (0.5, 0.75, 0.5, 1), (0, 0.5, 0.25, 0.5), (0.75, 0.5, 1, 0.5),
+)
+
+# North Indian: houses have fixed cells, house 1 the top diamond, running
+# counter-clockwise. Per house: (centre for planets, position of the sign number)
+_NORTH_HOUSES = (
+    ((0.5, 0.25), (0.5, 0.43)),
+    ((0.25, 0.09), (0.25, 0.2)),
+    ((0.09, 0.25), (0.2, 0.25)),
+    ((0.25, 0.5), (0.43, 0.5)),
+    ((0.09, 0.75), (0.2, 0.75)),
+    ((0.25, 0.91), (0.25, 0.8)),
+    ((0.5, 0.75), (0.5, 0.57)),
+    ((0.75, 0.91), (0.75, 0.8)),
+    ((0.91, 0.75), (0.8, 0.75)),
+    ((0.75, 0.5), (0.57, 0.5)),
+    ((0.91, 0.25), (0.8, 0.25)),
+    ((0.75, 0.09), (0.75, 0.2)),
+)
+_NORTH_LINES = (
+    (0, 0, 1, 0), (1, 0, 1, 1), (1, 1, 0, 1), (0, 1, 0, 0),
+    (0, 0, 1, 1), (1, 0, 0, 1),
+    (0.5, 0, 1, 0.5), (1, 0.5, 0.5, 1), (0.5, 1, 0, 0.5), (0, 0.5, 0.5, 0),
+)
+# Diamond houses have room for more labels per line than the corner triangles
+_NORTH_DIAMONDS = {0, 3, 6, 9}
+
+
+def _stack(x: float, y: float, labels: list, per_line: int) -> list:
+    """Text primitives for `labels` centred on (x, y), `per_line` to a line."""
+    lines = [labels[i:i + per_line] for i in range(0, len(labels), per_line)]
+    top = y - (len(lines) - 1) * _LINE_HEIGHT / 2
+    texts = []
+    for row, line in enumerate(lines):
+        for col, (text, role) in enumerate(line):
+            offset = (col - (len(line) - 1) / 2) * 0.085
+            texts.append((x + offset, top + row * _LINE_HEIGHT, text, role))
+    return texts
+
+
+def _labels_by_sign(asc, grahas) -> dict:
+    by_sign = {}
+    if asc is not None:
+        by_sign.setdefault(asc, []).append(("Asc", "asc"))
+    for abbreviation, sign, retrograde in grahas:
+        by_sign.setdefault(sign, []).append((abbreviation + ("(R)" if retrograde else ""), "planet"))
+    return by_sign
+
+
+def layout(token: str, style: str, label: str = "") -> tuple:
+    """
+    (lines, texts) of a chart in the unit square: lines are (x1, y1, x2, y2),
+    texts are (x, y, text, role), centred on (x, y). A North Indian chart
+    without a known ascendant is drawn with Aries in the first house.
+    """
+    asc, grahas = _parse_token(token)
+    by_sign = _labels_by_sign(asc, grahas)
+    texts = []
+    if style == SOUTH:
+        for sign, (col, row) in _SOUTH_CELLS.items():
+            x, y = col * 0.25, row * 0.25
+            texts.append((x + 0.045, y + 0.03, ZODIAC_SIGNS[sign], "sign"))
+            texts.extend(_stack(x + 0.125, y + 0.14, by_sign.get(sign, []), 3))
+        if label:
+            texts.append((0.5, 0.5, label, "label"))
+        return _SOUTH_LINES, texts
+
+    first = asc or 0
+    for house, ((x, y), (nx, ny)) in enumerate(_NORTH_HOUSES):
+        sign = (first + house) % 12
+        texts.append((nx, ny, str(sign + 1), "sign"))
+        per_line = 3 if house in _NORTH_DIAMONDS else 2
+        texts.extend(_stack(x, y, by_sign.get(sign, []), per_line))
+    return _NORTH_LINES, texts
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Output formats
+# ──────────────────────────────────────────────────────────────────────────────
+
+def render_svg(token: str, style: str, label: str = "", size: int = DEFAULT_SIZE) -> bytes:
+    lines, texts = layout(token, style, label)
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {size} {size}">',
+        f"<title>{escape(label or 'Chart')} ({style} Indian)</title>",
+        f'<rect width="{size}" height="{size}" fill="#ffffff"/>',
+        f'<g stroke="{_STROKE}" stroke-width="1.5" stroke-linecap="square">',
+    ]
+    for x1, y1, x2, y2 in lines:
+        out.append(
+            f'<line x1="{x1 * size:g}" y1="{y1 * size:g}" x2="{x2 * size:g}" y2="{y2 * size:g}"/>'
+        )
+    out.append('</g><g font-family="Helvetica, Arial, sans-serif" text-anchor="middle" dominant-baseline="central">')
+    for x, y, text, role in texts:
+        out.append(
+            f'<text x="{x * size:.1f}" y="{y * size:.1f}" font-size="{_FONT_SIZES[role] * size:.1f}" '
+            f'fill="{_COLORS[role]}">{escape(text)}</text>'
+        )
+    out.append("</g></svg>")
+    return "".join(out).encode()
+
+
+def render_png(token: str, style: str, label: str = "", size: int = DEFAULT_SIZE) -> bytes:
+    import io
+    from PIL import Image, ImageDraw, ImageFont
+
+    lines, texts = layout(token, style, label)
+    image = Image.new("RGB", (size, size), "white")
+    draw = ImageDraw.Draw(image)
+    edge = size - 1
+    for x1, y1, x2, y2 in lines:
+        draw.line((x1 * edge, y1 * edge, x2 * edge, y2 * edge), fill=_STROKE, width=2)
+    fonts = {role: ImageFont.load_default(size=max(8, round(f * size))) for role, f in _FONT_SIZES.items()}
+    for x, y, text, role in texts:
+        draw.text((x * size, y * size), text, fill=_COLORS[role], font=fonts[role], anchor="mm")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def chart_drawing(token: str, style: str, label: str = "", size: float = 200):
+    """A ReportLab Drawing of the chart, `size` points square, for report PDFs."""
+    from reportlab.graphics.shapes import Drawing, Line, String
+    from reportlab.lib import colors
+
+    lines, texts = layout(token, style, label)
+    drawing = Drawing(size, size)
+    stroke = colors.HexColor(_STROKE)
+    for x1, y1, x2, y2 in lines:
+        # ReportLab's y axis points up
+        drawing.add(Line(x1 * size, size - y1 * size, x2 * size, size - y2 * size,
+                         strokeColor=stroke, strokeWidth=1))
+    for x, y, text, role in texts:
+        font_size = _FONT_SIZES[role] * size
+        drawing.add(String(
+            x * size, size - y * size - font_size * 0.35, text,
+            fontName="Helvetica", fontSize=font_size, textAnchor="middle",
+            fillColor=colors.HexColor(_COLORS[role]),
+        ))
+    return drawing
+
+
+def image_key(token: str, style: str, chart: str, fmt: str) -> str:
+    return f"chart_wheel_{RENDER_VERSION}_{style}_{chart}_{token}.{fmt}"
+
+
+def image_etag(token: str, style: str, chart: str, fmt: str) -> str:
+    return hashlib.sha256(image_key(token, style, chart, fmt).encode()).hexdigest()[:32]
+
+
+def validate(token: str, style: str, chart: str, fmt: str):
+    """An error message for unsupported arguments, or None."""
+    if style not in STYLES:
+        return f"style must be one of {list(STYLES)}."
+    if chart not in DIVISIONAL_CHARTS:
+        return f"chart must be one of {DIVISIONAL_CHARTS}."
+    if fmt not in FORMATS:
+        return f"format must be one of {list(FORMATS)}."
+    if not is_valid_token(token):
+        return "Invalid chart token."
+    return None
+
+
+def get_chart_image(token: str, style: str, chart: str, fmt: str) -> bytes:
+    """The rendered image, from the cache when any profile has rendered this chart before."""
+    key = image_key(token, style, chart, fmt)
+    image = cache.get(key)
+    if image is None:
+        render = render_png if fmt == "png" else render_svg
+        image = render(token, style, chart)
+        cache.set(key, image, timeout=_IMAGE_TTL)
+    return image
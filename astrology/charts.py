@@ -0,0 +1,217 @@
+"""
+Natal chart shaping shared by the views and NatalChartCache.
+
+Turns the raw birth-details / divisional-chart API responses into the
+frontend payload served by NatalChartView. The payload depends only on the
+cached API data, so NatalChartCache stores it pre-serialized (see
+NatalChartCache.refresh_chart_payload) and bumps CHART_PAYLOAD_VERSION
+whenever the shape below changes.
+"""
+
+import hashlib
+import json
+
+# Bump when build_chart_payload's output changes; stale stored payloads are
+# rebuilt on their next read.
+CHART_PAYLOAD_VERSION = 1
+
+# Every divisional chart the frontend renders, in response order.
+DIVISIONAL_CHARTS = [
+    "D1",
+    "D2",
+    "D3",
+    "D4",
+    "D7",
+    "D9",
+    "D10",
+    "D12",
+    "D16",
+    "D20",
+    "D24",
+    "D27",
+    "D30",
+    "D40",
+    "D45",
+    "D60",
+]
+
+ZODIAC_SIGNS = [
+    "Ari",
+    "Tau",
+    "Gem",
+    "Can",
+    "Leo",
+    "Vir",
+    "Lib",
+    "Sco",
+    "Sag",
+    "Cap",
+    "Aqu",
+    "Pis",
+]
+
+SIGN_LORDS = {
+    "Ari": "Mars",
+    "Tau": "Venus",
+    "Gem": "Mercury",
+    "Can": "Moon",
+    "Leo": "Sun",
+    "Vir": "Mercury",
+    "Lib": "Venus",
+    "Sco": "Mars",
+    "Sag": "Jupiter",
+    "Cap": "Saturn",
+    "Aqu": "Saturn",
+    "Pis": "Jupiter",
+}
+
+
+SIGN_INDEX = {sign: i for i, sign in enumerate(ZODIAC_SIGNS)}
+
+_NAKSHATRA_KEYS = ("nakshatra", "nakshatra_pada", "nakshatra_lord", "nakshatra_sublord")
+
+
+def _house_layout(asc_idx: int) -> tuple:
+    """
+    Returns (rashis, owners, lord_houses) for an ascendant sign index: the sign
+    and lord of houses 1-12, and the houses each lord rules, in house order.
+    """
+    rashis = tuple(ZODIAC_SIGNS[(asc_idx + i) % 12] for i in range(12))
+    owners = tuple(SIGN_LORDS.get(sign, "") for sign in rashis)
+    lord_houses = {}
+    for house_num, owner in enumerate(owners, start=1):
+        lord_houses.setdefault(owner, []).append(house_num)
+    return rashis, owners, lord_houses
+
+
+# One layout per ascendant sign, so charts never recompute house ownership.
+_HOUSE_LAYOUTS = tuple(_house_layout(i) for i in range(12))
+
+# Used when the ascendant sign is unrecognized: houses stay blank and every
+# planet falls in house 1.
+_UNKNOWN_LAYOUT = (("",) * 12, ("",) * 12, {})
+
+
+def _planet_nakshatras(full_planets: list) -> dict:
+    """Maps planet name to its nakshatra fields, extracted once for all charts."""
+    return {
+        p.get("planet"): {key: p.get(key) for key in _NAKSHATRA_KEYS}
+        for p in full_planets
+    }
+
+
+_NO_NAKSHATRA = {key: None for key in _NAKSHATRA_KEYS}
+
+
+def _build_ui_tables(positions: list, nakshatras: dict) -> dict:
+    """
+    Builds Graha and Bhava details explicitly mapped for the UI.
+
+    `nakshatras` comes from _planet_nakshatras so the planet lookup is shared
+    across every divisional chart of a profile.
+    """
+    asc_sign = "Ari"
+    for pos in positions:
+        if pos.get("planet") == "Ascendant":
+            asc_sign = pos.get("sign", "Ari")
+            break
+
+    asc_idx = SIGN_INDEX.get(asc_sign)
+    rashis, owners, lord_houses = (
+        _UNKNOWN_LAYOUT if asc_idx is None else _HOUSE_LAYOUTS[asc_idx]
+    )
+    residents = [[] for _ in range(12)]
+    graha_details = []
+
+    for pos in positions:
+        p_name = pos.get("planet")
+        if p_name == "Ascendant":
+            continue
+
+        p_sign = pos.get("sign")
+        plt_idx = SIGN_INDEX.get(p_sign)
+        if asc_idx is None or plt_idx is None:
+            house_num = 1
+        else:
+            house_num = ((plt_idx - asc_idx) % 12) + 1
+        residents[house_num - 1].append(p_name)
+
+        graha_details.append(
+            {
+                "graha": p_name,
+                "longitude_rashi": p_sign,
+                "longitude_degree": pos.get("degree"),
+                "current_bhava": house_num,
+                "rules_bhavas": list(lord_houses.get(p_name, ())),
+                **nakshatras.get(p_name, _NO_NAKSHATRA),
+            }
+        )
+
+    return {
+        "graha_details": graha_details,
+        "bhava_details": [
+            {"bhava": i + 1, "residents": residents[i], "owner": owners[i], "rashi": rashis[i]}
+            for i in range(12)
+        ],
+    }
+
+
+def has_all_divisional_charts(divisional: dict) -> bool:
+    """True if the divisional API response carries every chart in DIVISIONAL_CHARTS."""
+    cached_charts = {c["chart"] for c in divisional.get("data", {}).get("charts", [])}
+    return set(DIVISIONAL_CHARTS).issubset(cached_charts)
+
+
+def build_chart_payload(birth_details: dict, divisional: dict) -> dict:
+    """
+    Builds the profile-independent part of the natal chart response: planet
+    details plus positions and UI tables for every divisional chart.
+    """
+    bd_data = birth_details.get("data", {})
+    div_data = divisional.get("data", {})
+    planets_list = bd_data.get("planets", [])
+
+    payload = {
+        "planets": planets_list,
+        "ascendant": bd_data.get("ascendant"),
+        "moon_sign": bd_data.get("moon_sign"),
+        "sun_sign": bd_data.get("sun_sign"),
+        "nakshatra": bd_data.get("nakshatra"),
+        "ayanamsa": bd_data.get("ayanamsa"),
+        "ayanamsa_value": bd_data.get("ayanamsa_value"),
+        "calculation_info": bd_data.get("calculation_info"),
+        "vargottama_planets": div_data.get("vargottama_planets", []),
+    }
+
+    # Dynamic divisional charts extraction
+    charts = {c["chart"]: c for c in div_data.get("charts", [])}
+    nakshatras = _planet_nakshatras(planets_list)
+
+    for chart_code in DIVISIONAL_CHARTS:
+        chart_obj = charts.get(chart_code, {})
+        chart_tables = _build_ui_tables(chart_obj.get("positions", []), nakshatras)
+
+        key_name = f"{chart_code.lower()}_chart"
+        payload[key_name] = {
+            "name": chart_obj.get("name", chart_code),
+            "purpose": chart_obj.get("purpose", ""),
+            "positions": chart_obj.get("positions", []),
+            "graha_details": chart_tables["graha_details"],
+            "bhava_details": chart_tables["bhava_details"],
+        }
+
+    return payload
+
+
+def serialize_chart_payload(birth_details: dict, divisional: dict) -> tuple:
+    """
+    Returns (payload_json, sha256_hex) for the chart payload. The JSON is a
+    compact object literal so the view can splice the birth profile in front
+    of it without re-encoding.
+    """
+    payload_json = json.dumps(
+        build_chart_payload(birth_details, divisional),
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return payload_json, hashlib.sha256(payload_json.encode()).hexdigest()
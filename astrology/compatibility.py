@@ -0,0 +1,278 @@
+"""
+Ashtakoota (eight-koota) compatibility matching.
+
+Every koota depends only on the two Moon positions, and a Moon position is
+one of 108 nakshatra padas (27 nakshatras x 4; nine padas per sign). So the
+whole scoring space is 108 x 108 and is computed once at import into a flat
+byte table of half-points — KOOTA_TABLE holds the eight koota scores per
+(groom pada, bride pada), TOTAL_TABLE their sum. Scoring a pair, or every
+pair in a family tree, is then just index arithmetic into those tables.
+
+Scores follow the common North Indian tables (maximum 36 points); dosha
+cancellations are not applied.
+"""
+
+import re
+
+from .charts import SIGN_INDEX, SIGN_LORDS, ZODIAC_SIGNS
+
+PADAS = 108
+MAX_SCORE = 36
+
+NAKSHATRAS = [
+    "Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra",
+    "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purva Phalguni",
+    "Uttara Phalguni", "Hasta", "Chitra", "Swati", "Vishakha", "Anuradha",
+    "Jyeshtha", "Mula", "Purva Ashadha", "Uttara Ashadha", "Shravana",
+    "Dhanishta", "Shatabhisha", "Purva Bhadrapada", "Uttara Bhadrapada",
+    "Revati",
+]
+
+# (name, maximum points), in table order
+KOOTAS = (
+    ("varna", 1),
+    ("vashya", 2),
+    ("tara", 3),
+    ("yoni", 4),
+    ("graha_maitri", 5),
+    ("gana", 6),
+    ("bhakoot", 7),
+    ("nadi", 8),
+)
+
+# --- Koota attributes --------------------------------------------------------
+
+# Varna by sign: 3 Brahmin (water), 2 Kshatriya (fire), 1 Vaishya (earth), 0 Shudra (air)
+_VARNA = (2, 1, 0, 3, 2, 1, 0, 3, 2, 1, 0, 3)
+
+_CHATUSHPADA, _MANAVA, _JALACHARA, _VANACHARA, _KEETA = range(5)
+# Vashya by sign; Sagittarius and Capricorn change group at 15 degrees
+_VASHYA = (
+    (_CHATUSHPADA,), (_CHATUSHPADA,), (_MANAVA,), (_JALACHARA,), (_VANACHARA,),
+    (_MANAVA,), (_MANAVA,), (_KEETA,), (_MANAVA, _CHATUSHPADA),
+    (_CHATUSHPADA, _JALACHARA), (_MANAVA,), (_JALACHARA,),
+)
+# Half-points, [groom group][bride group]
+_VASHYA_POINTS = (
+    (4, 2, 2, 1, 2),
+    (2, 4, 1, 0, 2),
+    (2, 1, 4, 2, 2),
+    (0, 0, 0, 4, 0),
+    (2, 2, 2, 0, 4),
+)
+
+# Yoni animal per nakshatra: Horse, Elephant, Sheep, Serpent, Dog, Cat, Rat,
+# Cow, Buffalo, Tiger, Deer, Monkey, Mongoose, Lion
+_YONI = (
+    0, 1, 2, 3, 3, 4, 5, 2, 5, 6, 6, 7, 8, 9, 8, 9, 10, 10, 4, 11, 12, 11, 13,
+    0, 13, 7, 1,
+)
+_YONI_POINTS = (
+    (4, 2, 2, 3, 2, 2, 2, 1, 0, 1, 3, 3, 2, 1),
+    (2, 4, 3, 3, 2, 2, 2, 2, 3, 1, 2, 3, 2, 0),
+    (2, 3, 4, 2, 1, 2, 1, 3, 3, 1, 2, 0, 3, 1),
+    (3, 3, 2, 4, 2, 1, 1, 1, 1, 2, 2, 2, 0, 2),
+    (2, 2, 1, 2, 4, 2, 1, 2, 2, 1, 0, 2, 1, 1),
+    (2, 2, 2, 1, 2, 4, 0, 2, 2, 1, 3, 3, 2, 1),
+    (2, 2, 1, 1, 1, 0, 4, 2, 2, 2, 2, 2, 1, 2),
+    (1, 2, 3, 1, 2, 2, 2, 4, 3, 0, 3, 2, 2, 1),
+    (0, 3, 3, 1, 2, 2, 2, 3, 4, 1, 2, 2, 2, 1),
+    (1, 1, 1, 2, 1, 1, 2, 0, 1, 4, 1, 1, 2, 1),
+    (3, 2, 2, 2, 0, 3, 2, 3, 2, 1, 4, 2, 2, 1),
+    (3, 3, 0, 2, 2, 3, 2, 2, 2, 1, 2, 4, 3, 2),
+    (2, 2, 3, 0, 1, 2, 1, 2, 2, 2, 2, 3, 4, 2),
+    (1, 0, 1, 2, 1, 1, 2, 1, 1, 1, 1, 2, 2, 4),
+)
+
+# Natural relationships of the sign lords: planet -> (friends, enemies)
+_FRIENDSHIP = {
+    "Sun": ({"Moon", "Mars", "Jupiter"}, {"Venus", "Saturn"}),
+    "Moon": ({"Sun", "Mercury"}, set()),
+    "Mars": ({"Sun", "Moon", "Jupiter"}, {"Mercury"}),
+    "Mercury": ({"Sun", "Venus"}, {"Moon"}),
+    "Jupiter": ({"Sun", "Moon", "Mars"}, {"Mercury", "Venus"}),
+    "Venus": ({"Mercury", "Saturn"}, {"Sun", "Moon"}),
+    "Saturn": ({"Mercury", "Venus"}, {"Sun", "Moon", "Mars"}),
+}
+# Half-points by the pair of attitudes (2 friend, 1 neutral, 0 enemy), either order
+_MAITRI_POINTS = {(2, 2): 10, (2, 1): 8, (1, 1): 6, (2, 0): 2, (1, 0): 1, (0, 0): 0}
+
+# Gana per nakshatra: 0 Deva, 1 Manushya, 2 Rakshasa
+_GANA = (
+    0, 1, 2, 1, 0, 1, 0, 0, 2, 2, 1, 1, 0, 2, 0, 2, 0, 2, 2, 1, 1, 0, 2, 2, 1,
+    1, 0,
+)
+# Half-points, [groom gana][bride gana]
+_GANA_POINTS = ((12, 12, 2), (10, 12, 0), (2, 0, 12))
+
+# Nadi per nakshatra cycles Aadi, Madhya, Antya, Antya, Madhya, Aadi
+_NADI = tuple((0, 1, 2, 2, 1, 0)[i % 6] for i in range(27))
+
+
+def _attitude(planet: str, other: str) -> int:
+    if planet == other:
+        return 2
+    friends, enemies = _FRIENDSHIP[planet]
+    return 2 if other in friends else 0 if other in enemies else 1
+
+
+def _tara_ok(from_nakshatra: int, to_nakshatra: int) -> bool:
+    # Vipat, Pratyari and Vadha (3rd, 5th, 7th of every nine) are inauspicious
+    return ((to_nakshatra - from_nakshatra) % 27 + 1) % 9 not in (3, 5, 7)
+
+
+def _koota_points(groom: int, bride: int) -> tuple:
+    """The eight koota scores, in half-points, for two Moon padas (0-107)."""
+    g_nak, b_nak = groom // 4, bride // 4
+    g_sign, b_sign = groom // 9, bride // 9
+
+    # Which half of its sign each pada's midpoint falls in
+    g_vashya = _VASHYA[g_sign][-1 if (groom % 9) >= 4 else 0]
+    b_vashya = _VASHYA[b_sign][-1 if (bride % 9) >= 4 else 0]
+
+    g_lord = SIGN_LORDS[ZODIAC_SIGNS[g_sign]]
+    b_lord = SIGN_LORDS[ZODIAC_SIGNS[b_sign]]
+    attitudes = tuple(sorted((_attitude(g_lord, b_lord), _attitude(b_lord, g_lord)), reverse=True))
+
+    distance = (g_sign - b_sign) % 12 + 1   # groom's sign counted from the bride's
+    bhakoot_dosha = distance in (2, 12, 5, 9, 6, 8)
+
+    return (
+        2 if _VARNA[g_sign] >= _VARNA[b_sign] else 0,
+        _VASHYA_POINTS[g_vashya][b_vashya],
+        3 * (_tara_ok(b_nak, g_nak) + _tara_ok(g_nak, b_nak)),
+        2 * _YONI_POINTS[_YONI[g_nak]][_YONI[b_nak]],
+        _MAITRI_POINTS[attitudes],
+        _GANA_POINTS[_GANA[g_nak]][_GANA[b_nak]],
+        0 if bhakoot_dosha else 14,
+        0 if _NADI[g_nak] == _NADI[b_nak] else 16,
+    )
+
+
+def _build_tables():
+    kootas = bytearray()
+    totals = bytearray()
+    for groom in range(PADAS):
+        for bride in range(PADAS):
+            points = _koota_points(groom, bride)
+            kootas.extend(points)
+            totals.append(sum(points))
+    return bytes(kootas), bytes(totals)
+
+
+# Half-points; index (groom * PADAS + bride) * 8 + koota, and groom * PADAS + bride
+KOOTA_TABLE, TOTAL_TABLE = _build_tables()
+
+
+# --- Moon position from a birth-details response -----------------------------
+
+_NAKSHATRA_INDEX = {re.sub(r"[^a-z]", "", n.lower()): i for i, n in enumerate(NAKSHATRAS)}
+_NAKSHATRA_INDEX.update({
+    "aswini": 0, "ashvini": 0, "krithika": 2, "kritika": 2, "mrigasira": 4,
+    "mrigashirsha": 4, "mrigasirsha": 4, "arudra": 5, "aridra": 5,
+    "pushyami": 7, "aslesha": 8, "makha": 9, "poorvaphalguni": 10,
+    "hastha": 12, "chithra": 13, "svati": 14, "swathi": 14, "visakha": 15,
+    "vishaka": 15, "jyestha": 17, "jyeshta": 17, "moola": 18,
+    "poorvashadha": 19, "purvashadha": 19, "uttarashadha": 20, "sravana": 21,
+    "shravan": 21, "dhanishtha": 22, "dhanista": 22, "satabhisha": 23,
+    "shatabhishak": 23, "shatabhisa": 23, "poorvabhadrapada": 24,
+    "purvabhadra": 24, "uttarabhadra": 25, "revathi": 26,
+})
+
+
+def _sign_index(sign):
+    return SIGN_INDEX.get(str(sign or "")[:3].title())
+
+
+def moon_pada(birth_details: dict):
+    """
+    The Moon's pada (0-107) from a /vedic/birth-details response, or None.
+    Uses the Moon's nakshatra and pada, falling back to its sign and degree.
+    """
+    moon = next(
+        (p for p in (birth_details or {}).get("data", {}).get("planets", []) if p.get("planet") == "Moon"),
+        None,
+    )
+    if moon is None:
+        return None
+
+    nakshatra = _NAKSHATRA_INDEX.get(re.sub(r"[^a-z]", "", str(moon.get("nakshatra") or "").lower()))
+    try:
+        pada = int(moon.get("nakshatra_pada"))
+    except (TypeError, ValueError):
+        pada = None
+    if nakshatra is not None and pada in (1, 2, 3, 4):
+        return nakshatra * 4 + pada - 1
+
+    sign = _sign_index(moon.get("sign"))
+    try:
+        degree = float(moon.get("degree"))
+    except (TypeError, ValueError):
+        return None
+    if sign is None or not 0 <= degree < 30:
+        return None
+    return min(int((sign * 30 + degree) * PADAS / 360), PADAS - 1)
+
+
+def describe_pada(pada: int) -> dict:
+    return {
+        "pada": pada,
+        "nakshatra": NAKSHATRAS[pada // 4],
+        "nakshatra_pada": pada % 4 + 1,
+        "moon_sign": ZODIAC_SIGNS[pada // 9],
+    }
+
+
+# --- Scoring -----------------------------------------------------------------
+
+def score(groom: int, bride: int) -> dict:
+    """Ashtakoota score for two Moon padas, with the per-koota breakdown."""
+    offset = groom * PADAS + bride
+    points = KOOTA_TABLE[offset * 8: offset * 8 + 8]
+    kootas = {
+        name: {"score": p / 2, "max": maximum}
+        for (name, maximum), p in zip(KOOTAS, points)
+    }
+    return {
+        "total": TOTAL_TABLE[offset] / 2,
+        "max": MAX_SCORE,
+        "kootas": kootas,
+        "nadi_dosha": points[7] == 0,
+        "bhakoot_dosha": points[6] == 0,
+    }
+
+
+def score_all_pairs(padas: list, grooms: list = None) -> list:
+    """
+    Scores every unordered pair of `padas` in one pass over TOTAL_TABLE.
+    `grooms` optionally flags which entries take the groom's side of the
+    asymmetric kootas; otherwise the earlier entry does. Returns
+    (i, j, total) for i < j, total in points.
+    """
+    n = len(padas)
+    grooms = grooms or [None] * n
+    rows = [pada * PADAS for pada in padas]
+    pairs = []
+    for i in range(n):
+        row_i = rows[i]
+        for j in range(i + 1, n):
+            if grooms[j] and not grooms[i]:
+                total = TOTAL_TABLE[rows[j] + padas[i]]
+            else:
+                total = TOTAL_TABLE[row_i + padas[j]]
+            pairs.append((i, j, total / 2))
+    return pairs
+
+
+def load_moon_padas(birth_profile_ids) -> dict:
+    """
+    {birth_profile_id: Moon pada} for the profiles with a cached
+    birth-details response, read in one query without loading other blobs.
+    """
+    from .models import NatalChartBlob
+
+    rows = NatalChartBlob.objects.filter(
+        natal_cache__birth_profile_id__in=list(birth_profile_ids), source="birth_details"
+    ).values_list("natal_cache__birth_profile_id", "data")
+    padas = {profile_id: moon_pada(data) for profile_id, data in rows}
+    return {profile_id: pada for profile_id, pada in padas.items() if pada is not None}
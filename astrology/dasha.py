@@ -0,0 +1,101 @@
+"""
+Vimshottari dasha timeline helpers.
+
+Flattens the /vedic/vimshottari-dasha response into (level, lord, parent,
+start, end) periods for the DashaPeriod table, and re-derives the
+"current period" fields from those rows. The API's own current_period is
+frozen at fetch time, while the natal cache is kept forever, so it goes
+stale as soon as the Mahadasha or Antardasha turns over.
+"""
+
+from datetime import date
+
+MAHADASHA = "mahadasha"
+ANTARDASHA = "antardasha"
+
+
+def _parse_date(value):
+    """Parses the leading YYYY-MM-DD of an API date/datetime string."""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def _period(item: dict, level: str, parent_lord: str = ""):
+    lord = item.get("planet") or item.get("lord")
+    start = _parse_date(item.get("start_date") or item.get("start"))
+    end = _parse_date(item.get("end_date") or item.get("end"))
+    if not lord or not start or not end:
+        return None
+    return (level, lord, parent_lord, start, end)
+
+
+def iter_dasha_periods(dasha_data: dict):
+    """
+    Yields (level, lord, parent_lord, start_date, end_date) for every
+    Mahadasha and Antardasha in a dasha API response. Antardashas come from
+    each Mahadasha's nested list when present, otherwise from
+    current_antardashas (which belong to the Mahadasha running at fetch time).
+    """
+    data = (dasha_data or {}).get("data", {})
+    seen = set()
+
+    def emit(period):
+        if period and period not in seen:
+            seen.add(period)
+            return True
+        return False
+
+    for maha in data.get("mahadashas", []):
+        period = _period(maha, MAHADASHA)
+        if emit(period):
+            yield period
+        for antar in maha.get("antardashas", []):
+            sub = _period(antar, ANTARDASHA, parent_lord=period[1] if period else "")
+            if emit(sub):
+                yield sub
+
+    current_maha = data.get("current_period", {}).get("mahadasha") or ""
+    for antar in data.get("current_antardashas", []):
+        sub = _period(antar, ANTARDASHA, parent_lord=current_maha)
+        if emit(sub):
+            yield sub
+
+
+def with_current_period(dasha_data: dict, maha, antars: list, on: date) -> dict:
+    """
+    Returns a copy of `dasha_data` whose current_period / current_antardashas
+    reflect the date `on`, given the Mahadasha DashaPeriod covering it and
+    that Mahadasha's Antardashas (see DashaPeriod.current_for). Returns the
+    data unchanged when no stored Mahadasha covers `on`.
+    """
+    if maha is None:
+        return dasha_data
+    antar = next((p for p in antars if p.start_date <= on < p.end_date), None)
+
+    # Shallow copies: only the two current-period keys are replaced
+    data = dict((dasha_data or {}).get("data", {}))
+    shaped = {**(dasha_data or {}), "data": data}
+    fetched_maha = data.get("current_period", {}).get("mahadasha")
+    data["current_period"] = {
+        **data.get("current_period", {}),
+        "mahadasha": maha.lord,
+        "mahadasha_end": maha.end_date.isoformat(),
+        "antardasha": antar.lord if antar else None,
+        "antardasha_end": antar.end_date.isoformat() if antar else None,
+    }
+    if antars or fetched_maha != maha.lord:
+        # The fetched list belongs to whichever Mahadasha ran at fetch time
+        data["current_antardashas"] = [
+            {
+                "planet": p.lord,
+                "start_date": p.start_date.isoformat(),
+                "end_date": p.end_date.isoformat(),
+                "is_current": p is antar,
+            }
+            for p in antars
+        ]
+    return shaped
@@ -0,0 +1,189 @@
+"""
+Festival calendar storage.
+
+Each (year, language) calendar is fetched from the API once, unfiltered, and
+kept in FestivalCalendarCache; its festivals are normalized into Festival
+rows so type / region filters and date-range queries (including ones that
+cross a year boundary) run in SQL instead of costing another API call.
+
+Item fields are mapped onto Festival columns from the first non-empty key
+of _NAME_KEYS, _DATE_KEYS, _TYPE_KEYS and _REGION_KEYS. Items without a
+date are skipped; items without a type get a blank festival_type and are
+only returned when no type filter is given.
+
+Regions are normalized at index time (normalize_place_name, so "Tamil Nadu"
+and "tamil-nadu" are one key) and filtered by equality on the indexed
+(language, region, festival_date) columns. A festival listing several
+regions gets one row per region; all but the first have is_primary=False
+and are skipped by queries without a region filter. A festival without a
+region, or marked pan-India ("All India", "Pan India", ...), is stored with
+a blank region and matches every regional query, as the provider's own
+region filter does.
+"""
+
+import logging
+import threading
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .gazetteer import normalize_place_name
+from .models import Festival, FestivalCalendarCache
+from .services import AstrologyAPIClient
+
+logger = logging.getLogger(__name__)
+
+# Keys that may hold an item's fields in the API response, in priority order
+_NAME_KEYS = ("name", "festival", "title")
+_DATE_KEYS = ("date", "start_date", "festival_date")
+_END_DATE_KEYS = ("end_date",)
+_TYPE_KEYS = ("type", "festival_type", "category")
+_REGION_KEYS = ("region", "regions")
+# Region values meaning the festival is observed across India
+_PAN_INDIA_REGIONS = {"all india", "pan india", "india", "all", "all regions", "national"}
+
+_COUNT_KEYS = ("total", "count", "total_festivals")
+
+
+def _first(item: dict, keys):
+    return next((item[k] for k in keys if item.get(k) not in (None, "")), None)
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def region_key(value) -> str:
+    """A region as stored in and compared with Festival.region."""
+    return normalize_place_name(str(value))[:200]
+
+
+def _regions(value) -> list:
+    """The item's region keys; [""] for pan-India festivals."""
+    values = value if isinstance(value, list) else str(value or "").split(",")
+    regions = list(dict.fromkeys(region_key(r) for r in values if region_key(r)))
+    if not regions or any(r in _PAN_INDIA_REGIONS for r in regions):
+        return [""]
+    return regions
+
+
+def festival_list_key(calendar_data: dict):
+    """The key of the festival list in a calendar response, or None."""
+    if isinstance(calendar_data.get("festivals"), list):
+        return "festivals"
+    for key, value in calendar_data.items():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            return key
+    return None
+
+
+def _festival_rows(calendar: FestivalCalendarCache):
+    key = festival_list_key(calendar.calendar_data or {})
+    for item in (calendar.calendar_data or {}).get(key, []) if key else []:
+        festival_date = _parse_date(_first(item, _DATE_KEYS))
+        if festival_date is None:
+            continue
+        fields = dict(
+            calendar=calendar,
+            year=calendar.year,
+            language=calendar.language,
+            name=str(_first(item, _NAME_KEYS) or "")[:200],
+            festival_date=festival_date,
+            end_date=_parse_date(_first(item, _END_DATE_KEYS)),
+            festival_type=str(_first(item, _TYPE_KEYS) or "").lower()[:50],
+            details=item,
+        )
+        for i, region in enumerate(_regions(_first(item, _REGION_KEYS))):
+            yield Festival(region=region, is_primary=i == 0, **fields)
+
+
+def index_calendar(calendar: FestivalCalendarCache):
+    """(Re)builds the Festival rows for an unfiltered year calendar, once."""
+    with transaction.atomic():
+        # The calendar row lock serializes a request and the prefetch thread
+        # indexing the same year; whoever comes second finds it indexed
+        locked = FestivalCalendarCache.objects.select_for_update().get(pk=calendar.pk)
+        if not locked.is_indexed:
+            calendar.festivals.all().delete()
+            Festival.objects.bulk_create(list(_festival_rows(calendar)))
+            locked.is_indexed = True
+            locked.save(update_fields=["is_indexed"])
+    calendar.is_indexed = True
+
+
+def get_year_calendar(year: int, language: str) -> FestivalCalendarCache:
+    """
+    Returns the indexed, unfiltered calendar for (year, language), calling
+    the API the first time it is needed. Raises AstrologyAPIError.
+    """
+    calendar = FestivalCalendarCache.objects.filter(
+        year=year, festival_type="", language=language, region=""
+    ).first()
+    if calendar is None:
+        raw_response = AstrologyAPIClient().get_festival_calendar(
+            year=year, language=language or None
+        )
+        calendar, _ = FestivalCalendarCache.objects.update_or_create(
+            year=year,
+            festival_type="",
+            language=language,
+            region="",
+            defaults={"calendar_data": raw_response.get("data", {}), "is_indexed": False},
+        )
+    if not calendar.is_indexed:
+        index_calendar(calendar)
+    return calendar
+
+
+def prefetch_year_async(year: int, language: str):
+    """Fetches and indexes a year's calendar in the background, once."""
+    if FestivalCalendarCache.objects.filter(
+        year=year, festival_type="", language=language, region="", is_indexed=True
+    ).exists():
+        return
+    lock_key = f"prefetching_festivals_{year}_{language}"
+    if not cache.add(lock_key, True, timeout=600):
+        return
+
+    def run():
+        try:
+            get_year_calendar(year, language)
+            logger.info(f"Prefetched festival calendar for {year} ({language})")
+        except Exception as e:
+            logger.error(f"Festival calendar prefetch for {year} ({language}) failed: {e}")
+        finally:
+            cache.delete(lock_key)
+
+    threading.Thread(target=run).start()
+
+
+def filter_festivals(queryset, festival_type: str = "", region: str = ""):
+    if festival_type:
+        queryset = queryset.filter(festival_type=festival_type.lower())
+    if region:
+        queryset = queryset.filter(region__in=["", region_key(region)])
+    else:
+        queryset = queryset.filter(is_primary=True)
+    return queryset
+
+
+def filtered_calendar_data(calendar: FestivalCalendarCache, festival_type: str, region: str) -> dict:
+    """The year's calendar response with its festival list filtered in SQL."""
+    data = dict(calendar.calendar_data or {})
+    key = festival_list_key(data)
+    if key is None:
+        return data
+    festivals = list(
+        filter_festivals(calendar.festivals.all(), festival_type, region)
+        .order_by("festival_date", "id")
+        .values_list("details", flat=True)
+    )
+    data[key] = festivals
+    for count_key in _COUNT_KEYS:
+        if isinstance(data.get(count_key), int):
+            data[count_key] = len(festivals)
+    return data
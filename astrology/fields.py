@@ -1,33 +1,92 @@
+import json
+import zlib
+
+from django.conf import settings
 from django.db import models
+from django.db.models.query_utils import DeferredAttribute
 from core.encryption import encrypt_value, decrypt_value
 
-class EncryptedCharField(models.TextField):
-    description = "A field that stores encrypted character data in the database"
+
+class PendingCiphertext(str):
+    """
+    A column value loaded from the database but not decrypted yet.
+
+    Encrypted fields keep this in the instance __dict__ until the attribute is
+    first read, so code paths that only need `id`, `user_id` or a couple of
+    columns don't pay for decrypting the rest of the row. `.values()` and
+    `.values_list()` return it as-is (still ciphertext) — load model instances
+    (optionally with `.only()`) to get plaintext.
+    """
+
+
+class EncryptedAttribute(DeferredAttribute):
+    """
+    Data descriptor that decrypts a PendingCiphertext on first access and
+    caches the plaintext on the instance. Unloaded (deferred) columns fall
+    back to the usual DeferredAttribute fetch.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, PendingCiphertext):
+            value = self.field.decrypt_db_value(str(value))
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class EncryptedFieldMixin:
+    descriptor_class = EncryptedAttribute
+
+    # Defer decryption until the attribute is read. Flip to False to restore
+    # eager decryption in from_db_value (used by benchmark_decryption).
+    lazy_decrypt = True
 
     def from_db_value(self, value, expression, connection):
         if value is None:
             return value
+        if self.lazy_decrypt:
+            return PendingCiphertext(value)
+        return self.decrypt_db_value(value)
+
+    def decrypt_db_value(self, value):
         return decrypt_value(value)
 
+    def pre_save(self, model_instance, add):
+        # A column that was never read is written back as the same ciphertext
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, PendingCiphertext):
+            return value
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        if isinstance(value, PendingCiphertext):
+            return str(value)
+        return encrypt_value(str(value))
+
+
+class EncryptedCharField(EncryptedFieldMixin, models.TextField):
+    description = "A field that stores encrypted character data in the database"
+
     def to_python(self, value):
         if value is None or not isinstance(value, str):
             return value
-        # If it looks like ciphertext (and decryption works), it might already be decrypted 
+        # If it looks like ciphertext (and decryption works), it might already be decrypted
         # but to_python is called during serialization etc.
         # Standard implementation of from_db_value + to_python ensures it works correctly.
         return value
 
-    def get_prep_value(self, value):
-        if value is None:
-            return value
-        return encrypt_value(str(value))
 
-class EncryptedIntegerField(models.TextField):
+class EncryptedIntegerField(EncryptedFieldMixin, models.TextField):
     description = "A field that stores encrypted integer data as text in the database"
 
-    def from_db_value(self, value, expression, connection):
-        if value is None:
-            return value
+    def decrypt_db_value(self, value):
         decrypted = decrypt_value(value)
         try:
             return int(decrypted)
@@ -42,7 +101,73 @@ class EncryptedIntegerField(models.TextField):
         except (ValueError, TypeError):
             return value
 
-    def get_prep_value(self, value):
+
+class EncryptedFloatField(EncryptedFieldMixin, models.TextField):
+    description = "A field that stores encrypted floating-point data as text in the database"
+
+    def decrypt_db_value(self, value):
+        decrypted = decrypt_value(value)
+        try:
+            return float(decrypted)
+        except (ValueError, TypeError):
+            return decrypted
+
+    def to_python(self, value):
         if value is None:
             return value
-        return encrypt_value(str(value))
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return value
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    Stores a JSON value as compact UTF-8 bytes, zlib-compressed once it
+    reaches ASTROLOGY_BLOB_COMPRESS_MIN_BYTES. Compressed values carry a
+    one-byte b"z" prefix; anything else is plain JSON, so changing the
+    threshold never makes existing rows unreadable.
+    """
+
+    description = "A JSON value stored as (optionally compressed) bytes"
+    COMPRESSED_PREFIX = b"z"
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def encode(cls, value) -> bytes:
+        raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+        min_bytes = getattr(settings, "ASTROLOGY_BLOB_COMPRESS_MIN_BYTES", 0)
+        if min_bytes and len(raw) >= min_bytes:
+            return cls.COMPRESSED_PREFIX + zlib.compress(raw, 6)
+        return raw
+
+    @classmethod
+    def decode(cls, data):
+        data = bytes(data)
+        if data.startswith(cls.COMPRESSED_PREFIX):
+            data = zlib.decompress(data[len(cls.COMPRESSED_PREFIX):])
+        return json.loads(data)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.decode(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return self.decode(value)
+        if isinstance(value, str):
+            # value_to_string output, e.g. from loaddata
+            return json.loads(value)
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        return connection.Database.Binary(self.encode(value))
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
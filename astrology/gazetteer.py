@@ -0,0 +1,182 @@
+"""
+Offline gazetteer for birth places.
+
+Resolves a (city, country_code) pair to coordinates and an IANA timezone and
+serves city autocomplete, all from a local tab-separated file — no network
+call. The bundled file (astrology/data/gazetteer.tsv) covers major cities;
+point ASTROLOGY_GAZETTEER_PATH at a larger file produced by
+`manage.py build_gazetteer` from a GeoNames dump for full coverage.
+
+Names and alternate names are normalized (accents stripped, lower-cased,
+punctuation collapsed) into one sorted key list, so a prefix lookup is a
+bisect plus a scan over the matching run.
+"""
+
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "gazetteer.tsv")
+
+# Shortest query the autocomplete endpoint answers; one letter matches too much
+MIN_PREFIX_LENGTH = 2
+
+# Country names / abbreviations commonly typed after a city in free text
+_COUNTRY_ALIASES = {
+    "india": "IN", "bharat": "IN", "pakistan": "PK", "bangladesh": "BD",
+    "nepal": "NP", "sri lanka": "LK", "usa": "US", "us": "US",
+    "united states": "US", "united states of america": "US", "america": "US",
+    "uk": "GB", "united kingdom": "GB", "great britain": "GB", "england": "GB",
+    "scotland": "GB", "wales": "GB", "canada": "CA", "australia": "AU",
+    "new zealand": "NZ", "uae": "AE", "united arab emirates": "AE",
+    "saudi arabia": "SA", "ksa": "SA", "qatar": "QA", "oman": "OM",
+    "kuwait": "KW", "bahrain": "BH", "singapore": "SG", "malaysia": "MY",
+    "germany": "DE", "france": "FR", "netherlands": "NL", "ireland": "IE",
+    "south africa": "ZA", "kenya": "KE", "mauritius": "MU", "fiji": "FJ",
+}
+
+
+class Place(NamedTuple):
+    name: str
+    country_code: str
+    admin1: str
+    latitude: float
+    longitude: float
+    timezone: str
+    population: int
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "country_code": self.country_code,
+            "region": self.admin1,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "timezone": self.timezone,
+        }
+
+
+def normalize_place_name(value: str) -> str:
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return re.sub(r"[^0-9a-z]+", " ", value.lower()).strip()
+
+
+class Gazetteer:
+    def __init__(self, rows):
+        """`rows` is an iterable of (Place, name keys) pairs."""
+        self.places = []
+        entries = set()
+        for place, keys in rows:
+            for key in keys:
+                entries.add((key, -place.population, len(self.places)))
+            self.places.append(place)
+        entries = sorted(entries)
+        # Parallel lists: bisect on the keys, read place indexes from the other
+        self._keys = [key for key, _, _ in entries]
+        self._place_ids = [i for _, _, i in entries]
+
+    @classmethod
+    def from_file(cls, path: str):
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, alternates, country, admin1, lat, lon, tz, population = (
+                    line.rstrip("\n").split("\t")
+                )
+                keys = {normalize_place_name(name)}
+                keys.update(normalize_place_name(a) for a in alternates.split("|") if a)
+                keys.discard("")
+                place = Place(
+                    name, country.upper(), admin1, float(lat), float(lon), tz, int(population or 0)
+                )
+                rows.append((place, keys))
+        return cls(rows)
+
+    def _matches(self, key: str, country_code: str = "", exact: bool = False):
+        """Place indexes whose name key equals / starts with `key`, most populous first per key."""
+        country_code = (country_code or "").upper()
+        i = bisect_left(self._keys, key)
+        while i < len(self._keys):
+            candidate = self._keys[i]
+            if candidate != key and (exact or not candidate.startswith(key)):
+                break
+            place_id = self._place_ids[i]
+            if not country_code or self.places[place_id].country_code == country_code:
+                yield place_id
+            i += 1
+
+    def lookup(self, city: str, country_code: str = ""):
+        """
+        The most populous place named `city` (or one of its alternate names)
+        in `country_code`, or None. "Pune, Maharashtra" falls back to "Pune".
+        """
+        candidates = [city or ""]
+        if "," in candidates[0]:
+            candidates.append(candidates[0].split(",", 1)[0])
+        for candidate in candidates:
+            key = normalize_place_name(candidate)
+            if not key:
+                continue
+            ids = set(self._matches(key, country_code, exact=True))
+            if ids:
+                return max((self.places[i] for i in ids), key=lambda p: p.population)
+        return None
+
+    def lookup_text(self, text: str):
+        """
+        Resolves free text such as "Pune, India" or "New York, USA": the first
+        comma-separated part is the city and the last, when it names a
+        country, restricts the match. Otherwise the most populous city of
+        that name anywhere wins.
+        """
+        city, country_code = split_place_text(text)
+        if not city:
+            return None
+        return self.lookup(city, country_code) or (
+            self.lookup(city) if country_code else None
+        )
+
+    def autocomplete(self, prefix: str, country_code: str = "", limit: int = 10):
+        """Places with a name or alternate name starting with `prefix`, most populous first."""
+        key = normalize_place_name(prefix)
+        if len(key) < MIN_PREFIX_LENGTH:
+            return []
+        ids = set(self._matches(key, country_code))
+        places = sorted((self.places[i] for i in ids), key=lambda p: (-p.population, p.name))
+        return places[:limit]
+
+
+def split_place_text(text: str):
+    """
+    (city, country_code) of free text such as "Pune, India": the first
+    comma-separated part and the country code the last part names, or ""
+    when it names none.
+    """
+    parts = [p.strip() for p in (text or "").split(",") if p.strip()]
+    if not parts:
+        return "", ""
+    country_code = ""
+    if len(parts) > 1:
+        hint = parts[-1]
+        country_code = _COUNTRY_ALIASES.get(normalize_place_name(hint), "")
+        if not country_code and len(hint) == 2 and hint.isalpha():
+            country_code = hint.upper()
+    return parts[0], country_code
+
+
+@lru_cache(maxsize=2)
+def _load(path: str) -> Gazetteer:
+    return Gazetteer.from_file(path)
+
+
+def get_gazetteer() -> Gazetteer:
+    """The process-wide gazetteer, loaded on first use."""
+    return _load(getattr(settings, "ASTROLOGY_GAZETTEER_PATH", "") or DEFAULT_GAZETTEER_PATH)
@@ -0,0 +1,173 @@
+"""
+Micro-benchmark for natal chart shaping (astrology.charts.build_chart_payload)
+over recorded NatalChartCache rows.
+
+Times the lookup-table implementation against the previous per-planet
+list.index / per-house scan implementation (kept below as the reference)
+and checks both produce identical payloads:
+
+    python manage.py benchmark_chart_payload --limit 50 --repeat 200
+
+Rows can also be read from a JSON export — a list of objects with
+"birth_details_data" and "divisional_data" keys:
+
+    python manage.py benchmark_chart_payload --file natal_rows.json
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from astrology.charts import (
+    DIVISIONAL_CHARTS,
+    SIGN_LORDS,
+    ZODIAC_SIGNS,
+    build_chart_payload,
+)
+from astrology.models import NatalChartCache
+
+
+def _reference_calculate_house(asc_sign, planet_sign):
+    try:
+        asc_idx = ZODIAC_SIGNS.index(asc_sign)
+        plt_idx = ZODIAC_SIGNS.index(planet_sign)
+        return ((plt_idx - asc_idx) % 12) + 1
+    except ValueError:
+        return 1
+
+
+def _reference_ui_tables(positions, full_planets):
+    asc_pos = next((p for p in positions if p.get("planet") == "Ascendant"), None)
+    asc_sign = asc_pos.get("sign", "Ari") if asc_pos else "Ari"
+
+    planet_map = {p.get("planet"): p for p in full_planets}
+    graha_details = []
+    bhava_details = {
+        i: {"bhava": i, "residents": [], "owner": "", "rashi": ""} for i in range(1, 13)
+    }
+    try:
+        asc_idx = ZODIAC_SIGNS.index(asc_sign)
+        for i in range(12):
+            sign = ZODIAC_SIGNS[(asc_idx + i) % 12]
+            bhava_details[i + 1]["rashi"] = sign
+            bhava_details[i + 1]["owner"] = SIGN_LORDS.get(sign, "")
+    except ValueError:
+        pass
+
+    for pos in positions:
+        p_name = pos.get("planet")
+        p_sign = pos.get("sign")
+        if p_name == "Ascendant":
+            continue
+        house_num = _reference_calculate_house(asc_sign, p_sign)
+        if 1 <= house_num <= 12:
+            bhava_details[house_num]["residents"].append(p_name)
+        full_p = planet_map.get(p_name, {})
+        ruled_houses = [
+            h_num for h_num, h_data in bhava_details.items() if h_data["owner"] == p_name
+        ]
+        graha_details.append(
+            {
+                "graha": p_name,
+                "longitude_rashi": p_sign,
+                "longitude_degree": pos.get("degree"),
+                "current_bhava": house_num,
+                "rules_bhavas": ruled_houses,
+                "nakshatra": full_p.get("nakshatra"),
+                "nakshatra_pada": full_p.get("nakshatra_pada"),
+                "nakshatra_lord": full_p.get("nakshatra_lord"),
+                "nakshatra_sublord": full_p.get("nakshatra_sublord"),
+            }
+        )
+
+    return {"graha_details": graha_details, "bhava_details": list(bhava_details.values())}
+
+
+def _reference_payload(birth_details, divisional):
+    bd_data = birth_details.get("data", {})
+    div_data = divisional.get("data", {})
+    planets_list = bd_data.get("planets", [])
+    payload = {
+        "planets": planets_list,
+        "ascendant": bd_data.get("ascendant"),
+        "moon_sign": bd_data.get("moon_sign"),
+        "sun_sign": bd_data.get("sun_sign"),
+        "nakshatra": bd_data.get("nakshatra"),
+        "ayanamsa": bd_data.get("ayanamsa"),
+        "ayanamsa_value": bd_data.get("ayanamsa_value"),
+        "calculation_info": bd_data.get("calculation_info"),
+        "vargottama_planets": div_data.get("vargottama_planets", []),
+    }
+    charts = {c["chart"]: c for c in div_data.get("charts", [])}
+    for chart_code in DIVISIONAL_CHARTS:
+        chart_obj = charts.get(chart_code, {})
+        tables = _reference_ui_tables(chart_obj.get("positions", []), planets_list)
+        payload[f"{chart_code.lower()}_chart"] = {
+            "name": chart_obj.get("name", chart_code),
+            "purpose": chart_obj.get("purpose", ""),
+            "positions": chart_obj.get("positions", []),
+            "graha_details": tables["graha_details"],
+            "bhava_details": tables["bhava_details"],
+        }
+    return payload
+
+
+class Command(BaseCommand):
+    help = "Times natal chart payload shaping over recorded chart data, reference vs current."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=50,
+            help="NatalChartCache rows to sample (default 50).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=100,
+            help="Times to shape each row per implementation (default 100).",
+        )
+        parser.add_argument(
+            "--file",
+            help="Read rows from a JSON export instead of the database.",
+        )
+
+    def handle(self, *args, **options):
+        rows = self._load_rows(options)
+        if not rows:
+            raise CommandError("No recorded chart data to benchmark.")
+
+        for birth_details, divisional in rows:
+            if build_chart_payload(birth_details, divisional) != _reference_payload(
+                birth_details, divisional
+            ):
+                raise CommandError("Current payload differs from the reference implementation.")
+
+        repeat = options["repeat"]
+        timings = {}
+        for label, builder in (("reference", _reference_payload), ("current", build_chart_payload)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for birth_details, divisional in rows:
+                    builder(birth_details, divisional)
+            timings[label] = (time.perf_counter() - start) / (repeat * len(rows))
+
+        self.stdout.write(f"rows: {len(rows)}, repeat: {repeat}")
+        for label, per_call in timings.items():
+            self.stdout.write(f"{label:<12}{per_call * 1e6:>10.1f} us/payload")
+        self.stdout.write(f"speedup: {timings['reference'] / timings['current']:.2f}x")
+
+    def _load_rows(self, options):
+        if options["file"]:
+            with open(options["file"]) as fh:
+                records = json.load(fh)
+        else:
+            caches = NatalChartCache.objects.order_by("pk").prefetch_related("blobs")
+            records = [
+                {
+                    "birth_details_data": cache.birth_details_data,
+                    "divisional_data": cache.divisional_data,
+                }
+                for cache in caches[: options["limit"]]
+            ]
+        return [
+            (r["birth_details_data"] or {}, r["divisional_data"] or {}) for r in records
+        ]
@@ -0,0 +1,86 @@
+"""
+Counts field decryptions per request on the hot astrology endpoints, with
+eager decryption (every encrypted column decrypted in from_db_value, the
+previous behaviour) and with lazy decryption (decrypt on first read).
+
+Creates a throwaway student / teacher / guest-profile fixture inside a
+transaction that is rolled back at the end, so it is safe to run against
+any database:
+
+    python manage.py benchmark_decryption --guests 25
+"""
+
+import uuid
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from astrology import fields as encrypted_fields
+from astrology.models import BirthProfile, AstrologyDashboardAccess
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = "Reports decrypt_value calls per astrology endpoint, eager vs lazy."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--guests", type=int, default=25,
+            help="Guest profiles to create for the teacher (default 25).",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=["*"]):
+            student, teacher = self._build_fixture(options["guests"])
+            endpoints = [
+                ("GET birth-profile/", student, "/api/astrology/birth-profile/"),
+                ("GET insights/ (teacher)", teacher, f"/api/astrology/insights/?student_id={student.id}"),
+                ("GET insights/progress/", student, "/api/astrology/insights/progress/"),
+                ("GET dasha/ (teacher)", teacher, f"/api/astrology/dasha/?student_id={student.id}"),
+                ("GET teacher/students/", teacher, "/api/astrology/teacher/students/"),
+                ("GET guest-profiles/?search=", teacher, "/api/astrology/guest-profiles/?search=guest"),
+            ]
+
+            results = {}
+            for mode, lazy in (("eager", False), ("lazy", True)):
+                with mock.patch.object(encrypted_fields.EncryptedFieldMixin, "lazy_decrypt", lazy):
+                    for label, user, url in endpoints:
+                        results.setdefault(label, {})[mode] = self._count(user, url)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'endpoint':<32}{'eager':>8}{'lazy':>8}")
+        for label, counts in results.items():
+            self.stdout.write(f"{label:<32}{counts['eager']:>8}{counts['lazy']:>8}")
+
+    def _build_fixture(self, guest_count):
+        def make_user(role):
+            return User.objects.create_user(
+                id=str(uuid.uuid4()), email=f"bench-{uuid.uuid4().hex}@example.com", role=role
+            )
+
+        birth = {
+            "birth_year": 1990, "birth_month": 5, "birth_day": 15,
+            "birth_hour": 12, "birth_minute": 30,
+            "city": "Mumbai", "country_code": "IN", "timezone_str": "Asia/Kolkata",
+            "marriage_date": "2015-02-01", "kids": 2, "comments": "Benchmark fixture",
+        }
+        student = make_user(User.Role.STUDENT)
+        teacher = make_user(User.Role.TEACHER)
+        BirthProfile.objects.create(user=student, **birth)
+        AstrologyDashboardAccess.objects.create(student=student, teacher=teacher)
+        for i in range(guest_count):
+            BirthProfile.objects.create(created_by=teacher, guest_name=f"Guest {i}", **birth)
+        return student, teacher
+
+    def _count(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        with mock.patch.object(
+            encrypted_fields, "decrypt_value", wraps=encrypted_fields.decrypt_value
+        ) as spy:
+            client.get(url)
+        return spy.call_count
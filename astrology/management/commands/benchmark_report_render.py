@@ -0,0 +1,108 @@
+"""
+Micro-benchmark for report PDF rendering (astrology.report_generator).
+
+Previews are rendered on the ReportStatusView request path
+(_ensure_report_preview), so their latency is user-facing. Times the
+current renderer — module-level styles, body pages laid out once and
+replayed under each profile's cover — against a full platypus build of the
+same cover and body per call (the previous approach, kept below as the
+reference), and checks both produce the same number of pages:
+
+    python manage.py benchmark_report_render --limit 10 --repeat 50
+    python manage.py benchmark_report_render --full
+"""
+
+import io
+import re
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+from astrology import report_generator
+from astrology.models import BirthProfile
+
+_SAMPLE_PROFILE = SimpleNamespace(
+    id=0, display_name="Sample Profile", city="Mumbai", country_code="IN"
+)
+
+
+def _page_count(pdf_bytes: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\b", pdf_bytes))
+
+
+def _reference_render(cover: list, body_story) -> bytes:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=report_generator._PAGE_SIZE,
+        leftMargin=report_generator._MARGIN,
+        rightMargin=report_generator._MARGIN,
+        topMargin=report_generator._MARGIN,
+        bottomMargin=report_generator._MARGIN,
+    )
+    doc.build(cover + [PageBreak()] + body_story())
+    return buffer.getvalue()
+
+
+def _reference_preview(profile) -> bytes:
+    cover = report_generator._cover_story(profile, "Preview")
+    return _reference_render(cover, report_generator._preview_body_story)
+
+
+def _reference_full(profile) -> bytes:
+    cover = report_generator._cover_story(profile, "Full report")
+    return _reference_render(cover, report_generator._full_body_story)
+
+
+def _current_full(profile) -> bytes:
+    return report_generator._build_full_report(profile)[0]
+
+
+class Command(BaseCommand):
+    help = "Times report PDF rendering, per-call platypus build vs pre-laid-out body pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=10,
+            help="Birth profiles to render covers for (default 10).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=50,
+            help="Times to render each profile per implementation (default 50).",
+        )
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Benchmark the full paid report instead of the preview.",
+        )
+
+    def handle(self, *args, **options):
+        profiles = list(BirthProfile.objects.order_by("pk")[: options["limit"]]) or [_SAMPLE_PROFILE]
+        if options["full"]:
+            reference, current = _reference_full, _current_full
+        else:
+            reference, current = _reference_preview, report_generator._build_preview_report
+
+        # First render also lays out the shared body pages; keep it out of the timings
+        start = time.perf_counter()
+        pages = _page_count(current(profiles[0]))
+        warmup = time.perf_counter() - start
+        if pages != _page_count(reference(profiles[0])):
+            raise CommandError("Current renderer paginates differently from the reference.")
+
+        repeat = options["repeat"]
+        timings = {}
+        for label, render in (("reference", reference), ("current", current)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for profile in profiles:
+                    render(profile)
+            timings[label] = (time.perf_counter() - start) / (repeat * len(profiles))
+
+        kind = "full report" if options["full"] else "preview"
+        self.stdout.write(f"{kind}: {pages} pages, profiles: {len(profiles)}, repeat: {repeat}")
+        self.stdout.write(f"first render (incl. body layout): {warmup * 1e3:.1f} ms")
+        for label, per_call in timings.items():
+            self.stdout.write(f"{label:<12}{per_call * 1e3:>10.2f} ms/render")
+        self.stdout.write(f"speedup: {timings['reference'] / timings['current']:.2f}x")
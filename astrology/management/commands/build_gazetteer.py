@@ -0,0 +1,85 @@
+"""
+Builds a gazetteer TSV for astrology.gazetteer from a GeoNames dump
+(https://download.geonames.org/export/dump/, e.g. cities15000.txt).
+
+    python manage.py build_gazetteer --source cities15000.txt --output /srv/gazetteer.tsv
+    python manage.py build_gazetteer --source cities5000.txt --admin1 admin1CodesASCII.txt \
+        --min-population 20000 --output /srv/gazetteer.tsv
+
+Then set ASTROLOGY_GAZETTEER_PATH to the output file. Only populated places
+(feature class P) are kept; alternate names are kept when they normalize to
+something searchable (Latin script), so autocomplete matches "Bombay" as
+well as "Mumbai".
+"""
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from astrology.gazetteer import normalize_place_name
+
+HEADER = (
+    "# Generated by `manage.py build_gazetteer` from GeoNames data (CC BY 4.0).\n"
+    "# name\talternate_names (|-separated)\tcountry_code\tadmin1\tlatitude\tlongitude\ttimezone\tpopulation\n"
+)
+
+# Column positions in the GeoNames "geoname" table
+NAME, ASCIINAME, ALTERNATES, LAT, LON, FEATURE_CLASS, COUNTRY, ADMIN1, POPULATION, TIMEZONE = (
+    1, 2, 3, 4, 5, 6, 8, 10, 14, 17,
+)
+
+
+class Command(BaseCommand):
+    help = "Builds the birth-place gazetteer TSV from a GeoNames cities dump."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", required=True, help="GeoNames cities*.txt file.")
+        parser.add_argument("--output", required=True, help="Gazetteer TSV to write.")
+        parser.add_argument(
+            "--admin1",
+            help="GeoNames admin1CodesASCII.txt, to store region names instead of codes.",
+        )
+        parser.add_argument(
+            "--min-population", type=int, default=0,
+            help="Skip places smaller than this (default 0).",
+        )
+
+    def handle(self, *args, **options):
+        admin1_names = {}
+        if options["admin1"]:
+            with open(options["admin1"], encoding="utf-8") as f:
+                for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                    admin1_names[row[0]] = row[2]
+
+        written = 0
+        try:
+            source = open(options["source"], encoding="utf-8")
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['source']}: {e}")
+
+        with source, open(options["output"], "w", encoding="utf-8") as out:
+            out.write(HEADER)
+            for row in csv.reader(source, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if len(row) <= TIMEZONE or row[FEATURE_CLASS] != "P" or not row[TIMEZONE]:
+                    continue
+                population = int(row[POPULATION] or 0)
+                if population < options["min_population"]:
+                    continue
+
+                name_key = normalize_place_name(row[NAME])
+                alternates, seen = [], {name_key}
+                for alternate in [row[ASCIINAME], *row[ALTERNATES].split(",")]:
+                    key = normalize_place_name(alternate)
+                    if key and key not in seen and not alternate.isupper():
+                        seen.add(key)
+                        alternates.append(alternate.replace("|", " "))
+
+                country = row[COUNTRY]
+                admin1 = admin1_names.get(f"{country}.{row[ADMIN1]}", row[ADMIN1])
+                out.write("\t".join([
+                    row[NAME], "|".join(alternates), country, admin1,
+                    row[LAT], row[LON], row[TIMEZONE], str(population),
+                ]) + "\n")
+                written += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} places to {options['output']}."))
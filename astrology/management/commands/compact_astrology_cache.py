@@ -0,0 +1,115 @@
+"""
+Prunes and re-encodes the cached astrology API responses already in the
+database, then reports the bytes saved per table.
+
+New rows are pruned (astrology.pruning) and compressed on write; this
+command brings existing rows in line — after changing a pruning schema or
+ASTROLOGY_BLOB_COMPRESS_MIN_BYTES, for instance:
+
+    python manage.py compact_astrology_cache --dry-run
+    python manage.py compact_astrology_cache --batch-size 200
+
+Each table is walked in primary-key order, one chunk per transaction: a
+chunk is read with SELECT ... FOR UPDATE and written back before the
+transaction ends, so a cache refill made while it runs is never overwritten
+with the pruned old value. Rows whose stored bytes would not change are
+skipped, so it is safe to interrupt and rerun.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Length
+
+from astrology.fields import CompressedJSONField
+from astrology.models import NakshatraPredictionCache, NatalChartBlob, TransitCache
+from astrology.pruning import prune
+
+# model -> (column, pruning source; None means the row's own `source`)
+TARGETS = {
+    NatalChartBlob: ("data", None),
+    TransitCache: ("transit_data", "transit"),
+    NakshatraPredictionCache: ("prediction_data", "nakshatra_predictions"),
+}
+
+
+class Command(BaseCommand):
+    help = "Prunes and compresses cached astrology API blobs and reports bytes saved."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=200,
+            help="Rows per chunk / transaction (default 200).",
+        )
+        parser.add_argument(
+            "--model",
+            help="Restrict to one model, e.g. astrology.TransitCache.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report the savings without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        targets = list(TARGETS.items())
+        if options["model"]:
+            targets = [
+                (m, t) for m, t in targets if m._meta.label_lower == options["model"].lower()
+            ]
+            if not targets:
+                raise CommandError(f"{options['model']} has no compacted columns.")
+
+        report = [self._compact_model(model, *target, options) for model, target in targets]
+
+        self.stdout.write(
+            f"{'table':<36}{'rows':>8}{'changed':>9}{'before':>14}{'after':>14}{'saved':>14}{'%':>7}"
+        )
+        for table, rows, changed, before, after in report:
+            saved = before - after
+            pct = (100 * saved / before) if before else 0
+            self.stdout.write(
+                f"{table:<36}{rows:>8}{changed:>9}{before:>14}{after:>14}{saved:>14}{pct:>6.1f}%"
+            )
+        if options["dry_run"]:
+            self.stdout.write("Dry run: nothing was written.")
+
+    def _compact_model(self, model, column, source, options):
+        batch_size = options["batch_size"]
+        qs = model._default_manager.order_by("pk").annotate(_stored_bytes=Length(column))
+        if source is None:
+            qs = qs.only("pk", "source", column)
+        else:
+            qs = qs.only("pk", column)
+
+        last_pk = 0
+        rows = changed = before = after = 0
+        while True:
+            chunk_qs = qs.filter(pk__gt=last_pk)
+            if not options["dry_run"]:
+                # Locked until the chunk is written back, so a concurrent
+                # cache refill either lands first (and is pruned here) or waits
+                chunk_qs = chunk_qs.select_for_update()
+            with transaction.atomic():
+                chunk = list(chunk_qs[:batch_size])
+                if not chunk:
+                    break
+
+                to_update = []
+                for obj in chunk:
+                    stored = obj._stored_bytes or 0
+                    value = getattr(obj, column)
+                    pruned = prune(source or obj.source, value)
+                    size = len(CompressedJSONField.encode(pruned)) if pruned is not None else 0
+                    before += stored
+                    after += size
+                    if size != stored:
+                        setattr(obj, column, pruned)
+                        to_update.append(obj)
+
+                if to_update and not options["dry_run"]:
+                    model._default_manager.bulk_update(to_update, [column])
+
+            rows += len(chunk)
+            changed += len(to_update)
+            last_pk = chunk[-1].pk
+
+        return model._meta.db_table, rows, changed, before, after
@@ -0,0 +1,117 @@
+"""
+Deletes TransitCache rows older than the retention window
+(ASTROLOGY_TRANSIT_RETENTION_DAYS, default 30 days before today in UTC).
+
+Designed to run daily alongside live traffic:
+
+    python manage.py purge_transit_cache
+    python manage.py purge_transit_cache --days 14 --batch-size 500 --sleep 0.2
+    python manage.py purge_transit_cache --rollup   # keep monthly summaries
+
+Rows are picked oldest-first through the (cached_for_date, id) index and
+deleted by primary key in small batches, one short transaction each, so no
+long-running lock is held and autovacuum can keep up. With --rollup each
+batch is folded into TransitMonthlySummary in the same transaction that
+deletes it, so a row is counted exactly once even if the run is interrupted.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from astrology.models import TransitCache, TransitMonthlySummary
+
+
+class Command(BaseCommand):
+    help = "Purges TransitCache rows past the retention window, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int,
+            default=getattr(settings, "ASTROLOGY_TRANSIT_RETENTION_DAYS", 30),
+            help="Keep this many past days (default ASTROLOGY_TRANSIT_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Rows deleted per transaction (default 1000).",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=0.0,
+            help="Seconds to pause between batches to limit load (default 0).",
+        )
+        parser.add_argument(
+            "--rollup", action="store_true",
+            help="Fold purged rows into TransitMonthlySummary before deleting them.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Count rows past retention without deleting anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0:
+            raise CommandError("--days must be zero or more.")
+
+        cutoff = timezone.now().date() - timedelta(days=options["days"])
+        expired = TransitCache.objects.filter(cached_for_date__lt=cutoff)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} transit rows before {cutoff} would be purged.")
+            return
+
+        purged = 0
+        while True:
+            with transaction.atomic():
+                batch = expired.order_by("cached_for_date", "id")[: options["batch_size"]]
+                if options["rollup"]:
+                    rows = list(batch.only("id", "birth_profile_id", "cached_for_date", "transit_data"))
+                    ids = [row.id for row in rows]
+                    self._rollup(rows)
+                else:
+                    ids = list(batch.values_list("id", flat=True))
+                if not ids:
+                    break
+                TransitCache.objects.filter(id__in=ids).delete()
+
+            purged += len(ids)
+            self.stdout.write(f"purged {purged} (through {cutoff})")
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {purged} transit rows cached before {cutoff}."
+        ))
+
+    def _rollup(self, rows):
+        keys = {(row.birth_profile_id, row.cached_for_date.replace(day=1)) for row in rows}
+        existing = TransitMonthlySummary.objects.select_for_update().filter(
+            birth_profile_id__in={profile_id for profile_id, _ in keys},
+            month__in={month for _, month in keys},
+        )
+        summaries = {
+            (s.birth_profile_id, s.month): s
+            for s in existing
+            if (s.birth_profile_id, s.month) in keys
+        }
+        to_update = list(summaries.values())
+        to_create = []
+        for key in keys - set(summaries):
+            summaries[key] = TransitMonthlySummary(birth_profile_id=key[0], month=key[1])
+            to_create.append(summaries[key])
+
+        for row in rows:
+            summaries[(row.birth_profile_id, row.cached_for_date.replace(day=1))].add_day(
+                row.transit_data
+            )
+
+        now = timezone.now()
+        for summary in to_update:
+            summary.updated_at = now  # bulk_update skips auto_now
+        TransitMonthlySummary.objects.bulk_create(to_create)
+        TransitMonthlySummary.objects.bulk_update(
+            to_update, ["days_cached", "planet_sign_days", "updated_at"]
+        )
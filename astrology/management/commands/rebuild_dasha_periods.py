@@ -0,0 +1,55 @@
+"""
+Rebuilds the DashaPeriod timeline table from every cached dasha response.
+
+New dasha responses populate DashaPeriod when they are saved; run this once
+after deploying the table to backfill existing natal caches, and again if
+the flattening in astrology.dasha changes. Works in primary-key chunks, one
+transaction each, and can be resumed with --start-after.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from astrology.models import DashaPeriod, NatalChartBlob
+
+
+class Command(BaseCommand):
+    help = "Rebuilds DashaPeriod rows from the cached Vimshottari dasha data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=200,
+            help="Natal caches per chunk / transaction (default 200).",
+        )
+        parser.add_argument(
+            "--start-after", type=int,
+            help="Resume after this NatalChartBlob primary key.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = options["start_after"] or 0
+        processed = 0
+
+        blobs = NatalChartBlob.objects.filter(source="dasha").select_related("natal_cache")
+        while True:
+            chunk = list(
+                blobs.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("id", "data", "natal_cache__birth_profile_id")[:batch_size]
+            )
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                for blob in chunk:
+                    DashaPeriod.rebuild_for_profile(blob.natal_cache.birth_profile_id, blob.data)
+
+            processed += len(chunk)
+            last_pk = chunk[-1].pk
+            self.stdout.write(f"Rebuilt {processed} dasha timelines (last pk {last_pk})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt dasha periods for {processed} profiles "
+            f"({DashaPeriod.objects.count()} periods in total)."
+        ))
@@ -0,0 +1,64 @@
+"""
+Rebuilds the GuestNameIndexToken blind index for every BirthProfile.
+
+Run once after deploying the index (to backfill existing profiles) and again
+whenever FIELD_BLIND_INDEX_KEY — or FIELD_ENCRYPTION_KEY, if no dedicated
+blind-index key is set — changes. Works in primary-key chunks, one
+transaction each, and can be resumed with --start-after.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from astrology.models import BirthProfile, GuestNameIndexToken
+from core.encryption import blind_index_prefixes
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the guest_name blind index used by guest profile search."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Profiles per chunk / transaction (default 500).",
+        )
+        parser.add_argument(
+            "--start-after", type=int,
+            help="Resume after this BirthProfile primary key.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = options["start_after"] or 0
+        processed = tokens_written = 0
+
+        while True:
+            chunk = list(
+                BirthProfile.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("id", "guest_name")[:batch_size]
+            )
+            if not chunk:
+                break
+
+            rows = [
+                GuestNameIndexToken(birth_profile_id=profile.pk, token=token)
+                for profile in chunk
+                for token in blind_index_prefixes(
+                    profile.guest_name or "", GuestNameIndexToken.NAMESPACE
+                )
+            ]
+            with transaction.atomic():
+                GuestNameIndexToken.objects.filter(
+                    birth_profile_id__in=[p.pk for p in chunk]
+                ).delete()
+                GuestNameIndexToken.objects.bulk_create(rows, batch_size=1000)
+
+            processed += len(chunk)
+            tokens_written += len(rows)
+            last_pk = chunk[-1].pk
+            self.stdout.write(f"Indexed {processed} profiles (last pk {last_pk})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt guest name index: {processed} profiles, {tokens_written} tokens."
+        ))
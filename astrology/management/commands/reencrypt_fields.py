@@ -0,0 +1,149 @@
+"""
+Re-encrypts every encrypted column (EncryptedCharField, EncryptedIntegerField,
+EncryptedFloatField — any EncryptedFieldMixin field) under the current
+FIELD_ENCRYPTION_KEY.
+
+Rotation procedure:
+  1. Generate a new key, set it as FIELD_ENCRYPTION_KEY and move the old key
+     into FIELD_ENCRYPTION_OLD_KEYS. Reads keep working through MultiFernet.
+  2. Run `python manage.py reencrypt_fields`.
+  3. Once it reports nothing left to rotate, drop the old key.
+
+The command walks each table in primary-key order, one chunk per transaction:
+a chunk is read with SELECT ... FOR UPDATE and written back before the
+transaction ends, so edits made while it runs are never overwritten with
+stale values. It skips values already encrypted with the current key, so it
+is safe to interrupt and rerun, or to resume from a given pk with
+--start-after.
+"""
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.db.models.functions import Cast
+
+from astrology.fields import EncryptedFieldMixin
+from core.encryption import get_encryptor
+
+
+def _encrypted_models():
+    """Yields (model, [encrypted fields]) for every installed model that has any."""
+    for model in apps.get_models():
+        fields = [
+            f
+            for f in model._meta.concrete_fields
+            if isinstance(f, EncryptedFieldMixin)
+        ]
+        if fields:
+            yield model, fields
+
+
+class Command(BaseCommand):
+    help = "Re-encrypts encrypted model fields under the current FIELD_ENCRYPTION_KEY."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Rows per chunk / transaction (default 500).",
+        )
+        parser.add_argument(
+            "--model",
+            help="Restrict to one model, e.g. astrology.BirthProfile.",
+        )
+        parser.add_argument(
+            "--start-after",
+            help="Resume after this primary key (requires --model).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Count rows that need rotation without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        key = getattr(settings, "FIELD_ENCRYPTION_KEY", None)
+        if not key:
+            raise CommandError("FIELD_ENCRYPTION_KEY is not set.")
+        if options["start_after"] and not options["model"]:
+            raise CommandError("--start-after requires --model.")
+
+        current = Fernet(key.encode())
+        encryptor = get_encryptor()
+
+        targets = list(_encrypted_models())
+        if options["model"]:
+            targets = [
+                (m, f) for m, f in targets if m._meta.label_lower == options["model"].lower()
+            ]
+            if not targets:
+                raise CommandError(f"No encrypted fields found on model {options['model']}.")
+
+        for model, fields in targets:
+            self._rotate_model(model, fields, current, encryptor, options)
+
+    def _is_current(self, current, token):
+        # Signature check only — no decryption needed to see which key was used
+        try:
+            current.extract_timestamp(token.encode())
+            return True
+        except InvalidToken:
+            return False
+
+    def _rotate_model(self, model, fields, current, encryptor, options):
+        label = model._meta.label
+        batch_size = options["batch_size"]
+        names = [f.name for f in fields]
+
+        # Cast to a plain TextField so the ORM skips from_db_value and hands us ciphertext
+        raw = {f"_raw_{name}": Cast(name, output_field=models.TextField()) for name in names}
+        qs = model._default_manager.order_by("pk").annotate(**raw)
+
+        last_pk = options["start_after"]
+        scanned = rotated = unreadable = 0
+
+        while True:
+            chunk_qs = qs.filter(pk__gt=last_pk) if last_pk is not None else qs
+            if not options["dry_run"]:
+                # Locked until the chunk is written back, so a concurrent
+                # edit either lands first (and is re-encrypted here) or waits
+                chunk_qs = chunk_qs.select_for_update()
+            with transaction.atomic():
+                chunk = list(chunk_qs.values("pk", *raw.keys())[:batch_size])
+                if not chunk:
+                    break
+
+                to_update = []
+                for row in chunk:
+                    tokens = {name: row[f"_raw_{name}"] for name in names}
+                    stale = [
+                        name for name, token in tokens.items()
+                        if token and not self._is_current(current, token)
+                    ]
+                    if not stale:
+                        continue
+
+                    # bulk_update writes every listed column, so decrypt the whole row
+                    obj = model(pk=row["pk"])
+                    try:
+                        for name, token in tokens.items():
+                            setattr(obj, name, encryptor.decrypt(token.encode()).decode() if token else token)
+                    except InvalidToken:
+                        # Not readable with any configured key (e.g. legacy plaintext)
+                        unreadable += 1
+                        continue
+                    to_update.append(obj)
+
+                if to_update and not options["dry_run"]:
+                    # get_prep_value re-encrypts each plaintext with the current key
+                    model._default_manager.bulk_update(to_update, names, batch_size=batch_size)
+
+            scanned += len(chunk)
+            rotated += len(to_update)
+            last_pk = chunk[-1]["pk"]
+            self.stdout.write(f"{label}: scanned {scanned}, rotated {rotated} (last pk {last_pk})")
+
+        verb = "would rotate" if options["dry_run"] else "rotated"
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {verb} {rotated} of {scanned} rows; {unreadable} unreadable rows left untouched."
+        ))
@@ -0,0 +1,76 @@
+"""
+Fills BirthProfile.latitude / longitude (and an empty timezone_str) from the
+offline gazetteer for profiles saved before birth places were resolved
+locally. New and edited profiles are resolved on save.
+
+    python manage.py resolve_birth_places
+    python manage.py resolve_birth_places --batch-size 500 --dry-run
+
+Only profiles without coordinates are visited, in primary-key chunks with
+one transaction each, so the command can be interrupted and rerun.
+A timezone_str already back-filled from the API is kept.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from astrology.gazetteer import get_gazetteer
+from astrology.models import BirthProfile
+
+
+class Command(BaseCommand):
+    help = "Resolves coordinates and timezones for existing birth profiles from the gazetteer."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=200,
+            help="Profiles per chunk / transaction (default 200).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report what would be resolved without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        gazetteer = get_gazetteer()
+        profiles = (
+            BirthProfile.objects.filter(latitude__isnull=True)
+            .order_by("pk")
+            .only("id", "city", "country_code", "timezone_str")
+        )
+
+        last_pk = 0
+        visited = resolved = 0
+        unknown = set()
+        while True:
+            chunk = list(profiles.filter(pk__gt=last_pk)[: options["batch_size"]])
+            if not chunk:
+                break
+
+            to_update = []
+            for profile in chunk:
+                place = gazetteer.lookup(profile.city, profile.country_code)
+                if place is None:
+                    unknown.add((profile.city, profile.country_code))
+                    continue
+                profile.latitude = place.latitude
+                profile.longitude = place.longitude
+                profile.timezone_str = profile.timezone_str or place.timezone
+                to_update.append(profile)
+
+            if to_update and not options["dry_run"]:
+                with transaction.atomic():
+                    BirthProfile.objects.bulk_update(
+                        to_update, ["latitude", "longitude", "timezone_str"]
+                    )
+
+            visited += len(chunk)
+            resolved += len(to_update)
+            last_pk = chunk[-1].pk
+
+        for city, country_code in sorted(unknown):
+            self.stdout.write(f"not in gazetteer: {city}, {country_code}")
+        verb = "Would resolve" if options["dry_run"] else "Resolved"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {resolved} of {visited} birth profiles without coordinates."
+        ))
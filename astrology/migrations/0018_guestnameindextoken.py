@@ -0,0 +1,26 @@
+# Generated by Django 6.0.3 on 2026-10-18 22:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0017_astrologyreport_preview_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuestNameIndexToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32)),
+                ('birth_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='guest_name_tokens', to='astrology.birthprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'birth_profile'], name='astro_guest_name_token_idx')],
+                'unique_together': {('birth_profile', 'token')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0018_guestnameindextoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='natalchartcache',
+            name='chart_payload',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='natalchartcache',
+            name='chart_payload_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='natalchartcache',
+            name='chart_payload_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
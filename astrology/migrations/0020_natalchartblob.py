@@ -0,0 +1,115 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BLOB_COLUMNS = {
+    "birth_details_data": "birth_details",
+    "divisional_data": "divisional",
+    "kp_data": "kp",
+    "dasha_data": "dasha",
+    "ashtakvarga_data": "ashtakvarga",
+}
+BATCH_SIZE = 200
+
+
+def _batches(queryset):
+    """Yields lists of rows ordered by pk, BATCH_SIZE at a time."""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]["pk"]
+
+
+def move_blobs_to_table(apps, schema_editor):
+    NatalChartCache = apps.get_model("astrology", "NatalChartCache")
+    NatalChartBlob = apps.get_model("astrology", "NatalChartBlob")
+
+    rows = NatalChartCache.objects.values("pk", *BLOB_COLUMNS)
+    for batch in _batches(rows):
+        NatalChartBlob.objects.bulk_create(
+            [
+                NatalChartBlob(natal_cache_id=row["pk"], source=source, data=row[column])
+                for row in batch
+                for column, source in BLOB_COLUMNS.items()
+                if row[column] is not None
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def move_blobs_to_columns(apps, schema_editor):
+    NatalChartCache = apps.get_model("astrology", "NatalChartCache")
+    NatalChartBlob = apps.get_model("astrology", "NatalChartBlob")
+    columns = {source: column for column, source in BLOB_COLUMNS.items()}
+
+    for batch in _batches(NatalChartCache.objects.values("pk")):
+        caches = {
+            cache.pk: cache
+            for cache in NatalChartCache.objects.filter(pk__in=[row["pk"] for row in batch])
+        }
+        blobs = NatalChartBlob.objects.filter(natal_cache_id__in=caches)
+        for blob in blobs:
+            setattr(caches[blob.natal_cache_id], columns[blob.source], blob.data)
+        for cache in caches.values():
+            # The restored columns are NOT NULL once this migration is reversed
+            cache.birth_details_data = cache.birth_details_data or {}
+            cache.divisional_data = cache.divisional_data or {}
+        NatalChartCache.objects.bulk_update(caches.values(), list(BLOB_COLUMNS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0019_natalchartcache_chart_payload_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='natalchartcache',
+            name='birth_details_data',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='natalchartcache',
+            name='divisional_data',
+            field=models.JSONField(null=True),
+        ),
+        migrations.CreateModel(
+            name='NatalChartBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('birth_details', 'Birth details'), ('divisional', 'Divisional charts'), ('kp', 'KP system'), ('dasha', 'Vimshottari dasha'), ('ashtakvarga', 'Ashtakvarga')], max_length=20)),
+                ('data', models.JSONField(blank=True, null=True)),
+                ('natal_cache', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blobs', to='astrology.natalchartcache')),
+            ],
+            options={
+                'unique_together': {('natal_cache', 'source')},
+            },
+        ),
+        migrations.RunPython(move_blobs_to_table, move_blobs_to_columns),
+        migrations.RemoveField(
+            model_name='natalchartcache',
+            name='ashtakvarga_data',
+        ),
+        migrations.RemoveField(
+            model_name='natalchartcache',
+            name='birth_details_data',
+        ),
+        migrations.RemoveField(
+            model_name='natalchartcache',
+            name='dasha_data',
+        ),
+        migrations.RemoveField(
+            model_name='natalchartcache',
+            name='divisional_data',
+        ),
+        migrations.RemoveField(
+            model_name='natalchartcache',
+            name='kp_data',
+        ),
+    ]
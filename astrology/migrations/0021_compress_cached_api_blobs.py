@@ -0,0 +1,112 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:20
+
+import astrology.fields
+from django.db import migrations, models
+
+
+# (model, JSON column) pairs moved to CompressedJSONField. Each column is
+# copied into a temporary "<column>_encoded" column in batches, then swapped in.
+COLUMNS = [
+    ("NatalChartBlob", "data"),
+    ("TransitCache", "transit_data"),
+    ("NakshatraPredictionCache", "prediction_data"),
+]
+BATCH_SIZE = 200
+
+
+def _copy_in_batches(apps, source_column, target_column):
+    for model_name, column in COLUMNS:
+        Model = apps.get_model("astrology", model_name)
+        source, target = source_column.format(column), target_column.format(column)
+        last_pk = 0
+        while True:
+            batch = list(
+                Model.objects.filter(pk__gt=last_pk).order_by("pk").only("pk", source)[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for row in batch:
+                setattr(row, target, getattr(row, source))
+            Model.objects.bulk_update(batch, [target])
+            last_pk = batch[-1].pk
+
+
+def encode_columns(apps, schema_editor):
+    _copy_in_batches(apps, "{}", "{}_encoded")
+
+
+def decode_columns(apps, schema_editor):
+    _copy_in_batches(apps, "{}_encoded", "{}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0020_natalchartblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='natalchartblob',
+            name='data_encoded',
+            field=astrology.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transitcache',
+            name='transit_data_encoded',
+            field=astrology.fields.CompressedJSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='nakshatrapredictioncache',
+            name='prediction_data_encoded',
+            field=astrology.fields.CompressedJSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='transitcache',
+            name='transit_data',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='nakshatrapredictioncache',
+            name='prediction_data',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(encode_columns, decode_columns),
+        migrations.RemoveField(
+            model_name='natalchartblob',
+            name='data',
+        ),
+        migrations.RemoveField(
+            model_name='transitcache',
+            name='transit_data',
+        ),
+        migrations.RemoveField(
+            model_name='nakshatrapredictioncache',
+            name='prediction_data',
+        ),
+        migrations.RenameField(
+            model_name='natalchartblob',
+            old_name='data_encoded',
+            new_name='data',
+        ),
+        migrations.RenameField(
+            model_name='transitcache',
+            old_name='transit_data_encoded',
+            new_name='transit_data',
+        ),
+        migrations.RenameField(
+            model_name='nakshatrapredictioncache',
+            old_name='prediction_data_encoded',
+            new_name='prediction_data',
+        ),
+        migrations.AlterField(
+            model_name='transitcache',
+            name='transit_data',
+            field=astrology.fields.CompressedJSONField(),
+        ),
+        migrations.AlterField(
+            model_name='nakshatrapredictioncache',
+            name='prediction_data',
+            field=astrology.fields.CompressedJSONField(),
+        ),
+    ]
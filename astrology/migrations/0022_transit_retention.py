@@ -0,0 +1,37 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0021_compress_cached_api_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransitMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('days_cached', models.PositiveSmallIntegerField(default=0)),
+                ('planet_sign_days', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transitcache',
+            index=models.Index(fields=['cached_for_date', 'id'], name='astro_transit_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='transitmonthlysummary',
+            name='birth_profile',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transit_summaries', to='astrology.birthprofile'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='transitmonthlysummary',
+            unique_together={('birth_profile', 'month')},
+        ),
+    ]
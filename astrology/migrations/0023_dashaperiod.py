@@ -0,0 +1,29 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0022_transit_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashaPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('mahadasha', 'Mahadasha'), ('antardasha', 'Antardasha')], max_length=12)),
+                ('lord', models.CharField(max_length=20)),
+                ('parent_lord', models.CharField(blank=True, default='', max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('birth_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dasha_periods', to='astrology.birthprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['birth_profile', 'level', 'start_date'], name='astro_dasha_profile_idx'), models.Index(fields=['level', 'start_date'], name='astro_dasha_start_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0023_dashaperiod'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='festivalcalendarcache',
+            name='is_indexed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='Festival',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('language', models.CharField(max_length=10)),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('festival_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('festival_type', models.CharField(blank=True, max_length=50)),
+                ('region', models.CharField(blank=True, max_length=200)),
+                ('details', models.JSONField()),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='festivals', to='astrology.festivalcalendarcache')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['language', 'festival_date'], name='astro_festival_date_idx'), models.Index(fields=['language', 'festival_type', 'festival_date'], name='astro_festival_type_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:15
+
+import astrology.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0024_festival'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='birthprofile',
+            name='latitude',
+            field=astrology.fields.EncryptedFloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='birthprofile',
+            name='longitude',
+            field=astrology.fields.EncryptedFloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0025_birthprofile_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='astrologyreport',
+            name='build_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.1.2 on 2026-10-18 23:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0026_astrologyreport_build_started_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NatalBatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=32, unique=True)),
+                ('state', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished')], default='queued', max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('unique_births', models.IntegerField(default=0)),
+                ('fetched', models.IntegerField(default=0)),
+                ('reused', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('items', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='natal_batch_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Natal Batch Job',
+                'verbose_name_plural': 'Natal Batch Jobs',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.1.2 on 2026-10-18 23:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0027_natalbatchjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsightProgressEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, max_length=50, null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('state', models.CharField(blank=True, max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('birth_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='insight_progress_events', to='astrology.birthprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['birth_profile', 'id'], name='astro_insight_progress_idx')],
+            },
+        ),
+    ]
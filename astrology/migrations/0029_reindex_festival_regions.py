@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def mark_calendars_unindexed(apps, schema_editor):
+    # Pan-India festivals are now stored with a blank region; existing
+    # calendars are re-indexed on their next request
+    FestivalCalendarCache = apps.get_model("astrology", "FestivalCalendarCache")
+    FestivalCalendarCache.objects.filter(is_indexed=True).update(is_indexed=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0028_insightprogressevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_calendars_unindexed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0029_reindex_festival_regions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='astrologyreport',
+            name='build_stage',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='astrologyreport',
+            name='build_stage_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
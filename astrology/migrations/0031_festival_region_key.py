@@ -0,0 +1,30 @@
+# Generated by Django 6.1.2 on 2026-10-19 00:12
+
+from django.db import migrations, models
+
+
+def mark_calendars_unindexed(apps, schema_editor):
+    # Regions are now stored as normalized keys, one row per region; existing
+    # calendars are re-indexed on their next request
+    FestivalCalendarCache = apps.get_model("astrology", "FestivalCalendarCache")
+    FestivalCalendarCache.objects.filter(is_indexed=True).update(is_indexed=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0030_astrologyreport_build_stage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='festival',
+            name='is_primary',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='festival',
+            index=models.Index(fields=['language', 'region', 'festival_date'], name='astro_festival_region_idx'),
+        ),
+        migrations.RunPython(mark_calendars_unindexed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0031_festival_region_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='natalbatchjob',
+            name='state',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+    ]
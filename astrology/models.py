@@ -1,6 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from core.encryption import blind_index_prefixes
 from core.models import User
-from .fields import EncryptedCharField, EncryptedIntegerField
+from .dasha import ANTARDASHA, MAHADASHA, iter_dasha_periods, with_current_period
+from .charts import (
+    CHART_PAYLOAD_VERSION,
+    has_all_divisional_charts,
+    serialize_chart_payload,
+)
+from .fields import (
+    CompressedJSONField,
+    EncryptedCharField,
+    EncryptedFloatField,
+    EncryptedIntegerField,
+    PendingCiphertext,
+)
+from .gazetteer import get_gazetteer
+from .pruning import prune
 
 
 class BirthProfile(models.Model):
@@ -32,8 +47,12 @@ class BirthProfile(models.Model):
     city = EncryptedCharField(max_length=500)
     country_code = EncryptedCharField(max_length=100)  # e.g. "IN", "US"
 
-    # Populated automatically after the first natal chart API call.
-    # Derived from calculation_info.location.timezone in the API response.
+    # Resolved from the offline gazetteer (astrology.gazetteer) whenever the
+    # city / country change. For places the gazetteer does not know, the
+    # coordinates stay empty and timezone_str is back-filled after the first
+    # natal chart API call from calculation_info.location.timezone.
+    latitude = EncryptedFloatField(blank=True, null=True)
+    longitude = EncryptedFloatField(blank=True, null=True)
     timezone_str = EncryptedCharField(max_length=500, blank=True)
 
     # Optional Marriage/Family/Personal Details (not passed to the astrology API)
@@ -50,35 +69,407 @@ class BirthProfile(models.Model):
             return self.user.get_full_name() or self.user.email
         return self.guest_name or f"Guest Chart {self.id}"
 
+    def rebuild_guest_name_index(self):
+        """Replaces this profile's GuestNameIndexToken rows from the current guest_name."""
+        tokens = blind_index_prefixes(self.guest_name or "", GuestNameIndexToken.NAMESPACE)
+        GuestNameIndexToken.objects.filter(birth_profile=self).delete()
+        GuestNameIndexToken.objects.bulk_create(
+            [GuestNameIndexToken(birth_profile=self, token=t) for t in tokens]
+        )
+
+    def resolve_birth_place(self) -> bool:
+        """
+        Sets latitude / longitude / timezone_str from the offline gazetteer.
+        Returns False (and clears the coordinates) for an unknown place.
+        """
+        place = get_gazetteer().lookup(self.city, self.country_code)
+        if place is None:
+            self.latitude = self.longitude = None
+            return False
+        self.latitude = place.latitude
+        self.longitude = place.longitude
+        self.timezone_str = place.timezone
+        return True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        place_fields = {"city", "country_code"}
+        if update_fields is None:
+            # City / country never read since loading cannot have changed
+            unchanged = all(
+                isinstance(self.__dict__.get(f), PendingCiphertext) for f in place_fields
+            )
+            if not (unchanged and self.__dict__.get("latitude") is not None):
+                self.resolve_birth_place()
+        elif place_fields & set(update_fields):
+            self.resolve_birth_place()
+            kwargs["update_fields"] = {*update_fields, "latitude", "longitude", "timezone_str"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Birth Profile: {self.display_name} ({self.city}, {self.country_code})"
 
 
+class GuestNameIndexToken(models.Model):
+    """
+    Blind index over the encrypted BirthProfile.guest_name.
+
+    Each row is a keyed HMAC of one normalized prefix of one name token, so a
+    teacher's guest search can be answered (and paginated) in SQL without
+    decrypting profiles that don't match. Rebuilt by a post_save signal
+    whenever guest_name is saved.
+    """
+
+    NAMESPACE = "guest_name"
+
+    birth_profile = models.ForeignKey(
+        BirthProfile, on_delete=models.CASCADE, related_name="guest_name_tokens"
+    )
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        unique_together = ("birth_profile", "token")
+        indexes = [
+            models.Index(fields=["token", "birth_profile"], name="astro_guest_name_token_idx"),
+        ]
+
+    def __str__(self):
+        return f"Guest name token for profile #{self.birth_profile_id}"
+
+
+def _blob_property(source):
+    """Model attribute backed by a NatalChartBlob row, fetched on first access."""
+
+    def getter(self):
+        return self.get_blob(source)
+
+    def setter(self, value):
+        self.set_blob(source, value)
+
+    return property(getter, setter)
+
+
 class NatalChartCache(models.Model):
     """
     Caches the static (birth-fixed) astrology data for a user.
     D1 and D9 charts, planet positions, nakshatras etc. never change —
     so we compute once and store forever.
+
+    The raw API responses live in NatalChartBlob rows, one per source, and
+    are fetched only when read: `cache.dasha_data` costs one small query and
+    never loads the 16-chart divisional blob. Use load_blobs() (or
+    prefetch_related("blobs")) when several sources are needed at once.
+    Assigning to a blob attribute marks it for writing on the next save().
     """
 
     birth_profile = models.OneToOneField(
         BirthProfile, on_delete=models.CASCADE, related_name="natal_cache"
     )
-    # Raw JSON from POST /vedic/birth-details
-    birth_details_data = models.JSONField()
-    # Raw JSON from POST /vedic/divisional-chart (requesting D1 + D9)
-    divisional_data = models.JSONField()
 
-    # Extended Data for AI Generation
-    kp_data = models.JSONField(null=True, blank=True)
-    dasha_data = models.JSONField(null=True, blank=True)
-    ashtakvarga_data = models.JSONField(null=True, blank=True)
+    # Pre-serialized NatalChartView payload (everything except the birth
+    # profile), rebuilt whenever the raw chart data is saved.
+    chart_payload = models.TextField(blank=True, default="")
+    chart_payload_hash = models.CharField(max_length=64, blank=True, default="")
+    chart_payload_version = models.PositiveSmallIntegerField(default=0)
 
     cached_at = models.DateTimeField(auto_now_add=True)
 
+    # Attribute name -> NatalChartBlob.source
+    BLOB_ATTRIBUTES = {
+        "birth_details_data": "birth_details",
+        "divisional_data": "divisional",
+        "kp_data": "kp",
+        "dasha_data": "dasha",
+        "ashtakvarga_data": "ashtakvarga",
+    }
+    CHART_SOURCE_FIELDS = ("birth_details_data", "divisional_data")
+    CHART_PAYLOAD_FIELDS = ("chart_payload", "chart_payload_hash", "chart_payload_version")
+
+    # Raw JSON from POST /vedic/birth-details
+    birth_details_data = _blob_property("birth_details")
+    # Raw JSON from POST /vedic/divisional-chart (D1 - D60)
+    divisional_data = _blob_property("divisional")
+
+    # Extended Data for AI Generation
+    kp_data = _blob_property("kp")
+    dasha_data = _blob_property("dasha")
+    ashtakvarga_data = _blob_property("ashtakvarga")
+
     def __str__(self):
         return f"Natal Cache: {self.birth_profile.display_name} (cached at {self.cached_at})"
 
+    @property
+    def _blob_cache(self) -> dict:
+        return self.__dict__.setdefault("_loaded_blobs", {})
+
+    def get_blob(self, source: str):
+        """Returns the data for one source, querying it on first access."""
+        if source not in self._blob_cache:
+            self.load_blobs(source)
+        return self._blob_cache[source]
+
+    def set_blob(self, source: str, data):
+        self._blob_cache[source] = prune(source, data)
+
+    def load_blobs(self, *sources):
+        """
+        Loads the given sources (all of them if none are given) in a single
+        query, skipping any already loaded. Missing sources read as None.
+        """
+        wanted = set(sources or NatalChartBlob.SOURCES) - set(self._blob_cache)
+        if not wanted:
+            return
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("blobs")
+        if prefetched is not None:
+            rows = [(b.source, b.data) for b in prefetched if b.source in wanted]
+        elif self.pk is None:
+            rows = []
+        else:
+            rows = NatalChartBlob.objects.filter(
+                natal_cache_id=self.pk, source__in=wanted
+            ).values_list("source", "data")
+        self._blob_cache.update(dict.fromkeys(wanted))
+        self._blob_cache.update(rows)
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # A full refresh drops loaded blobs; loading a deferred column must not
+        if fields is None:
+            self.__dict__.pop("_loaded_blobs", None)
+
+    @property
+    def chart_payload_is_current(self) -> bool:
+        return bool(self.chart_payload) and self.chart_payload_version == CHART_PAYLOAD_VERSION
+
+    def refresh_chart_payload(self):
+        """
+        Recomputes the stored chart payload from the raw chart data. Left empty
+        when the divisional data is missing charts, so the view refetches.
+        """
+        self.load_blobs("birth_details", "divisional")
+        if not has_all_divisional_charts(self.divisional_data or {}):
+            self.chart_payload, self.chart_payload_hash = "", ""
+        else:
+            self.chart_payload, self.chart_payload_hash = serialize_chart_payload(
+                self.birth_details_data or {}, self.divisional_data or {}
+            )
+        self.chart_payload_version = CHART_PAYLOAD_VERSION
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            # Full save: write every blob that was assigned or read (and so
+            # may have been modified in place).
+            blob_sources = set(self._blob_cache)
+        else:
+            update_fields = set(update_fields)
+            blob_names = update_fields & set(self.BLOB_ATTRIBUTES)
+            blob_sources = {self.BLOB_ATTRIBUTES[name] for name in blob_names}
+            update_fields -= blob_names
+
+        chart_sources = {self.BLOB_ATTRIBUTES[name] for name in self.CHART_SOURCE_FIELDS}
+        if blob_sources & chart_sources:
+            self.refresh_chart_payload()
+            if update_fields is not None:
+                update_fields |= set(self.CHART_PAYLOAD_FIELDS)
+
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+        # The cache row, its dasha periods and its blobs change together or
+        # not at all, so readers never see a payload without its sources
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if "dasha" in blob_sources:
+                DashaPeriod.rebuild_for_profile(self.birth_profile_id, self._blob_cache["dasha"])
+
+            if blob_sources:
+                NatalChartBlob.objects.bulk_create(
+                    [
+                        NatalChartBlob(natal_cache=self, source=source, data=self._blob_cache[source])
+                        for source in sorted(blob_sources)
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["natal_cache", "source"],
+                    update_fields=["data"],
+                )
+
+
+class NatalChartBlob(models.Model):
+    """
+    One raw astrology API response for a NatalChartCache, stored apart from
+    the cache row so readers only load the sources they use.
+    """
+
+    SOURCE_CHOICES = [
+        ("birth_details", "Birth details"),
+        ("divisional", "Divisional charts"),
+        ("kp", "KP system"),
+        ("dasha", "Vimshottari dasha"),
+        ("ashtakvarga", "Ashtakvarga"),
+    ]
+    SOURCES = tuple(code for code, _ in SOURCE_CHOICES)
+
+    natal_cache = models.ForeignKey(
+        NatalChartCache, on_delete=models.CASCADE, related_name="blobs"
+    )
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # Pruned with astrology.pruning before it is stored
+    data = CompressedJSONField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("natal_cache", "source")
+
+    def __str__(self):
+        return f"{self.get_source_display()} for natal cache {self.natal_cache_id}"
+
+
+class DashaPeriod(models.Model):
+    """
+    One Vimshottari Mahadasha or Antardasha of a profile's timeline,
+    flattened from the cached dasha response whenever it is saved.
+
+    Lets the current period be found with an index seek instead of parsing
+    the blob, and supports fleet-wide questions such as "which profiles
+    start a new Mahadasha this month" (level + start_date range).
+    Periods are half-open: start_date <= day < end_date.
+    """
+
+    LEVEL_CHOICES = [
+        (MAHADASHA, "Mahadasha"),
+        (ANTARDASHA, "Antardasha"),
+    ]
+
+    birth_profile = models.ForeignKey(
+        BirthProfile, on_delete=models.CASCADE, related_name="dasha_periods"
+    )
+    level = models.CharField(max_length=12, choices=LEVEL_CHOICES)
+    lord = models.CharField(max_length=20)
+    # Mahadasha lord an Antardasha runs under; blank for Mahadashas
+    parent_lord = models.CharField(max_length=20, blank=True, default="")
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    class Meta:
+        indexes = [
+            # Per-profile lookups: the period covering a date, a Mahadasha's Antardashas
+            models.Index(
+                fields=["birth_profile", "level", "start_date"], name="astro_dasha_profile_idx"
+            ),
+            # Fleet-wide timeline queries by level and start date
+            models.Index(fields=["level", "start_date"], name="astro_dasha_start_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.lord} {self.get_level_display()} {self.start_date} - {self.end_date}"
+
+    @classmethod
+    def rebuild_for_profile(cls, birth_profile_id, dasha_data):
+        """Replaces a profile's periods with those in a dasha API response."""
+        cls.objects.filter(birth_profile_id=birth_profile_id).delete()
+        cls.objects.bulk_create(
+            [
+                cls(
+                    birth_profile_id=birth_profile_id,
+                    level=level,
+                    lord=lord,
+                    parent_lord=parent_lord,
+                    start_date=start,
+                    end_date=end,
+                )
+                for level, lord, parent_lord, start, end in iter_dasha_periods(dasha_data)
+            ]
+        )
+
+    @classmethod
+    def current_for(cls, birth_profile_id, on):
+        """
+        Returns (mahadasha, antardashas) for the date `on`: the Mahadasha
+        period covering it (or None) and that Mahadasha's Antardashas in order.
+        """
+        maha = (
+            cls.objects.filter(
+                birth_profile_id=birth_profile_id, level=MAHADASHA, start_date__lte=on
+            )
+            .order_by("-start_date")
+            .first()
+        )
+        if maha is None or maha.end_date <= on:
+            return None, []
+        antars = list(
+            cls.objects.filter(
+                birth_profile_id=birth_profile_id,
+                level=ANTARDASHA,
+                start_date__gte=maha.start_date,
+                start_date__lt=maha.end_date,
+            ).order_by("start_date")
+        )
+        return maha, antars
+
+    @classmethod
+    def starting_between(cls, start, end, level=MAHADASHA):
+        """Periods of `level` beginning in [start, end), e.g. profiles changing Mahadasha this month."""
+        return cls.objects.filter(level=level, start_date__gte=start, start_date__lt=end)
+
+    @classmethod
+    def refresh_current_period(cls, birth_profile_id, dasha_data, on):
+        """dasha_data with current_period / current_antardashas recomputed for `on`."""
+        if not dasha_data:
+            return dasha_data
+        maha, antars = cls.current_for(birth_profile_id, on)
+        return with_current_period(dasha_data, maha, antars, on)
+
+
+class NatalBatchJob(models.Model):
+    """
+    State of one batch natal chart job (astrology.batch), polled by its
+    owner through the job_id handle. Kept in the database so any worker can
+    answer the poll, whichever one runs the batch.
+    """
+    class State(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        FINISHED = "finished", "Finished"
+        FAILED = "failed", "Failed"
+
+    job_id = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="natal_batch_jobs",
+    )
+    state = models.CharField(max_length=20, choices=State.choices, default=State.QUEUED)
+    total = models.IntegerField(default=0)
+    unique_births = models.IntegerField(default=0)
+    fetched = models.IntegerField(default=0)
+    reused = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    # [{"birth_profile_id", "status", ...caller keys such as "member_id"}]
+    items = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Natal Batch Job"
+        verbose_name_plural = "Natal Batch Jobs"
+
+    def as_dict(self):
+        return {
+            "job_id": self.job_id,
+            "user_id": str(self.user_id),
+            "state": self.state,
+            "total": self.total,
+            "unique_births": self.unique_births,
+            "fetched": self.fetched,
+            "reused": self.reused,
+            "failed": self.failed,
+            "items": self.items,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __str__(self):
+        return f"Natal batch {self.job_id} [{self.state}]"
+
 
 class TransitCache(models.Model):
     """
@@ -89,18 +480,60 @@ class TransitCache(models.Model):
     birth_profile = models.ForeignKey(
         BirthProfile, on_delete=models.CASCADE, related_name="transit_caches"
     )
-    # Raw JSON from POST /vedic/transit
-    transit_data = models.JSONField()
+    # JSON from POST /vedic/transit, pruned to the fields the app reads
+    transit_data = CompressedJSONField()
     # The local calendar date (in user's timezone) this transit data is valid for
     cached_for_date = models.DateField()
     cached_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("birth_profile", "cached_for_date")
+        indexes = [
+            # Drives the retention purge (cached_for_date < cutoff)
+            models.Index(fields=["cached_for_date", "id"], name="astro_transit_date_idx"),
+        ]
 
     def __str__(self):
         return f"Transit Cache: {self.birth_profile.display_name} for {self.cached_for_date}"
 
+    def save(self, *args, **kwargs):
+        self.transit_data = prune("transit", self.transit_data)
+        super().save(*args, **kwargs)
+
+
+class TransitMonthlySummary(models.Model):
+    """
+    Per-profile monthly roll-up of purged TransitCache rows, kept for
+    analytics after the daily rows are deleted (purge_transit_cache --rollup).
+    """
+
+    birth_profile = models.ForeignKey(
+        BirthProfile, on_delete=models.CASCADE, related_name="transit_summaries"
+    )
+    # First day of the summarised month
+    month = models.DateField()
+    days_cached = models.PositiveSmallIntegerField(default=0)
+    # {planet: {sign: days}} over the cached days of the month
+    planet_sign_days = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("birth_profile", "month")
+
+    def __str__(self):
+        return f"Transit Summary: {self.birth_profile_id} for {self.month:%Y-%m}"
+
+    def add_day(self, transit_data: dict):
+        """Folds one day of transit data into the summary."""
+        self.days_cached += 1
+        transits = (transit_data or {}).get("data", {}).get("transits", [])
+        for transit in transits:
+            planet, sign = transit.get("planet"), transit.get("sign")
+            if not planet or not sign:
+                continue
+            signs = self.planet_sign_days.setdefault(planet, {})
+            signs[sign] = signs.get(sign, 0) + 1
+
 
 class NakshatraPredictionCache(models.Model):
     """
@@ -114,8 +547,8 @@ class NakshatraPredictionCache(models.Model):
         on_delete=models.CASCADE,
         related_name="nakshatra_prediction_cache",
     )
-    # Raw JSON from POST /vedic/nakshatra-predictions
-    prediction_data = models.JSONField()
+    # JSON from POST /vedic/nakshatra-predictions, pruned to the fields the app reads
+    prediction_data = CompressedJSONField()
     # The local calendar date (in user's timezone) this prediction data is valid for
     cached_for_date = models.DateField()
     # Optional AI-generated guidance based on today's Tara Bala
@@ -125,6 +558,10 @@ class NakshatraPredictionCache(models.Model):
     def __str__(self):
         return f"Nakshatra Prediction Cache: {self.birth_profile.display_name} for {self.cached_for_date}"
 
+    def save(self, *args, **kwargs):
+        self.prediction_data = prune("nakshatra_predictions", self.prediction_data)
+        super().save(*args, **kwargs)
+
 
 class AstrologyInsight(models.Model):
     """
@@ -178,6 +615,32 @@ class AstrologyInsight(models.Model):
         return f"Insight ({self.get_category_display()}): {self.birth_profile.display_name}"
 
 
+class InsightProgressEvent(models.Model):
+    """
+    One entry in a profile's background insight generation log (see
+    astrology.tasks.record_insight_progress). The id doubles as the event's
+    `seq`, so client cursors keep increasing across runs. Kept in the
+    database so the progress endpoint answers alike on every worker.
+    """
+    birth_profile = models.ForeignKey(
+        BirthProfile, on_delete=models.CASCADE, related_name="insight_progress_events"
+    )
+    # None for run-level events (started / finished / failed)
+    category = models.CharField(max_length=50, null=True, blank=True)
+    status = models.CharField(max_length=20)
+    # The run's new state when the event moves it, otherwise blank
+    state = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["birth_profile", "id"], name="astro_insight_progress_idx"),
+        ]
+
+    def __str__(self):
+        return f"Insight progress #{self.id}: {self.category or 'run'} {self.status}"
+
+
 class AIPromptConfiguration(models.Model):
     """
     Stores a superadmin-configurable user prompt that gets appended to the base
@@ -284,12 +747,18 @@ class FestivalCalendarCache(models.Model):
     """
     Caches the Hindu festival calendar responses by year and optional filters.
     Since the calendar for a year is static, caching it in the database saves API credits.
+
+    Only unfiltered calendars (blank festival_type and region) are fetched
+    now; their festivals are normalized into Festival rows and filters are
+    applied in SQL (see astrology.festivals).
     """
     year = models.IntegerField()
     festival_type = models.CharField(max_length=50, default="")
     language = models.CharField(max_length=10, default="en")
     region = models.CharField(max_length=100, default="")
     calendar_data = models.JSONField()
+    # True once calendar_data has been normalized into Festival rows
+    is_indexed = models.BooleanField(default=False)
     cached_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -302,6 +771,45 @@ class FestivalCalendarCache(models.Model):
         return f"Festival Calendar Cache for {self.year} ({filters})"
 
 
+class Festival(models.Model):
+    """
+    One festival from an unfiltered FestivalCalendarCache year, indexed by
+    date, type and language so filtered and date-range queries run in SQL.
+    `details` is the festival exactly as the API returned it.
+    """
+    calendar = models.ForeignKey(
+        FestivalCalendarCache, on_delete=models.CASCADE, related_name="festivals"
+    )
+    year = models.IntegerField()
+    language = models.CharField(max_length=10)
+    name = models.CharField(max_length=200, blank=True)
+    festival_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    festival_type = models.CharField(max_length=50, blank=True)
+    # Normalized region key (astrology.festivals.region_key); blank for pan-India
+    region = models.CharField(max_length=200, blank=True)
+    # False on the extra rows of a festival listed under several regions, so
+    # queries without a region filter return each festival once
+    is_primary = models.BooleanField(default=True)
+    details = models.JSONField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["language", "region", "festival_date"],
+                name="astro_festival_region_idx",
+            ),
+            models.Index(fields=["language", "festival_date"], name="astro_festival_date_idx"),
+            models.Index(
+                fields=["language", "festival_type", "festival_date"],
+                name="astro_festival_type_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.festival_date})"
+
+
 class AstrologyReport(models.Model):
     """
     Represents a purchased astrology report for a birth profile.
@@ -357,6 +865,14 @@ class AstrologyReport(models.Model):
     preview_content = models.TextField(blank=True)
 
     generated_at    = models.DateTimeField(null=True, blank=True)
+
+    # When the current build was claimed; set while GENERATING, cleared once
+    # the build finishes. A stale claim lets the next trigger restart it.
+    build_started_at = models.DateTimeField(null=True, blank=True)
+    # Stage of the latest build (see astrology.report_jobs) and when it was reached
+    build_stage = models.CharField(max_length=20, blank=True)
+    build_stage_at = models.DateTimeField(null=True, blank=True)
+
     created_at      = models.DateTimeField(auto_now_add=True)
     updated_at      = models.DateTimeField(auto_now=True)
 
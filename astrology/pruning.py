@@ -0,0 +1,68 @@
+"""
+Pruning schemas for cached astrology API responses.
+
+Each schema lists the parts of a response that something in this app reads;
+everything else is dropped before the response is cached. A schema is a dict
+of key -> sub-schema, where KEEP keeps the whole subtree. Lists are pruned
+item by item with the same sub-schema.
+
+The natal sources and transits keep their full "data" object because the
+generic insight prompts and the insight chat embed it wholesale (see
+GeminiAIService.generate_insight / chat_about_insight, which json.dumps the
+natal data and the cached transit response); only the API envelope around
+it is dropped. Nakshatra predictions are only read field-by-field
+(NakshatraPredictionView and the insight chat's tarabala), so they keep just
+those fields.
+"""
+
+KEEP = True
+
+# Only the API envelope is dropped
+_WHOLE_DATA = {"data": KEEP}
+
+PRUNING_SCHEMAS = {
+    # NatalChartBlob sources
+    "birth_details": _WHOLE_DATA,
+    "divisional": _WHOLE_DATA,
+    "kp": _WHOLE_DATA,
+    "dasha": _WHOLE_DATA,
+    "ashtakvarga": _WHOLE_DATA,
+    # TransitCache.transit_data, passed whole into the insight prompts
+    "transit": _WHOLE_DATA,
+    # NakshatraPredictionCache.prediction_data
+    "nakshatra_predictions": {
+        "data": {
+            "subject_name": KEEP,
+            "prediction_date": KEEP,
+            "current_moon": KEEP,
+            "natal_moon": KEEP,
+            "predictions": KEEP,
+            "guidance": KEEP,
+            "tarabala": KEEP,
+            "overall_score": KEEP,
+            "timing": KEEP,
+            "ayanamsa": KEEP,
+        }
+    },
+}
+
+
+def _apply(value, schema):
+    if schema is KEEP:
+        return value
+    if isinstance(value, list):
+        return [_apply(item, schema) for item in value]
+    if isinstance(value, dict):
+        return {key: _apply(value[key], sub) for key, sub in schema.items() if key in value}
+    return value
+
+
+def prune(source: str, payload):
+    """
+    Returns `payload` reduced to the fields its schema keeps. Unknown
+    sources and None pass through unchanged.
+    """
+    schema = PRUNING_SCHEMAS.get(source)
+    if schema is None or payload is None:
+        return payload
+    return _apply(payload, schema)
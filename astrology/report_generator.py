@@ -12,16 +12,27 @@ Phase 2 (LATER):
   Replace _build_full_report() with a call to the real Astro Report API.
   The public surface (generate_report / upload_report_to_supabase) stays
   identical — views and services never need to change.
+  With ASTROLOGY_REPORT_FROM_DATA enabled, generate_report() already builds
+  the report from stored insights, divisional charts and dasha periods
+  (astrology.report_pipeline) when the profile has any.
 """
 
 import io
 import uuid
 import logging
 import textwrap
+import threading
 from datetime import datetime
 from typing import Tuple
 
 from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Frame, HRFlowable, Paragraph, Spacer
+from reportlab.platypus.doctemplate import LayoutError
 
 logger = logging.getLogger(__name__)
 
@@ -177,129 +188,274 @@ _DUMMY_SECTIONS = [
 _PREVIEW_SECTION_COUNT = max(2, len(_DUMMY_SECTIONS) // 3)
 
 
+# Plain-text preview_content: the preview sections, which never vary per profile
+_PREVIEW_TEXT = "\n\n---\n\n".join(
+    f"## {section['title']}\n\n{section['body']}"
+    for section in _DUMMY_SECTIONS[:_PREVIEW_SECTION_COUNT]
+)
+
+
 # ──────────────────────────────────────────────────────────────────────────────
-# PDF builder (Phase 1 — dummy)
+# Styles (built once at import)
 # ──────────────────────────────────────────────────────────────────────────────
 
-def _build_full_report(birth_profile) -> Tuple[bytes, str]:
-    """
-    Phase 1: build a realistic-looking multi-page dummy PDF.
-    Returns (pdf_bytes, preview_text).
+_PAGE_SIZE = A4
+_MARGIN = 2.5 * cm
+
+_STYLES = getSampleStyleSheet()
+
+_COVER_TITLE_STYLE = ParagraphStyle(
+    "CoverTitle",
+    parent=_STYLES["Title"],
+    fontSize=26,
+    spaceAfter=10,
+    textColor=colors.HexColor("#1a1a2e"),
+    fontName="Helvetica-Bold",
+)
+_COVER_SUB_STYLE = ParagraphStyle(
+    "CoverSub",
+    parent=_STYLES["Normal"],
+    fontSize=13,
+    textColor=colors.HexColor("#4a4a8a"),
+    spaceAfter=6,
+)
+_SECTION_TITLE_STYLE = ParagraphStyle(
+    "SectionTitle",
+    parent=_STYLES["Heading2"],
+    fontSize=14,
+    spaceBefore=18,
+    spaceAfter=6,
+    textColor=colors.HexColor("#1a1a2e"),
+    fontName="Helvetica-Bold",
+    borderPad=4,
+)
+_BODY_STYLE = ParagraphStyle(
+    "ReportBody",
+    parent=_STYLES["Normal"],
+    fontSize=10,
+    leading=15,
+    spaceAfter=8,
+    textColor=colors.HexColor("#333333"),
+)
+_FOOTER_STYLE = ParagraphStyle(
+    "Footer", parent=_STYLES["Normal"], fontSize=8, textColor=colors.grey, alignment=1,
+)
+_LOCKED_TITLE_STYLE = ParagraphStyle(
+    "LockedTitle",
+    parent=_STYLES["Heading3"],
+    fontSize=12,
+    spaceAfter=6,
+    textColor=colors.HexColor("#4a4a8a"),
+    fontName="Helvetica-Bold",
+    alignment=1,
+)
+_LOCKED_BODY_STYLE = ParagraphStyle("LockedBody", parent=_BODY_STYLE, alignment=1)
 
-    Phase 2: replace the body of this function with an Astro Report API call.
-    The signature and return type must stay identical.
-    """
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.lib import colors
-    from reportlab.platypus import (
-        SimpleDocTemplate, Paragraph, Spacer, HRFlowable, PageBreak,
-    )
 
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=2.5 * cm,
-        rightMargin=2.5 * cm,
-        topMargin=2.5 * cm,
-        bottomMargin=2.5 * cm,
-    )
+# ──────────────────────────────────────────────────────────────────────────────
+# Page content (Phase 1 — dummy)
+# ──────────────────────────────────────────────────────────────────────────────
 
-    styles = getSampleStyleSheet()
+def _cover_story(birth_profile, note: str) -> list:
+    """The cover page: the only part of a report that depends on the profile."""
+    return [
+        Spacer(1, 3 * cm),
+        Paragraph("✦ Vedic Astrology Report ✦", _COVER_TITLE_STYLE),
+        HRFlowable(width="100%", thickness=1, color=colors.HexColor("#4a4a8a")),
+        Spacer(1, 0.4 * cm),
+        Paragraph(f"Prepared for: {birth_profile.display_name}", _COVER_SUB_STYLE),
+        Paragraph(
+            f"Birth details: {birth_profile.city}, {birth_profile.country_code}",
+            _COVER_SUB_STYLE,
+        ),
+        Paragraph(
+            f"Generated: {datetime.utcnow().strftime('%B %d, %Y')}",
+            _COVER_SUB_STYLE,
+        ),
+        Spacer(1, 1.5 * cm),
+        Paragraph(note, _BODY_STYLE),
+    ]
 
-    # Custom styles
-    cover_title_style = ParagraphStyle(
-        "CoverTitle",
-        parent=styles["Title"],
-        fontSize=26,
-        spaceAfter=10,
-        textColor=colors.HexColor("#1a1a2e"),
-        fontName="Helvetica-Bold",
-    )
-    cover_sub_style = ParagraphStyle(
-        "CoverSub",
-        parent=styles["Normal"],
-        fontSize=13,
-        textColor=colors.HexColor("#4a4a8a"),
-        spaceAfter=6,
-    )
-    section_title_style = ParagraphStyle(
-        "SectionTitle",
-        parent=styles["Heading2"],
-        fontSize=14,
-        spaceBefore=18,
-        spaceAfter=6,
-        textColor=colors.HexColor("#1a1a2e"),
-        fontName="Helvetica-Bold",
-        borderPad=4,
-    )
-    body_style = ParagraphStyle(
-        "ReportBody",
-        parent=styles["Normal"],
-        fontSize=10,
-        leading=15,
-        spaceAfter=8,
-        textColor=colors.HexColor("#333333"),
-    )
 
+def _sections_story(sections) -> list:
     story = []
-
-    # ── Cover Page ──────────────────────────────────────────────────────────
-    story.append(Spacer(1, 3 * cm))
-    story.append(Paragraph("✦ Vedic Astrology Report ✦", cover_title_style))
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor("#4a4a8a")))
-    story.append(Spacer(1, 0.4 * cm))
-    story.append(Paragraph(f"Prepared for: {birth_profile.display_name}", cover_sub_style))
-    story.append(Paragraph(
-        f"Birth details: {birth_profile.city}, {birth_profile.country_code}",
-        cover_sub_style,
-    ))
-    story.append(Paragraph(
-        f"Generated: {datetime.utcnow().strftime('%B %d, %Y')}",
-        cover_sub_style,
-    ))
-    story.append(Spacer(1, 1.5 * cm))
-    story.append(Paragraph(
-        "This report is prepared exclusively for the recipient named above and "
-        "contains personalised Vedic astrological analysis based on traditional "
-        "Jyotish principles.",
-        body_style,
-    ))
-    story.append(PageBreak())
-
-    # ── Report Sections ─────────────────────────────────────────────────────
-    for section in _DUMMY_SECTIONS:
-        story.append(Paragraph(section["title"], section_title_style))
+    for section in sections:
+        story.append(Paragraph(section["title"], _SECTION_TITLE_STYLE))
         story.append(HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#cccccc")))
         story.append(Spacer(1, 0.2 * cm))
         # Preserve line breaks in body text
         for para_text in section["body"].split("\n\n"):
-            story.append(Paragraph(para_text.replace("\n", "<br/>"), body_style))
+            story.append(Paragraph(para_text.replace("\n", "<br/>"), _BODY_STYLE))
         story.append(Spacer(1, 0.5 * cm))
+    return story
 
-    # ── Footer Note ─────────────────────────────────────────────────────────
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor("#4a4a8a")))
-    story.append(Spacer(1, 0.3 * cm))
-    story.append(Paragraph(
-        "© ParlezHub · This report is for personal use only. "
-        "Redistribution without permission is prohibited.",
-        ParagraphStyle("Footer", parent=styles["Normal"], fontSize=8,
-                       textColor=colors.grey, alignment=1),
-    ))
 
-    doc.build(story)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
+def _footer_story() -> list:
+    return [
+        HRFlowable(width="100%", thickness=1, color=colors.HexColor("#4a4a8a")),
+        Spacer(1, 0.3 * cm),
+        Paragraph(
+            "© ParlezHub · This report is for personal use only. "
+            "Redistribution without permission is prohibited.",
+            _FOOTER_STYLE,
+        ),
+    ]
+
+
+def _full_body_story() -> list:
+    return _sections_story(_DUMMY_SECTIONS) + _footer_story()
+
+
+def _preview_body_story() -> list:
+    return (
+        _sections_story(_DUMMY_SECTIONS[:_PREVIEW_SECTION_COUNT])
+        + [
+            Spacer(1, 1 * cm),
+            HRFlowable(width="100%", thickness=1.5, color=colors.HexColor("#4a4a8a")),
+            Spacer(1, 0.5 * cm),
+            Paragraph("🔒 FULL REPORT LOCKED", _LOCKED_TITLE_STYLE),
+            Paragraph(
+                "This is a free preview containing the first 30% of your Vedic Astrology Report. "
+                "To unlock the remaining 15+ pages of detailed analysis, chart divisional breakdown, "
+                "transit predictions, and custom remedies, please complete your purchase on the website.",
+                _LOCKED_BODY_STYLE,
+            ),
+            Spacer(1, 1 * cm),
+        ]
+        + _footer_story()
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Layout
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _new_frame(frame_class=Frame):
+    """The single body frame of a report page (same geometry as SimpleDocTemplate)."""
+    width, height = _PAGE_SIZE
+    return frame_class(_MARGIN, _MARGIN, width - 2 * _MARGIN, height - 2 * _MARGIN, id="normal")
+
+
+class _RecordingFrame(Frame):
+    """A frame that records where each flowable would be drawn instead of drawing it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.placed = []
+
+    def _add(self, flowable, canv, trySplit=0):
+        def record(canvas, x, y, _sW=0):
+            self.placed.append((flowable, x, y, _sW))
+
+        # Through __dict__: Drawing validates attribute assignment
+        flowable.__dict__["drawOn"] = record
+        try:
+            return super()._add(flowable, canv, trySplit)
+        finally:
+            del flowable.__dict__["drawOn"]
 
-    # Build plain-text preview from the first N sections
-    preview_parts = []
-    for section in _DUMMY_SECTIONS[:_PREVIEW_SECTION_COUNT]:
-        preview_parts.append(f"## {section['title']}\n\n{section['body']}")
-    preview_text = "\n\n---\n\n".join(preview_parts)
+    add = _add
 
-    return pdf_bytes, preview_text
+
+def _layout_pages(story: list) -> list:
+    """
+    Paginates `story` into report body pages, splitting flowables across
+    page breaks. Returns one list of (flowable, x, y, _sW) placements per page.
+    """
+    canv = Canvas(io.BytesIO(), pagesize=_PAGE_SIZE)
+    story = list(story)
+    pages = []
+    while story:
+        frame = _new_frame(_RecordingFrame)
+        while story:
+            flowable = story.pop(0)
+            if frame.add(flowable, canv):
+                continue
+            parts = frame.split(flowable, canv)
+            if parts and frame.add(parts[0], canv, trySplit=1):
+                story[:0] = parts[1:]
+                continue
+            story.insert(0, flowable)
+            break
+        if not frame.placed:
+            raise LayoutError(f"{story[0].identity()} does not fit on an empty page")
+        pages.append(frame.placed)
+    return pages
+
+
+def _draw_pages(canv, pages: list):
+    """Draws pages produced by _layout_pages onto `canv`, one canvas page each."""
+    for placements in pages:
+        for flowable, x, y, sW in placements:
+            flowable.drawOn(canv, x, y, _sW=sW)
+        canv.showPage()
+
+
+class _StaticPages:
+    """
+    Profile-independent report pages, laid out on first use and replayed
+    after each profile's cover, so per-report work is drawing only — no
+    paragraph parsing, line breaking or pagination.
+    """
+
+    def __init__(self, build_story):
+        self._build_story = build_story
+        self._pages = None
+        # Replaying sets flowable.canv on the shared flowables for the
+        # duration of each draw, so one report draws them at a time
+        self._lock = threading.Lock()
+
+    @property
+    def page_count(self) -> int:
+        with self._lock:
+            return len(self._get_pages())
+
+    def _get_pages(self):
+        if self._pages is None:
+            self._pages = _layout_pages(self._build_story())
+        return self._pages
+
+    def draw(self, canv):
+        with self._lock:
+            _draw_pages(canv, self._get_pages())
+
+
+_FULL_BODY_PAGES = _StaticPages(_full_body_story)
+_PREVIEW_BODY_PAGES = _StaticPages(_preview_body_story)
+
+
+def _render_report(cover: list, draw_body) -> bytes:
+    """
+    A one-page cover laid out for this profile, followed by the body pages
+    that `draw_body(canvas)` draws (e.g. _StaticPages.draw).
+    """
+    buffer = io.BytesIO()
+    canv = Canvas(buffer, pagesize=_PAGE_SIZE)
+    frame = _new_frame()
+    frame.addFromList(cover, canv)
+    if cover:
+        raise LayoutError("Report cover does not fit on one page")
+    canv.showPage()
+    draw_body(canv)
+    canv.save()
+    return buffer.getvalue()
+
+
+def _build_full_report(birth_profile) -> Tuple[bytes, str]:
+    """
+    Phase 1: build a realistic-looking multi-page dummy PDF.
+    Returns (pdf_bytes, preview_text).
+
+    Phase 2: replace the body of this function with an Astro Report API call.
+    The signature and return type must stay identical.
+    """
+    cover = _cover_story(
+        birth_profile,
+        "This report is prepared exclusively for the recipient named above and "
+        "contains personalised Vedic astrological analysis based on traditional "
+        "Jyotish principles.",
+    )
+    return _render_report(cover, _FULL_BODY_PAGES.draw), _PREVIEW_TEXT
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -334,140 +490,51 @@ def upload_report_to_supabase(pdf_bytes: bytes, birth_profile_id: int, report_ty
     return public_url
 
 
-# ──────────────────────────────────────────────────────────────────────────────
-# Public API
-# ──────────────────────────────────────────────────────────────────────────────
+def report_storage_path(report_url: str):
+    """(bucket, path) of a URL returned by upload_report_to_supabase, or None."""
+    _, marker, rest = (report_url or "").partition("/storage/v1/object/public/")
+    bucket, _, path = rest.partition("/")
+    if not marker or not bucket or not path:
+        return None
+    return bucket, path
 
-def _build_preview_report(birth_profile) -> bytes:
+
+def create_signed_report_url(report_url: str, filename: str, expires_in: int) -> str:
     """
-    Build a realistic-looking 1-2 page dummy PDF as a free preview.
+    A short-lived signed Supabase Storage URL for a stored report that makes
+    the browser download it as `filename`. Raises on storage errors or when
+    `report_url` is not a Storage object URL.
     """
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.lib import colors
-    from reportlab.platypus import (
-        SimpleDocTemplate, Paragraph, Spacer, HRFlowable, PageBreak,
-    )
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=2.5 * cm,
-        rightMargin=2.5 * cm,
-        topMargin=2.5 * cm,
-        bottomMargin=2.5 * cm,
-    )
+    from core.supabase_client import get_admin_client
 
-    styles = getSampleStyleSheet()
+    located = report_storage_path(report_url)
+    if located is None:
+        raise ValueError(f"Not a Supabase Storage object URL: {report_url}")
+    bucket, storage_path = located
 
-    # Custom styles
-    cover_title_style = ParagraphStyle(
-        "CoverTitle",
-        parent=styles["Title"],
-        fontSize=26,
-        spaceAfter=10,
-        textColor=colors.HexColor("#1a1a2e"),
-        fontName="Helvetica-Bold",
-    )
-    cover_sub_style = ParagraphStyle(
-        "CoverSub",
-        parent=styles["Normal"],
-        fontSize=13,
-        textColor=colors.HexColor("#4a4a8a"),
-        spaceAfter=6,
-    )
-    section_title_style = ParagraphStyle(
-        "SectionTitle",
-        parent=styles["Heading2"],
-        fontSize=14,
-        spaceBefore=18,
-        spaceAfter=6,
-        textColor=colors.HexColor("#1a1a2e"),
-        fontName="Helvetica-Bold",
-        borderPad=4,
-    )
-    body_style = ParagraphStyle(
-        "ReportBody",
-        parent=styles["Normal"],
-        fontSize=10,
-        leading=15,
-        spaceAfter=8,
-        textColor=colors.HexColor("#333333"),
+    signed = get_admin_client().storage.from_(bucket).create_signed_url(
+        storage_path, expires_in, {"download": filename}
     )
+    signed_url = signed.get("signedURL") or signed.get("signedUrl")
+    if not signed_url:
+        raise ValueError(f"Supabase Storage returned no signed URL for {storage_path}")
+    return signed_url
 
-    story = []
 
-    # ── Cover Page ──────────────────────────────────────────────────────────
-    story.append(Spacer(1, 3 * cm))
-    story.append(Paragraph("✦ Vedic Astrology Report ✦", cover_title_style))
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor("#4a4a8a")))
-    story.append(Spacer(1, 0.4 * cm))
-    story.append(Paragraph(f"Prepared for: {birth_profile.display_name}", cover_sub_style))
-    story.append(Paragraph(
-        f"Birth details: {birth_profile.city}, {birth_profile.country_code}",
-        cover_sub_style,
-    ))
-    story.append(Paragraph(
-        f"Generated: {datetime.utcnow().strftime('%B %d, %Y')}",
-        cover_sub_style,
-    ))
-    story.append(Spacer(1, 1.5 * cm))
-    story.append(Paragraph(
+# ──────────────────────────────────────────────────────────────────────────────
+# Public API
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _build_preview_report(birth_profile) -> bytes:
+    """
+    Build a realistic-looking 1-2 page dummy PDF as a free preview.
+    """
+    cover = _cover_story(
+        birth_profile,
         "This is a FREE PREVIEW containing the first 30% of your personalized "
         "Vedic Astrology Report. Purchase the full report to unlock all 20+ pages.",
-        body_style,
-    ))
-    story.append(PageBreak())
-
-    # ── Preview Sections ─────────────────────────────────────────────────────
-    for section in _DUMMY_SECTIONS[:_PREVIEW_SECTION_COUNT]:
-        story.append(Paragraph(section["title"], section_title_style))
-        story.append(HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#cccccc")))
-        story.append(Spacer(1, 0.2 * cm))
-        # Preserve line breaks in body text
-        for para_text in section["body"].split("\n\n"):
-            story.append(Paragraph(para_text.replace("\n", "<br/>"), body_style))
-        story.append(Spacer(1, 0.5 * cm))
-
-    # ── Preview Locked Banner ────────────────────────────────────────────────
-    story.append(Spacer(1, 1 * cm))
-    story.append(HRFlowable(width="100%", thickness=1.5, color=colors.HexColor("#4a4a8a")))
-    story.append(Spacer(1, 0.5 * cm))
-    
-    locked_title_style = ParagraphStyle(
-        "LockedTitle",
-        parent=styles["Heading3"],
-        fontSize=12,
-        spaceAfter=6,
-        textColor=colors.HexColor("#4a4a8a"),
-        fontName="Helvetica-Bold",
-        alignment=1,
     )
-    story.append(Paragraph("🔒 FULL REPORT LOCKED", locked_title_style))
-    story.append(Paragraph(
-        "This is a free preview containing the first 30% of your Vedic Astrology Report. "
-        "To unlock the remaining 15+ pages of detailed analysis, chart divisional breakdown, "
-        "transit predictions, and custom remedies, please complete your purchase on the website.",
-        ParagraphStyle("LockedBody", parent=body_style, alignment=1),
-    ))
-    story.append(Spacer(1, 1 * cm))
-
-    # ── Footer Note ─────────────────────────────────────────────────────────
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor("#4a4a8a")))
-    story.append(Spacer(1, 0.3 * cm))
-    story.append(Paragraph(
-        "© ParlezHub · This report is for personal use only. "
-        "Redistribution without permission is prohibited.",
-        ParagraphStyle("Footer", parent=styles["Normal"], fontSize=8,
-                       textColor=colors.grey, alignment=1),
-    ))
-
-    doc.build(story)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-    return pdf_bytes
+    return _render_report(cover, _PREVIEW_BODY_PAGES.draw)
 
 
 def generate_report(birth_profile) -> Tuple[bytes, str]:
@@ -481,6 +548,16 @@ def generate_report(birth_profile) -> Tuple[bytes, str]:
         f"Generating report for BirthProfile #{birth_profile.id} "
         f"({birth_profile.display_name})"
     )
+    if getattr(settings, "ASTROLOGY_REPORT_FROM_DATA", False):
+        from .report_pipeline import build_data_report, collect_sections
+
+        sections = collect_sections(birth_profile)
+        if sections:
+            return build_data_report(birth_profile, sections)
+        logger.info(
+            f"No insights or chart data for BirthProfile #{birth_profile.id}; "
+            f"using the placeholder report"
+        )
     return _build_full_report(birth_profile)
 
 
@@ -495,12 +572,4 @@ def generate_preview(birth_profile) -> Tuple[bytes, str]:
         f"Generating preview report for BirthProfile #{birth_profile.id} "
         f"({birth_profile.display_name})"
     )
-    pdf_bytes = _build_preview_report(birth_profile)
-    
-    # Build plain-text preview from the first N sections
-    preview_parts = []
-    for section in _DUMMY_SECTIONS[:_PREVIEW_SECTION_COUNT]:
-        preview_parts.append(f"## {section['title']}\n\n{section['body']}")
-    preview_text = "\n\n---\n\n".join(preview_parts)
-    
-    return pdf_bytes, preview_text
+    return _build_preview_report(birth_profile), _PREVIEW_TEXT
@@ -0,0 +1,152 @@
+"""
+Background build of paid astrology reports.
+
+Payment confirmation (ConfirmReportPaymentView) and the Stripe
+payment_intent.succeeded webhook both call enqueue_report_build(); the
+first caller claims the build with a conditional UPDATE on the report row
+(status and build_started_at) and later calls are no-ops, so a report is
+rendered and uploaded once however many triggers arrive, on any worker.
+Builds run on a small process-wide pool (ASTROLOGY_REPORT_BUILD_WORKERS),
+outside any HTTP request.
+
+Progress is the build_stage / build_stage_at pair on the report row, so
+ReportStatusView reads it alike on every worker, whichever one runs the build.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone as dj_timezone
+
+logger = logging.getLogger(__name__)
+
+# A build claimed longer ago than this is assumed dead (worker restart) and
+# the next trigger may claim it again.
+_BUILD_CLAIM_TTL = timedelta(minutes=15)
+
+# Build stages, in order
+QUEUED = "queued"
+RENDERING = "rendering"
+UPLOADING = "uploading"
+READY = "ready"
+FAILED = "failed"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "ASTROLOGY_REPORT_BUILD_WORKERS", 2),
+                thread_name_prefix="report-build",
+            )
+        return _executor
+
+
+def get_report_progress(report):
+    """{ "stage", "updated_at" } for the report's latest build, or None."""
+    if not report.build_stage:
+        return None
+    return {"stage": report.build_stage, "updated_at": report.build_stage_at.isoformat()}
+
+
+def _set_stage(report_id: int, stage: str):
+    from .models import AstrologyReport
+
+    AstrologyReport.objects.filter(id=report_id).update(
+        build_stage=stage, build_stage_at=dj_timezone.now()
+    )
+
+
+def is_build_stale(report) -> bool:
+    """True when a GENERATING report's build claim is missing or has expired."""
+    return (
+        report.build_started_at is None
+        or report.build_started_at < dj_timezone.now() - _BUILD_CLAIM_TTL
+    )
+
+
+def enqueue_report_build(report_id: int) -> bool:
+    """
+    Marks a paid report GENERATING and queues its build once the current
+    transaction commits. Returns False, doing nothing, when the report is
+    already READY, unpaid, or a build for it is already queued or running.
+    """
+    from .models import AstrologyReport, ReportPayment
+
+    now = dj_timezone.now()
+    # A single conditional UPDATE is the claim: of concurrent callers, on any
+    # worker, only one sees a changed row
+    unclaimed = (
+        ~Q(status=AstrologyReport.Status.GENERATING)
+        | Q(build_started_at__isnull=True)
+        | Q(build_started_at__lt=now - _BUILD_CLAIM_TTL)
+    )
+    updated = (
+        AstrologyReport.objects.filter(
+            unclaimed, id=report_id, payment__status=ReportPayment.Status.COMPLETED
+        )
+        .exclude(status=AstrologyReport.Status.READY)
+        .update(
+            status=AstrologyReport.Status.GENERATING,
+            build_started_at=now,
+            build_stage=QUEUED,
+            build_stage_at=now,
+            updated_at=now,
+        )
+    )
+    if not updated:
+        return False
+
+    transaction.on_commit(lambda: _get_executor().submit(build_report, report_id))
+    logger.info(f"AstrologyReport #{report_id} queued for generation")
+    return True
+
+
+def build_report(report_id: int):
+    """Renders the full PDF, uploads it and marks the report READY (or FAILED)."""
+    from .models import AstrologyReport
+    from .report_generator import generate_report, upload_report_to_supabase
+
+    try:
+        report = AstrologyReport.objects.select_related("birth_profile").get(id=report_id)
+
+        _set_stage(report_id, RENDERING)
+        pdf_bytes, preview_text = generate_report(report.birth_profile)
+
+        _set_stage(report_id, UPLOADING)
+        public_url = upload_report_to_supabase(
+            pdf_bytes,
+            birth_profile_id=report.birth_profile_id,
+            report_type=report.report_type,
+        )
+
+        report.report_url = public_url
+        report.preview_content = preview_text
+        report.status = AstrologyReport.Status.READY
+        report.generated_at = dj_timezone.now()
+        report.build_started_at = None
+        report.save(
+            update_fields=[
+                "report_url", "preview_content", "status", "generated_at",
+                "build_started_at", "updated_at",
+            ]
+        )
+        _set_stage(report_id, READY)
+        logger.info(f"AstrologyReport #{report_id} generated and stored at {public_url}")
+    except Exception as e:
+        logger.error(f"Report generation failed for report #{report_id}: {e}")
+        AstrologyReport.objects.filter(id=report_id).update(
+            status=AstrologyReport.Status.FAILED,
+            build_started_at=None,
+            updated_at=dj_timezone.now(),
+        )
+        _set_stage(report_id, FAILED)
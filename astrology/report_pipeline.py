@@ -0,0 +1,291 @@
+"""
+Data-driven report pipeline (Phase 2 of astrology.report_generator).
+
+A report is a list of independent sections: one per AstrologyInsight, one
+planet table per divisional chart and the Vimshottari dasha timeline. Each
+section starts on a new page, so its layout never depends on the sections
+before it. A section is laid out on its own into a fragment — its pages as
+pickled ReportLab placements — cached under a hash of its content. The
+report is the profile's cover followed by every fragment drawn in order.
+
+Rebuilding a report after one insight changes therefore lays out only that
+section again. Varga sections open with the chart's North Indian diagram
+(astrology.chart_wheel). Missing fragments are laid out in parallel in a process pool
+(ASTROLOGY_REPORT_RENDER_PROCESSES); 0 lays them out in the calling thread.
+
+The fragment renderer runs in spawned worker processes, so it uses ReportLab
+only — no models or database access.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Tuple
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from reportlab import Version as REPORTLAB_VERSION
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.platypus import HRFlowable, Paragraph, Spacer, Table, TableStyle
+
+from . import chart_wheel, report_generator
+from .charts import DIVISIONAL_CHARTS
+
+logger = logging.getLogger(__name__)
+
+# Bump when section layout changes so cached fragments are not reused
+FRAGMENT_VERSION = 2
+_FRAGMENT_TTL = 7 * 24 * 60 * 60
+
+INSIGHT = "insight"
+VARGA = "varga"
+DASHA = "dasha"
+
+_VARGA_COLUMNS = ["Graha", "Rashi", "Degree", "Bhava", "Nakshatra", "Pada"]
+_DASHA_COLUMNS = ["Mahadasha", "Antardasha", "Start", "End"]
+
+_TABLE_STYLE = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1a1a2e")),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e8e8f4")),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#cccccc")),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+
+class ReportSection(NamedTuple):
+    kind: str
+    title: str
+    # Insight text, table rows (lists of strings) for DASHA, and for VARGA
+    # {"chart": code, "wheel": chart token, "rows": table rows}
+    content: object
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Sections from stored data
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _insight_sections(birth_profile) -> list:
+    from .models import AstrologyInsight
+
+    order = {code: i for i, (code, _) in enumerate(AstrologyInsight.CATEGORY_CHOICES)}
+    insights = sorted(
+        AstrologyInsight.objects.filter(birth_profile=birth_profile).exclude(insight_text=""),
+        key=lambda insight: order.get(insight.category, len(order)),
+    )
+    return [
+        ReportSection(INSIGHT, insight.get_category_display(), insight.insight_text)
+        for insight in insights
+    ]
+
+
+def _degree(value) -> str:
+    if isinstance(value, (int, float)):
+        return f"{value:.2f}°"
+    return "" if value is None else str(value)
+
+
+def _varga_sections(birth_profile) -> list:
+    from .charts import build_chart_payload
+    from .models import NatalChartCache
+
+    natal_cache = NatalChartCache.objects.filter(birth_profile=birth_profile).first()
+    if natal_cache is None:
+        return []
+    if natal_cache.chart_payload_is_current:
+        payload = json.loads(natal_cache.chart_payload)
+    else:
+        natal_cache.load_blobs("birth_details", "divisional")
+        if not natal_cache.divisional_data:
+            return []
+        payload = build_chart_payload(
+            natal_cache.birth_details_data or {}, natal_cache.divisional_data
+        )
+
+    sections = []
+    for code in DIVISIONAL_CHARTS:
+        chart = payload.get(f"{code.lower()}_chart") or {}
+        rows = [
+            [
+                str(graha.get("graha") or ""),
+                str(graha.get("longitude_rashi") or ""),
+                _degree(graha.get("longitude_degree")),
+                str(graha.get("current_bhava") or ""),
+                str(graha.get("nakshatra") or ""),
+                str(graha.get("nakshatra_pada") or ""),
+            ]
+            for graha in chart.get("graha_details", [])
+        ]
+        if rows:
+            name = chart.get("name") or code
+            title = name if name.startswith(code) else f"{code} {name}"
+            content = {
+                "chart": code,
+                "wheel": chart_wheel.chart_token(chart.get("positions", [])),
+                "rows": rows,
+            }
+            sections.append(ReportSection(VARGA, title, content))
+    return sections
+
+
+def _dasha_sections(birth_profile) -> list:
+    from .dasha import MAHADASHA
+    from .models import DashaPeriod
+
+    periods = DashaPeriod.objects.filter(birth_profile=birth_profile).order_by("start_date", "level")
+    rows = [
+        [
+            period.lord if period.level == MAHADASHA else period.parent_lord,
+            "" if period.level == MAHADASHA else period.lord,
+            period.start_date.isoformat(),
+            period.end_date.isoformat(),
+        ]
+        for period in periods
+    ]
+    return [ReportSection(DASHA, "Vimshottari Dasha Timeline", rows)] if rows else []
+
+
+def collect_sections(birth_profile) -> list:
+    """The report sections for a profile, in report order."""
+    return (
+        _insight_sections(birth_profile)
+        + _varga_sections(birth_profile)
+        + _dasha_sections(birth_profile)
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Fragments
+# ──────────────────────────────────────────────────────────────────────────────
+
+def fragment_key(section: ReportSection) -> str:
+    """Cache key of a section's fragment: a hash of everything its layout depends on."""
+    material = json.dumps(
+        [FRAGMENT_VERSION, REPORTLAB_VERSION, section.kind, section.title, section.content],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return f"report_fragment_{hashlib.sha256(material.encode()).hexdigest()}"
+
+
+def _section_story(section: ReportSection) -> list:
+    story = [
+        Paragraph(escape(section.title), report_generator._SECTION_TITLE_STYLE),
+        HRFlowable(width="100%", thickness=0.5, color=colors.HexColor("#cccccc")),
+        Spacer(1, 0.2 * cm),
+    ]
+    if section.kind == INSIGHT:
+        for para_text in str(section.content).split("\n\n"):
+            if para_text.strip():
+                story.append(
+                    Paragraph(escape(para_text.strip()).replace("\n", "<br/>"), report_generator._BODY_STYLE)
+                )
+    elif section.kind == VARGA:
+        story += [
+            chart_wheel.chart_drawing(
+                section.content["wheel"], chart_wheel.NORTH, section.content["chart"], size=8 * cm
+            ),
+            Spacer(1, 0.4 * cm),
+            Table([_VARGA_COLUMNS] + list(section.content["rows"]), repeatRows=1, style=_TABLE_STYLE),
+        ]
+    else:
+        story.append(Table([_DASHA_COLUMNS] + list(section.content), repeatRows=1, style=_TABLE_STYLE))
+    return story
+
+
+def render_fragment(section: ReportSection) -> bytes:
+    """Lays out one section on pages of its own; runs in the worker processes."""
+    pages = report_generator._layout_pages(_section_story(section))
+    return pickle.dumps(pages, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: report builds run in threads of a threaded server
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _render_missing(sections: list) -> list:
+    workers = getattr(settings, "ASTROLOGY_REPORT_RENDER_PROCESSES", 2)
+    if workers > 0 and len(sections) > 1:
+        try:
+            return list(_get_pool(workers).map(render_fragment, sections))
+        except BrokenProcessPool as e:
+            logger.warning(f"Report render pool failed, rendering in-process: {e}")
+            _discard_pool()
+    return [render_fragment(section) for section in sections]
+
+
+def render_fragments(sections: list) -> list:
+    """
+    The fragment of every section, in order: cached ones from the Django
+    cache, the rest laid out (in parallel) and cached.
+    """
+    keys = [fragment_key(section) for section in sections]
+    fragments = cache.get_many(keys)
+    missing = {key: section for key, section in zip(keys, sections) if key not in fragments}
+    if missing:
+        rendered = dict(zip(missing, _render_missing(list(missing.values()))))
+        cache.set_many(rendered, timeout=_FRAGMENT_TTL)
+        fragments.update(rendered)
+    logger.info(f"Report sections: {len(sections)}, laid out: {len(missing)}, reused: {len(sections) - len(missing)}")
+    return [fragments[key] for key in keys]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Public API
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _preview_text(sections: list) -> str:
+    insights = [section for section in sections if section.kind == INSIGHT]
+    count = max(2, len(insights) // 3)
+    return "\n\n---\n\n".join(
+        f"## {section.title}\n\n{section.content}" for section in insights[:count]
+    )
+
+
+def build_data_report(birth_profile, sections: list = None) -> Tuple[bytes, str]:
+    """
+    The full report PDF built from the profile's stored insights, divisional
+    charts and dasha periods. Returns (pdf_bytes, preview_text).
+    """
+    sections = collect_sections(birth_profile) if sections is None else sections
+    fragments = render_fragments(sections)
+
+    def draw_body(canv):
+        for fragment in fragments:
+            report_generator._draw_pages(canv, pickle.loads(fragment))
+
+    # Sections start on fresh pages, so the copyright note goes on the cover
+    cover = report_generator._cover_story(
+        birth_profile,
+        "This report is prepared exclusively for the recipient named above and "
+        "contains personalised Vedic astrological analysis based on traditional "
+        "Jyotish principles.",
+    ) + [Spacer(1, 1 * cm)] + report_generator._footer_story()
+    return report_generator._render_report(cover, draw_body), _preview_text(sections)
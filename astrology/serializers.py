@@ -12,12 +12,12 @@ class BirthProfileSerializer(serializers.ModelSerializer):
             'id', 'user_name',
             'birth_year', 'birth_month', 'birth_day',
             'birth_hour', 'birth_minute',
-            'city', 'country_code',
+            'city', 'country_code', 'latitude', 'longitude',
             'timezone_str', 'created_at', 'updated_at',
             'guest_name', 'created_by',
             'marriage_date', 'kids', 'comments'
         ]
-        read_only_fields = ['id', 'user_name', 'timezone_str', 'created_at', 'updated_at', 'created_by']
+        read_only_fields = ['id', 'user_name', 'latitude', 'longitude', 'timezone_str', 'created_at', 'updated_at', 'created_by']
 
     def get_user_name(self, obj):
         return obj.display_name
@@ -106,3 +106,44 @@ class FestivalCalendarRequestSerializer(serializers.Serializer):
         allow_blank=True
     )
 
+
+class UpcomingFestivalsRequestSerializer(serializers.Serializer):
+    days = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=366,
+        help_text="Window length in days from today (default 30)"
+    )
+    festival_type = serializers.ChoiceField(
+        choices=FestivalCalendarRequestSerializer().fields["festival_type"].choices,
+        required=False,
+        allow_null=True,
+        allow_blank=True
+    )
+    language = serializers.ChoiceField(
+        choices=FestivalCalendarRequestSerializer().fields["language"].choices,
+        required=False,
+        allow_null=True,
+        allow_blank=True
+    )
+    region = serializers.CharField(
+        required=False,
+        allow_null=True,
+        allow_blank=True
+    )
+
+
+class PlaceAutocompleteRequestSerializer(serializers.Serializer):
+    q = serializers.CharField(required=True, help_text="City name prefix")
+    country = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        max_length=2,
+        help_text="ISO 3166-1 alpha-2 country code to restrict results to"
+    )
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=50)
+
+
+class CompatibilityRequestSerializer(serializers.Serializer):
+    profile_a = serializers.IntegerField(help_text="Birth profile scored as the groom")
+    profile_b = serializers.IntegerField(help_text="Birth profile scored as the bride")
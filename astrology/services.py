@@ -58,20 +58,25 @@ class AstrologyAPIClient:
         """
         Builds the 'subject' block expected by the API.
         The user's full name is derived from the linked User model.
+        Coordinates and timezone are sent when the gazetteer resolved them.
         """
         name = profile.display_name
-        return {
-            "name": name,
-            "birth_data": {
-                "year": profile.birth_year,
-                "month": profile.birth_month,
-                "day": profile.birth_day,
-                "hour": profile.birth_hour,
-                "minute": profile.birth_minute,
-                "city": profile.city,
-                "country_code": profile.country_code,
-            },
+        birth_data = {
+            "year": profile.birth_year,
+            "month": profile.birth_month,
+            "day": profile.birth_day,
+            "hour": profile.birth_hour,
+            "minute": profile.birth_minute,
+            "city": profile.city,
+            "country_code": profile.country_code,
         }
+        if profile.latitude is not None and profile.longitude is not None:
+            # Resolved locally from the gazetteer, so the provider skips geocoding
+            birth_data["latitude"] = profile.latitude
+            birth_data["longitude"] = profile.longitude
+            if profile.timezone_str:
+                birth_data["timezone"] = profile.timezone_str
+        return {"name": name, "birth_data": birth_data}
 
     def _post(self, endpoint: str, payload: dict) -> dict:
         url = f"{self.BASE_URL}/{endpoint}"
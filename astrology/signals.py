@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .fields import PendingCiphertext
+from .models import BirthProfile
+
+
+@receiver(post_save, sender=BirthProfile)
+def sync_guest_name_index(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keeps the guest_name blind index in step with the encrypted column.
+    Saves that explicitly skip guest_name (e.g. the timezone back-fill) are ignored.
+    """
+    if update_fields is not None and "guest_name" not in update_fields:
+        return
+    if isinstance(instance.__dict__.get("guest_name"), PendingCiphertext):
+        # Never read since loading, so it cannot have changed
+        return
+    if created and not instance.guest_name:
+        return
+    instance.rebuild_guest_name_index()
@@ -1,7 +1,11 @@
 import logging
 import time
 import pytz
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone as dj_timezone
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +16,63 @@ _RATE_LIMIT_BASE_DELAY = 5     # seconds to wait after first 429
 _RATE_LIMIT_MAX_DELAY = 60     # cap on backoff ceiling
 _RATE_LIMIT_MAX_RETRIES = 4    # max attempts per category
 
+# Per-profile generation progress, kept as InsightProgressEvent rows so the
+# progress endpoint reads the same log on every worker.
+_PROGRESS_TTL = timedelta(hours=1)  # a finished run stays visible this long
+_PROGRESS_MAX_EVENTS = 100          # older events are dropped from the log
+
+
+def get_insight_progress(birth_profile_id: int) -> dict:
+    """
+    Returns the progress record for a profile's insight generation:
+      { "state": "idle" | "running" | "finished" | "failed",
+        "seq": <last event sequence number>,
+        "events": [ { "seq", "category", "status", "at" }, ... ] }
+    """
+    from astrology.models import InsightProgressEvent
+
+    events = list(
+        InsightProgressEvent.objects.filter(birth_profile_id=birth_profile_id).order_by("id")
+    )
+    if not events or events[-1].created_at < dj_timezone.now() - _PROGRESS_TTL:
+        return {"state": "idle", "seq": 0, "events": []}
+    return {
+        "state": next((e.state for e in reversed(events) if e.state), "idle"),
+        "seq": events[-1].id,
+        "events": [
+            {
+                "seq": e.id,
+                "category": e.category,
+                "status": e.status,
+                "at": e.created_at.isoformat(),
+            }
+            for e in events
+        ],
+    }
+
+
+def record_insight_progress(birth_profile_id: int, category: str, status: str, state: str = None):
+    """
+    Appends an event to the profile's progress log.
+
+    `category` is None for run-level events (started / finished / failed);
+    `state` optionally moves the whole run to a new state. Starting a run
+    clears the previous run's events; `seq` keeps increasing so client
+    cursors stay valid.
+    """
+    from astrology.models import InsightProgressEvent
+
+    log = InsightProgressEvent.objects.filter(birth_profile_id=birth_profile_id)
+    with transaction.atomic():
+        if state == "running":
+            log.delete()
+        InsightProgressEvent.objects.create(
+            birth_profile_id=birth_profile_id, category=category, status=status, state=state or ""
+        )
+        dropped = list(log.order_by("-id").values_list("id", flat=True)[_PROGRESS_MAX_EVENTS:])
+        if dropped:
+            log.filter(id__in=dropped).delete()
+
 
 def _is_rate_limit_error(exc: Exception) -> bool:
     """Heuristic check for Gemini 429 / resource-exhausted errors."""
@@ -61,55 +122,71 @@ def generate_all_insights_async(birth_profile_id: int):
         logger.error(f"Generate Insights Task Failed: BirthProfile {birth_profile_id} not found.")
         return
 
+    record_insight_progress(birth_profile_id, None, "started", state="running")
     client = AstrologyAPIClient()
 
-    # 1. Fetch base Natal Chart Data
-    try:
-        birth_details = client.get_birth_details(profile)
-        divisional = client.get_divisional_chart(profile)
-
-        # Update Timezone based on API response
-        timezone_str = (
-            birth_details.get("data", {})
-            .get("calculation_info", {})
-            .get("location", {})
-            .get("timezone", "")
-        )
-        if timezone_str and not profile.timezone_str:
-            profile.timezone_str = timezone_str
-            profile.save(update_fields=["timezone_str"])
+    # 1. Fetch base Natal Chart Data (a natal batch may already have stored it)
+    natal_cache = (
+        NatalChartCache.objects.defer("chart_payload")
+        .filter(birth_profile=profile)
+        .prefetch_related("blobs")
+        .first()
+    )
+    if natal_cache is None or not (natal_cache.birth_details_data and natal_cache.divisional_data):
+        try:
+            birth_details = client.get_birth_details(profile)
+            divisional = client.get_divisional_chart(profile)
+
+            # Update Timezone based on API response
+            timezone_str = (
+                birth_details.get("data", {})
+                .get("calculation_info", {})
+                .get("location", {})
+                .get("timezone", "")
+            )
+            if timezone_str and not profile.timezone_str:
+                profile.timezone_str = timezone_str
+                profile.save(update_fields=["timezone_str"])
 
-        # Cache the base data
-        natal_cache, _ = NatalChartCache.objects.update_or_create(
-            birth_profile=profile,
-            defaults={
-                "birth_details_data": birth_details,
-                "divisional_data": divisional,
-            }
-        )
-    except Exception as e:
-        logger.error(f"Task Failed: Could not fetch base natal info for profile {birth_profile_id}. Error: {str(e)}")
-        return
+            # Cache the base data
+            natal_cache, _ = NatalChartCache.objects.update_or_create(
+                birth_profile=profile,
+                defaults={
+                    "birth_details_data": birth_details,
+                    "divisional_data": divisional,
+                }
+            )
+        except Exception as e:
+            logger.error(f"Task Failed: Could not fetch base natal info for profile {birth_profile_id}. Error: {str(e)}")
+            record_insight_progress(birth_profile_id, None, "failed", state="failed")
+            return
 
     # 2. Fetch extended data required by various Gemini prompts
     try:
-        try:
-            ashtakvarga = client.get_ashtakvarga(profile)
-        except Exception as e:
-            logger.error(f"Failed fetching ashtakvarga: {e}")
-            raise
+        if not (natal_cache.ashtakvarga_data and natal_cache.dasha_data and natal_cache.kp_data):
+            try:
+                ashtakvarga = client.get_ashtakvarga(profile)
+            except Exception as e:
+                logger.error(f"Failed fetching ashtakvarga: {e}")
+                raise
 
-        try:
-            dasha = client.get_vimshottari_dasha(profile)
-        except Exception as e:
-            logger.error(f"Failed fetching vimshottari dasha: {e}")
-            raise
+            try:
+                dasha = client.get_vimshottari_dasha(profile)
+            except Exception as e:
+                logger.error(f"Failed fetching vimshottari dasha: {e}")
+                raise
 
-        try:
-            kp_system = client.get_kp_system(profile)
-        except Exception as e:
-            logger.error(f"Failed fetching kp system: {e}")
-            raise
+            try:
+                kp_system = client.get_kp_system(profile)
+            except Exception as e:
+                logger.error(f"Failed fetching kp system: {e}")
+                raise
+
+            # Update natal cache with extended data
+            natal_cache.ashtakvarga_data = ashtakvarga
+            natal_cache.dasha_data = dasha
+            natal_cache.kp_data = kp_system
+            natal_cache.save(update_fields=["ashtakvarga_data", "dasha_data", "kp_data"])
 
         try:
             transit_data = client.get_transit(profile)
@@ -117,12 +194,6 @@ def generate_all_insights_async(birth_profile_id: int):
             logger.error(f"Failed fetching transit data: {e}")
             raise
 
-        # Update natal cache with extended data
-        natal_cache.ashtakvarga_data = ashtakvarga
-        natal_cache.dasha_data = dasha
-        natal_cache.kp_data = kp_system
-        natal_cache.save()
-
         # Update Transit Cache (valid for current day)
         tz = pytz.timezone(profile.timezone_str) if profile.timezone_str else pytz.utc
         today_local = datetime.now(tz).date()
@@ -136,6 +207,7 @@ def generate_all_insights_async(birth_profile_id: int):
         )
     except Exception as e:
         logger.error(f"Task Failed: Could not fetch extended API info for profile {birth_profile_id}. Error: {str(e)}")
+        record_insight_progress(birth_profile_id, None, "failed", state="failed")
         return
 
     # 3. Assemble complete data structure to pass to Gemini
@@ -168,7 +240,6 @@ def generate_all_insights_async(birth_profile_id: int):
     logger.info(f"Generating {len(categories)} insights for profile {birth_profile_id}...")
 
     success_count = 0
-    from django.core.cache import cache
 
     for category in categories:
         # Check if insight already exists to avoid redundant calls
@@ -194,14 +265,17 @@ def generate_all_insights_async(birth_profile_id: int):
                 insight_text=generated_text
             )
             success_count += 1
+            record_insight_progress(birth_profile_id, category, "ready")
             logger.info(f"Successfully generated and cached insight: {category}")
 
         except Exception as e:
             logger.error(f"Failed to generate insight '{category}' for profile {birth_profile_id}: {str(e)}")
+            record_insight_progress(birth_profile_id, category, "failed")
             # Continue to the next category even if one fails
         finally:
             cache.delete(lock_key)
 
+    record_insight_progress(birth_profile_id, None, "finished", state="finished")
     logger.info(f"Finished background insight generation. Total successful: {success_count}/{len(categories)}.")
 
 
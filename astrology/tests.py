@@ -0,0 +1,1374 @@
+import json
+import pickle
+import re
+import uuid
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from cryptography.fernet import Fernet, InvalidToken
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import TextField
+from django.db.models.functions import Cast, Length
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User
+from . import fields as encrypted_fields
+from .models import (
+    BirthProfile,
+    AstrologyInsight,
+    AstrologyDashboardAccess,
+    DashaPeriod,
+    Festival,
+    FestivalCalendarCache,
+    NatalChartCache,
+    AstrologyReport,
+    ReportPayment,
+    TransitCache,
+    TransitMonthlySummary,
+)
+
+TEST_ENCRYPTION_KEY = Fernet.generate_key().decode()
+
+
+def _make_profile(**overrides):
+    data = {
+        "birth_year": 1990,
+        "birth_month": 5,
+        "birth_day": 15,
+        "birth_hour": 12,
+        "birth_minute": 30,
+        "city": "Mumbai",
+        "country_code": "IN",
+    }
+    data.update(overrides)
+    return BirthProfile.objects.create(**data)
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class InsightBundleTests(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            id=str(uuid.uuid4()),
+            email="student@example.com",
+            first_name="Stu",
+            last_name="Dent",
+            role=User.Role.STUDENT,
+        )
+        self.teacher = User.objects.create_user(
+            id=str(uuid.uuid4()),
+            email="teacher@example.com",
+            role=User.Role.TEACHER,
+        )
+        self.profile = _make_profile(user=self.student)
+        AstrologyInsight.objects.create(
+            birth_profile=self.profile, category="marriage", insight_text="Marriage text"
+        )
+        AstrologyInsight.objects.create(
+            birth_profile=self.profile, category="medical", insight_text="Medical text"
+        )
+        self.url = reverse("astrology-insight-bundle")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_bundle_returns_ready_insights_and_statuses(self):
+        """Verify the bundle returns every ready insight and a status for each category."""
+        self.client.force_authenticate(user=self.student)
+        cache.set(f"generating_insight_{self.profile.id}_btr", True)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["insights"],
+            {"marriage": "Marriage text", "medical": "Medical text"},
+        )
+        self.assertEqual(response.data["status"]["marriage"], "ready")
+        self.assertEqual(response.data["status"]["btr"], "generating")
+        self.assertEqual(response.data["status"]["navatara"], "pending")
+        self.assertEqual(
+            response.data["total_count"], len(AstrologyInsight.CATEGORY_CHOICES)
+        )
+
+    def test_bundle_category_filter(self):
+        """Verify ?categories= limits the bundle and rejects unknown categories."""
+        self.client.force_authenticate(user=self.student)
+
+        response = self.client.get(f"{self.url}?categories=marriage,btr")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["status"]), {"marriage", "btr"})
+        self.assertEqual(set(response.data["insights"]), {"marriage"})
+
+        response = self.client.get(f"{self.url}?categories=marriage,bogus")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bundle_conditional_get(self):
+        """Verify an unchanged bundle returns 304 and a changed one a fresh ETag."""
+        self.client.force_authenticate(user=self.student)
+
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        AstrologyInsight.objects.create(
+            birth_profile=self.profile, category="btr", insight_text="BTR text"
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_bundle_teacher_access(self):
+        """Verify teachers need a grant and are served with a bounded number of queries."""
+        self.client.force_authenticate(user=self.teacher)
+        url = f"{self.url}?student_id={self.student.id}"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        AstrologyDashboardAccess.objects.create(student=self.student, teacher=self.teacher)
+        # One query resolves grant + profile, one loads the insights.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["insights"]), 2)
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class InsightProgressTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            id=str(uuid.uuid4()), email="owner@example.com"
+        )
+        self.profile = _make_profile(user=self.user)
+        self.url = reverse("astrology-insight-progress")
+        self.client.force_authenticate(user=self.user)
+
+    def test_progress_idle_without_run(self):
+        """Verify a profile with no generation run reports idle immediately."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["state"], "idle")
+        self.assertEqual(response.data["events"], [])
+
+    def test_progress_events_since_cursor(self):
+        """Verify events are returned after the client's cursor only."""
+        from .tasks import record_insight_progress
+
+        record_insight_progress(self.profile.id, None, "started", state="running")
+        record_insight_progress(self.profile.id, "marriage", "ready")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["state"], "running")
+        self.assertEqual([e["status"] for e in response.data["events"]], ["started", "ready"])
+        cursor = response.data["seq"]
+
+        record_insight_progress(self.profile.id, "medical", "failed")
+        record_insight_progress(self.profile.id, None, "finished", state="finished")
+
+        response = self.client.get(f"{self.url}?since={cursor}")
+        self.assertEqual(response.data["state"], "finished")
+        self.assertEqual(
+            [(e["category"], e["status"]) for e in response.data["events"]],
+            [("medical", "failed"), (None, "finished")],
+        )
+
+    def test_new_run_clears_log_and_keeps_cursor_increasing(self):
+        """Verify a restarted run drops the previous events while seq keeps growing."""
+        from .tasks import record_insight_progress
+
+        record_insight_progress(self.profile.id, None, "started", state="running")
+        record_insight_progress(self.profile.id, None, "finished", state="finished")
+        cursor = self.client.get(self.url).data["seq"]
+
+        record_insight_progress(self.profile.id, None, "started", state="running")
+        response = self.client.get(f"{self.url}?since={cursor}")
+        self.assertEqual(response.data["state"], "running")
+        self.assertEqual([e["status"] for e in response.data["events"]], ["started"])
+        self.assertGreater(response.data["seq"], cursor)
+        self.assertEqual(self.profile.insight_progress_events.count(), 1)
+
+
+class ReencryptFieldsCommandTests(APITestCase):
+    def _raw(self, profile, field="city"):
+        return (
+            BirthProfile.objects.filter(pk=profile.pk)
+            .annotate(raw=Cast(field, output_field=TextField()))
+            .values_list("raw", flat=True)
+            .get()
+        )
+
+    def test_rotation_moves_rows_to_new_key(self):
+        """Verify rows written under an old key are re-encrypted and stay readable."""
+        old_key = TEST_ENCRYPTION_KEY
+        new_key = Fernet.generate_key().decode()
+
+        with self.settings(FIELD_ENCRYPTION_KEY=old_key):
+            profile = _make_profile(city="Pune", guest_name="Asha")
+
+        with self.settings(FIELD_ENCRYPTION_KEY=new_key, FIELD_ENCRYPTION_OLD_KEYS=[old_key]):
+            # Old ciphertext is still readable through MultiFernet
+            self.assertEqual(BirthProfile.objects.get(pk=profile.pk).city, "Pune")
+
+            out = StringIO()
+            call_command("reencrypt_fields", "--batch-size", "1", stdout=out)
+            self.assertIn("rotated 1 of 1 rows", out.getvalue())
+
+            raw = self._raw(profile)
+            Fernet(new_key.encode()).decrypt(raw.encode())
+            with self.assertRaises(InvalidToken):
+                Fernet(old_key.encode()).decrypt(raw.encode())
+
+            reloaded = BirthProfile.objects.get(pk=profile.pk)
+            self.assertEqual(reloaded.city, "Pune")
+            self.assertEqual(reloaded.guest_name, "Asha")
+            self.assertEqual(reloaded.birth_year, 1990)
+
+            # A second run finds nothing left to rotate
+            out = StringIO()
+            call_command("reencrypt_fields", stdout=out)
+            self.assertIn("rotated 0 of 1 rows", out.getvalue())
+
+
+    def test_rotation_covers_float_fields(self):
+        """Verify EncryptedFloatField coordinates are rotated along with the other columns."""
+        old_key = TEST_ENCRYPTION_KEY
+        new_key = Fernet.generate_key().decode()
+
+        with self.settings(FIELD_ENCRYPTION_KEY=old_key):
+            profile = _make_profile(city="Pune", country_code="IN")
+            self.assertIsNotNone(BirthProfile.objects.get(pk=profile.pk).latitude)
+
+        with self.settings(FIELD_ENCRYPTION_KEY=new_key, FIELD_ENCRYPTION_OLD_KEYS=[old_key]):
+            call_command("reencrypt_fields", "--model", "astrology.BirthProfile", stdout=StringIO())
+
+            for field in ("latitude", "longitude"):
+                raw = self._raw(profile, field)
+                Fernet(new_key.encode()).decrypt(raw.encode())
+            reloaded = BirthProfile.objects.get(pk=profile.pk)
+            self.assertAlmostEqual(reloaded.latitude, profile.latitude)
+            self.assertAlmostEqual(reloaded.longitude, profile.longitude)
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class GuestProfileSearchTests(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            id=str(uuid.uuid4()), email="astro@example.com", role=User.Role.TEACHER
+        )
+        self.url = reverse("astrology-guest-profiles")
+        self.client.force_authenticate(user=self.teacher)
+
+    def _names(self, response):
+        return sorted(p["guest_name"] for p in response.data["results"])
+
+    def test_search_matches_name_prefixes(self):
+        """Verify search matches word prefixes via the blind index, case- and accent-insensitively."""
+        _make_profile(created_by=self.teacher, guest_name="Asha Rao")
+        _make_profile(created_by=self.teacher, guest_name="Ravi Kumar")
+        _make_profile(created_by=self.teacher, guest_name="José Ramírez")
+
+        response = self.client.get(f"{self.url}?search=ra")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._names(response), ["Asha Rao", "José Ramírez", "Ravi Kumar"])
+
+        response = self.client.get(f"{self.url}?search=ASH ra")
+        self.assertEqual(self._names(response), ["Asha Rao"])
+
+        response = self.client.get(f"{self.url}?search=jose")
+        self.assertEqual(self._names(response), ["José Ramírez"])
+
+        response = self.client.get(f"{self.url}?search=kumari")
+        self.assertEqual(response.data["count"], 0)
+
+        # A search with nothing searchable in it matches nothing, not everything
+        response = self.client.get(f"{self.url}?search=!!!")
+        self.assertEqual(response.data["count"], 0)
+
+    def test_search_follows_renames(self):
+        """Verify renaming a guest profile rebuilds its blind index."""
+        profile = _make_profile(created_by=self.teacher, guest_name="Old Name")
+        profile.guest_name = "New Name"
+        profile.save()
+
+        self.assertEqual(self.client.get(f"{self.url}?search=old").data["count"], 0)
+        self.assertEqual(self.client.get(f"{self.url}?search=new").data["count"], 1)
+
+    def test_rebuild_command_backfills_index(self):
+        """Verify the rebuild command restores a missing index."""
+        profile = _make_profile(created_by=self.teacher, guest_name="Meera Iyer")
+        profile.guest_name_tokens.all().delete()
+        self.assertEqual(self.client.get(f"{self.url}?search=meera").data["count"], 0)
+
+        call_command("rebuild_guest_name_index", stdout=StringIO())
+        self.assertEqual(self.client.get(f"{self.url}?search=meera").data["count"], 1)
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class LazyDecryptionTests(APITestCase):
+    def _spy(self):
+        return mock.patch.object(
+            encrypted_fields, "decrypt_value", wraps=encrypted_fields.decrypt_value
+        )
+
+    def test_columns_decrypt_on_first_read_only(self):
+        """Verify loading a profile decrypts nothing until a column is read, then caches it."""
+        profile = _make_profile(city="Delhi")
+
+        with self._spy() as spy:
+            loaded = BirthProfile.objects.get(pk=profile.pk)
+            self.assertEqual(spy.call_count, 0)
+
+            self.assertEqual(loaded.city, "Delhi")
+            self.assertEqual(loaded.city, "Delhi")
+            self.assertEqual(loaded.birth_year, 1990)
+            self.assertEqual(spy.call_count, 2)
+
+    def test_deferred_columns_decrypt_after_fetch(self):
+        """Verify columns excluded with .only() are fetched and decrypted on access."""
+        profile = _make_profile(country_code="NP")
+        loaded = BirthProfile.objects.only("id").get(pk=profile.pk)
+        self.assertEqual(loaded.country_code, "NP")
+
+    def test_unread_columns_survive_save(self):
+        """Verify saving without reading a column writes back the same ciphertext."""
+        profile = _make_profile(city="Chennai")
+        loaded = BirthProfile.objects.get(pk=profile.pk)
+        loaded.kids = 3
+
+        with self._spy() as spy:
+            loaded.save()
+            self.assertEqual(spy.call_count, 0)
+
+        reloaded = BirthProfile.objects.get(pk=profile.pk)
+        self.assertEqual(reloaded.city, "Chennai")
+        self.assertEqual(reloaded.kids, 3)
+
+
+def _chart_fixture():
+    from .charts import DIVISIONAL_CHARTS
+
+    birth_details = {
+        "data": {
+            "planets": [{"planet": "Sun", "nakshatra": "Rohini"}],
+            "ascendant": "Ari",
+            "moon_sign": "Tau",
+        }
+    }
+    divisional = {
+        "data": {
+            "charts": [
+                {
+                    "chart": code,
+                    "name": code,
+                    "positions": [
+                        {"planet": "Ascendant", "sign": "Ari"},
+                        {"planet": "Sun", "sign": "Leo", "degree": 10.5},
+                    ],
+                }
+                for code in DIVISIONAL_CHARTS
+            ]
+        }
+    }
+    return birth_details, divisional
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class NatalChartPayloadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            id=str(uuid.uuid4()), email="natal@example.com"
+        )
+        self.profile = _make_profile(user=self.user)
+        birth_details, divisional = _chart_fixture()
+        self.cache = NatalChartCache.objects.create(
+            birth_profile=self.profile,
+            birth_details_data=birth_details,
+            divisional_data=divisional,
+        )
+        self.url = reverse("astrology-natal-chart")
+        self.client.force_authenticate(user=self.user)
+
+    def test_payload_built_on_save_and_served(self):
+        """Verify the stored payload matches the shaped response and is served from the cache."""
+        from .charts import build_chart_payload
+
+        self.assertTrue(self.cache.chart_payload_is_current)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(body["birth_profile"]["id"], self.profile.id)
+        expected = build_chart_payload(*_chart_fixture())
+        self.assertEqual({k: v for k, v in body.items() if k != "birth_profile"}, expected)
+        self.assertEqual(body["d9_chart"]["graha_details"][0]["current_bhava"], 5)
+
+    def test_conditional_get_and_invalidation(self):
+        """Verify 304 for an unchanged chart and a new ETag once the natal cache changes."""
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Saving unrelated columns leaves the payload alone
+        self.cache.dasha_data = {"data": {}}
+        self.cache.save(update_fields=["dasha_data"])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.cache.birth_details_data["data"]["moon_sign"] = "Gem"
+        self.cache.save(update_fields=["birth_details_data"])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["moon_sign"], "Gem")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_stale_payload_version_rebuilt_on_read(self):
+        """Verify payloads stored under an older version are rebuilt on first read."""
+        NatalChartCache.objects.filter(pk=self.cache.pk).update(
+            chart_payload="", chart_payload_hash="", chart_payload_version=0
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.cache.refresh_from_db()
+        self.assertTrue(self.cache.chart_payload_is_current)
+
+    def test_chart_benchmark_matches_reference(self):
+        """Verify the chart benchmark finds the lookup-table payload identical to the reference."""
+        self.cache.divisional_data["data"]["charts"][0]["positions"][0]["sign"] = "Bogus"
+        self.cache.save()
+
+        out = StringIO()
+        call_command("benchmark_chart_payload", "--repeat", "1", stdout=out)
+        self.assertIn("speedup:", out.getvalue())
+
+    def test_blobs_fetched_on_demand(self):
+        """Verify blob attributes query only their own source, once, and persist on save."""
+        cache = NatalChartCache.objects.get(pk=self.cache.pk)
+        with self.assertNumQueries(1):
+            self.assertIsNone(cache.dasha_data)
+            self.assertIsNone(cache.dasha_data)
+
+        cache.dasha_data = {"data": {"periods": []}}
+        cache.save(update_fields=["dasha_data"])
+        self.assertEqual(
+            set(cache.blobs.values_list("source", flat=True)),
+            {"birth_details", "divisional", "dasha"},
+        )
+
+        cache = NatalChartCache.objects.prefetch_related("blobs").get(pk=self.cache.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.dasha_data, {"data": {"periods": []}})
+            self.assertEqual(cache.birth_details_data["data"]["ascendant"], "Ari")
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY, ASTROLOGY_BLOB_COMPRESS_MIN_BYTES=256)
+class CachedBlobCompactionTests(APITestCase):
+    def setUp(self):
+        self.profile = _make_profile()
+
+    def _transit_response(self):
+        return {
+            "success": True,
+            "credits_used": 1,
+            "data": {
+                "transit_date": "2026-01-01",
+                "transits": [{"planet": "Saturn", "sign": "Pis", "house": 12}] * 20,
+                "summary": "Quiet day",
+                "chart_svg": "<svg>" + "x" * 500 + "</svg>",
+            },
+        }
+
+    def test_responses_pruned_and_compressed_on_save(self):
+        """Verify cached responses drop the API envelope, keep what prompts embed, and large ones are compressed."""
+        cache = TransitCache.objects.create(
+            birth_profile=self.profile,
+            cached_for_date="2026-01-01",
+            transit_data=self._transit_response(),
+        )
+        reloaded = TransitCache.objects.get(pk=cache.pk)
+        self.assertEqual(set(reloaded.transit_data), {"data"})
+        # The transit data reaches the insight prompts whole, so none of it is dropped
+        self.assertEqual(reloaded.transit_data["data"], self._transit_response()["data"])
+        stored = TransitCache.objects.annotate(size=Length("transit_data")).get(pk=cache.pk).size
+        self.assertLess(stored, len(json.dumps(reloaded.transit_data)))
+
+        natal = NatalChartCache.objects.create(
+            birth_profile=self.profile,
+            birth_details_data={"success": True, "data": {"planets": []}},
+            divisional_data={"success": True, "data": {"charts": []}},
+        )
+        self.assertEqual(natal.blobs.get(source="birth_details").data, {"data": {"planets": []}})
+
+    def test_compact_command_prunes_existing_rows(self):
+        """Verify the backfill prunes rows written before pruning and reports the savings."""
+        cache = TransitCache.objects.create(
+            birth_profile=self.profile, cached_for_date="2026-01-01", transit_data={}
+        )
+        # Simulate a row stored verbatim, bypassing save()'s pruning
+        TransitCache.objects.filter(pk=cache.pk).update(transit_data=self._transit_response())
+
+        out = StringIO()
+        call_command("compact_astrology_cache", "--dry-run", stdout=out)
+        self.assertEqual(TransitCache.objects.get(pk=cache.pk).transit_data["credits_used"], 1)
+
+        out = StringIO()
+        call_command("compact_astrology_cache", stdout=out)
+        report = out.getvalue()
+        self.assertIn("astrology_transitcache", report)
+        self.assertNotIn("credits_used", TransitCache.objects.get(pk=cache.pk).transit_data)
+
+        # A second run finds nothing left to change
+        out = StringIO()
+        call_command("compact_astrology_cache", "--model", "astrology.TransitCache", stdout=out)
+        line = next(l for l in out.getvalue().splitlines() if l.startswith("astrology_transitcache"))
+        self.assertEqual(line.split()[1:3], ["1", "0"])
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class TransitRetentionTests(APITestCase):
+    def setUp(self):
+        self.profile = _make_profile()
+        self.today = timezone.now().date()
+
+    def _cache_day(self, day, sign="Pis"):
+        if isinstance(day, int):
+            day = self.today - timedelta(days=day)
+        return TransitCache.objects.create(
+            birth_profile=self.profile,
+            cached_for_date=day,
+            transit_data={"data": {"transits": [{"planet": "Saturn", "sign": sign}]}},
+        )
+
+    def test_purge_keeps_retention_window(self):
+        """Verify rows older than the retention window are purged in batches and newer ones kept."""
+        for days_ago in (0, 5, 31, 40, 90):
+            self._cache_day(days_ago)
+
+        out = StringIO()
+        call_command("purge_transit_cache", "--dry-run", stdout=out)
+        self.assertIn("3 transit rows", out.getvalue())
+        self.assertEqual(TransitCache.objects.count(), 5)
+
+        call_command("purge_transit_cache", "--batch-size", "2", stdout=StringIO())
+        remaining = sorted(
+            (self.today - d).days
+            for d in TransitCache.objects.values_list("cached_for_date", flat=True)
+        )
+        self.assertEqual(remaining, [0, 5])
+
+    def test_rollup_keeps_monthly_summaries(self):
+        """Verify --rollup folds purged days into one summary per profile and month."""
+        self._cache_day(date(2025, 3, 5), sign="Aqu")
+        self._cache_day(date(2025, 3, 6), sign="Aqu")
+        self._cache_day(date(2025, 3, 20), sign="Pis")
+        self._cache_day(date(2025, 4, 1), sign="Pis")
+
+        call_command("purge_transit_cache", "--rollup", "--batch-size", "2", stdout=StringIO())
+        self.assertEqual(TransitCache.objects.count(), 0)
+
+        march = TransitMonthlySummary.objects.get(birth_profile=self.profile, month=date(2025, 3, 1))
+        self.assertEqual(march.days_cached, 3)
+        self.assertEqual(march.planet_sign_days, {"Saturn": {"Aqu": 2, "Pis": 1}})
+        self.assertEqual(
+            TransitMonthlySummary.objects.get(month=date(2025, 4, 1)).days_cached, 1
+        )
+
+
+def _dasha_response():
+    return {
+        "data": {
+            "current_period": {"mahadasha": "Venus", "antardasha": "Sun"},
+            "mahadashas": [
+                {
+                    "planet": "Venus",
+                    "start_date": "2000-01-01",
+                    "end_date": "2020-01-01",
+                    "antardashas": [
+                        {"planet": "Venus", "start_date": "2000-01-01", "end_date": "2010-01-01"},
+                        {"planet": "Sun", "start_date": "2010-01-01", "end_date": "2020-01-01"},
+                    ],
+                },
+                {
+                    "planet": "Sun",
+                    "start_date": "2020-01-01",
+                    "end_date": "2026-01-01",
+                    "antardashas": [
+                        {"planet": "Sun", "start_date": "2020-01-01", "end_date": "2023-01-01T05:30:00"},
+                        {"planet": "Moon", "start_date": "2023-01-01T05:30:00", "end_date": "2026-01-01"},
+                    ],
+                },
+                {"planet": "Moon", "start_date": "2026-01-01", "end_date": "2036-01-01"},
+            ],
+        }
+    }
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class DashaPeriodTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="dasha@example.com")
+        self.profile = _make_profile(user=self.user)
+        birth_details, divisional = _chart_fixture()
+        self.cache = NatalChartCache.objects.create(
+            birth_profile=self.profile,
+            birth_details_data=birth_details,
+            divisional_data=divisional,
+            dasha_data=_dasha_response(),
+        )
+
+    def test_periods_populated_on_save(self):
+        """Verify saving dasha data flattens it into DashaPeriod rows, replacing old ones."""
+        periods = DashaPeriod.objects.filter(birth_profile=self.profile)
+        self.assertEqual(periods.filter(level="mahadasha").count(), 3)
+        self.assertEqual(
+            list(periods.filter(parent_lord="Sun").values_list("lord", flat=True).order_by("start_date")),
+            ["Sun", "Moon"],
+        )
+
+        self.cache.dasha_data = {"data": {"mahadashas": _dasha_response()["data"]["mahadashas"][:1]}}
+        self.cache.save(update_fields=["dasha_data"])
+        self.assertEqual(periods.count(), 3)
+
+    def test_birth_detail_change_drops_periods(self):
+        """Verify editing the birth details of an own or a guest profile deletes its dasha timeline."""
+        guest = _make_profile(created_by=self.user, guest_name="Guest")
+        NatalChartCache.objects.create(birth_profile=guest, dasha_data=_dasha_response())
+        self.assertTrue(DashaPeriod.objects.filter(birth_profile=guest).exists())
+
+        self.client.force_authenticate(user=self.user)
+        with mock.patch("astrology.tasks.generate_all_insights_async"):
+            response = self.client.put(reverse("astrology-birth-profile"), {"birth_hour": 3}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.put(
+                reverse("astrology-guest-profile-detail", args=[guest.pk]), {"birth_year": 1985}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(DashaPeriod.objects.filter(birth_profile__in=[self.profile, guest]).exists())
+
+    def test_failed_blob_write_rolls_back_the_save(self):
+        """Verify the cache row, dasha periods and blobs are saved together or not at all."""
+        from .models import NatalChartBlob
+
+        self.cache.dasha_data = {"data": {"mahadashas": _dasha_response()["data"]["mahadashas"][:1]}}
+        with mock.patch.object(NatalChartBlob.objects, "bulk_create", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.cache.save(update_fields=["dasha_data"])
+
+        self.assertEqual(DashaPeriod.objects.filter(birth_profile=self.profile, level="mahadasha").count(), 3)
+        self.assertEqual(
+            len(NatalChartCache.objects.get(pk=self.cache.pk).dasha_data["data"]["mahadashas"]), 3
+        )
+
+    def test_current_period_follows_the_date(self):
+        """Verify the current period is derived from the stored timeline, not the fetch-time snapshot."""
+        maha, antars = DashaPeriod.current_for(self.profile.id, date(2024, 6, 1))
+        self.assertEqual(maha.lord, "Sun")
+        self.assertEqual([a.lord for a in antars], ["Sun", "Moon"])
+
+        shaped = DashaPeriod.refresh_current_period(
+            self.profile.id, self.cache.dasha_data, date(2024, 6, 1)
+        )
+        self.assertEqual(
+            shaped["data"]["current_period"],
+            {
+                "mahadasha": "Sun",
+                "mahadasha_end": "2026-01-01",
+                "antardasha": "Moon",
+                "antardasha_end": "2026-01-01",
+            },
+        )
+        self.assertEqual([a["is_current"] for a in shaped["data"]["current_antardashas"]], [False, True])
+
+        self.client.force_authenticate(user=self.user)
+        with mock.patch("astrology.views._profile_today", return_value=date(2027, 1, 1)):
+            response = self.client.get(reverse("astrology-dasha"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["current_period"]["mahadasha"], "Moon")
+        self.assertEqual(response.data["current_antardashas"], [])
+
+    def test_fleet_query_by_start_date(self):
+        """Verify profiles entering a new Mahadasha in a window can be found without reading blobs."""
+        changing = DashaPeriod.starting_between(date(2026, 1, 1), date(2026, 2, 1))
+        self.assertEqual(list(changing.values_list("birth_profile_id", "lord")), [(self.profile.id, "Moon")])
+
+    def test_rebuild_command_backfills_periods(self):
+        """Verify the rebuild command restores periods for existing caches."""
+        DashaPeriod.objects.all().delete()
+        call_command("rebuild_dasha_periods", stdout=StringIO())
+        self.assertEqual(DashaPeriod.objects.filter(birth_profile=self.profile).count(), 7)
+
+
+def _festival_response(year):
+    return {
+        "data": {
+            "year": year,
+            "total_festivals": 3,
+            "festivals": [
+                {"name": "Makar Sankranti", "date": f"{year}-01-14", "type": "major", "region": "All India"},
+                {"name": "Pongal", "date": f"{year}-01-15", "type": "regional", "region": "Tamil Nadu"},
+                {"name": "Diwali", "date": f"{year}-11-01", "type": "major", "region": "All India"},
+            ],
+        }
+    }
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class FestivalCalendarTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="festivals@example.com")
+        self.client.force_authenticate(user=self.user)
+        patcher = mock.patch(
+            "astrology.services.AstrologyAPIClient.get_festival_calendar",
+            side_effect=lambda year, **kwargs: _festival_response(year),
+        )
+        self.api = patcher.start()
+        self.addCleanup(patcher.stop)
+        prefetch = mock.patch("astrology.festivals.prefetch_year_async")
+        self.prefetch = prefetch.start()
+        self.addCleanup(prefetch.stop)
+
+    def test_filters_served_from_the_indexed_year(self):
+        """Verify filter combinations reuse one API call and are filtered from Festival rows."""
+        url = reverse("astrology-festival-calendar")
+        response = self.client.post(url, {"year": 2025}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["festivals"]), 3)
+
+        response = self.client.post(url, {"year": 2025, "festival_type": "major"}, format="json")
+        self.assertEqual([f["name"] for f in response.data["festivals"]], ["Makar Sankranti", "Diwali"])
+        self.assertEqual(response.data["total_festivals"], 2)
+
+        # Pan-India festivals are part of every regional calendar
+        response = self.client.post(url, {"year": 2025, "region": "Tamil Nadu"}, format="json")
+        self.assertEqual(
+            [f["name"] for f in response.data["festivals"]], ["Makar Sankranti", "Pongal", "Diwali"]
+        )
+        response = self.client.post(
+            url, {"year": 2025, "festival_type": "regional", "region": "kerala"}, format="json"
+        )
+        self.assertEqual(response.data["festivals"], [])
+
+        self.assertEqual(self.api.call_count, 1)
+        self.assertEqual(FestivalCalendarCache.objects.count(), 1)
+        self.assertEqual(Festival.objects.filter(year=2025).count(), 3)
+
+    def test_item_keys_are_mapped_onto_columns(self):
+        """Verify alternate keys fill the columns, and festivals without a region count as pan-India."""
+        self.api.side_effect = lambda year, **kwargs: {
+            "data": {
+                "festivals": [
+                    {"festival": "Onam", "start_date": f"{year}-09-05", "category": "Regional", "regions": ["Kerala"]},
+                    {"name": "Vishu", "date": f"{year}-04-14", "type": "regional", "region": "Kerala, Tamil-Nadu"},
+                    {"title": "Holi", "festival_date": f"{year}-03-14", "festival_type": "major"},
+                    {"name": "Local Fair", "date": f"{year}-04-01"},
+                ]
+            }
+        }
+        url = reverse("astrology-festival-calendar")
+        names = lambda response: [
+            f.get("name") or f.get("festival") or f.get("title") for f in response.data["festivals"]
+        ]
+        response = self.client.post(url, {"year": 2025, "region": "Kerala"}, format="json")
+        self.assertEqual(names(response), ["Holi", "Local Fair", "Vishu", "Onam"])
+        response = self.client.post(url, {"year": 2025, "region": "tamil nadu"}, format="json")
+        self.assertEqual(names(response), ["Holi", "Local Fair", "Vishu"])
+        # Without a region filter a festival of several regions is listed once
+        response = self.client.post(url, {"year": 2025, "festival_type": "regional"}, format="json")
+        self.assertEqual(names(response), ["Vishu", "Onam"])
+        self.assertEqual(
+            set(Festival.objects.values_list("name", "festival_type", "region")),
+            {
+                ("Onam", "regional", "kerala"),
+                ("Vishu", "regional", "kerala"),
+                ("Vishu", "regional", "tamil nadu"),
+                ("Holi", "major", ""),
+                ("Local Fair", "", ""),
+            },
+        )
+
+    def test_indexing_twice_keeps_one_set_of_rows(self):
+        """Verify a second index_calendar on an indexed year (e.g. the prefetch thread) is a no-op."""
+        from .festivals import get_year_calendar, index_calendar
+
+        calendar = get_year_calendar(2025, "en")
+        index_calendar(FestivalCalendarCache.objects.get(pk=calendar.pk))
+        self.assertEqual(Festival.objects.filter(year=2025).count(), 3)
+
+    def test_upcoming_spans_the_year_boundary(self):
+        """Verify the upcoming window is one date-range query over both years' rows."""
+        with mock.patch("astrology.views._utc_today", return_value=date(2025, 12, 20)):
+            response = self.client.get(
+                reverse("astrology-festivals-upcoming"), {"days": 30, "festival_type": "major"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["to"], "2026-01-19")
+        self.assertEqual([f["date"] for f in response.data["festivals"]], ["2026-01-14"])
+        self.assertEqual(self.api.call_count, 2)
+        self.prefetch.assert_called_once_with(2027, "en")
+
+    def test_current_year_prefetches_the_next(self):
+        """Verify serving the current year schedules the next year's calendar."""
+        with mock.patch("astrology.views._utc_today", return_value=date(2025, 3, 1)):
+            self.client.post(reverse("astrology-festival-calendar"), {"year": 2025}, format="json")
+            self.client.post(reverse("astrology-festival-calendar"), {"year": 2030}, format="json")
+        self.prefetch.assert_called_once_with(2026, "en")
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class GazetteerTests(APITestCase):
+    def test_profile_save_resolves_birth_place(self):
+        """Verify coordinates and timezone are resolved locally when the city changes."""
+        profile = _make_profile(city="Bombay")
+        profile = BirthProfile.objects.get(pk=profile.pk)
+        self.assertAlmostEqual(profile.latitude, 19.076)
+        self.assertAlmostEqual(profile.longitude, 72.8777)
+        self.assertEqual(profile.timezone_str, "Asia/Kolkata")
+
+        profile.city, profile.country_code = "Hyderabad", "PK"
+        profile.save(update_fields=["city", "country_code"])
+        profile.refresh_from_db()
+        self.assertEqual(profile.timezone_str, "Asia/Karachi")
+
+        profile.city = "Atlantis"
+        profile.save()
+        profile.refresh_from_db()
+        self.assertIsNone(profile.latitude)
+
+    def test_subject_payload_sends_coordinates(self):
+        """Verify the provider gets resolved coordinates and timezone, not just the city."""
+        from .services import AstrologyAPIClient
+
+        birth_data = AstrologyAPIClient()._subject_payload(_make_profile())["birth_data"]
+        self.assertEqual(birth_data["timezone"], "Asia/Kolkata")
+        self.assertAlmostEqual(birth_data["latitude"], 19.076)
+
+        birth_data = AstrologyAPIClient()._subject_payload(_make_profile(city="Atlantis"))["birth_data"]
+        self.assertNotIn("latitude", birth_data)
+
+    def test_autocomplete_endpoint(self):
+        """Verify prefix suggestions match alternate names, filter by country and rank by population."""
+        user = User.objects.create_user(id=str(uuid.uuid4()), email="places@example.com")
+        self.client.force_authenticate(user=user)
+        url = reverse("astrology-place-autocomplete")
+
+        response = self.client.get(url, {"q": "bomb"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["name"], "Mumbai")
+        self.assertEqual(response.data["results"][0]["timezone"], "Asia/Kolkata")
+
+        response = self.client.get(url, {"q": "Hyder", "country": "pk"})
+        self.assertEqual([r["region"] for r in response.data["results"]], ["Sindh"])
+
+        response = self.client.get(url, {"q": "s", "limit": 5})
+        self.assertEqual(response.data["results"], [])
+
+    def test_resolve_command_backfills_profiles(self):
+        """Verify the backfill fills missing coordinates but keeps an API-provided timezone."""
+        profile = _make_profile()
+        BirthProfile.objects.filter(pk=profile.pk).update(latitude=None, longitude=None)
+        profile = BirthProfile.objects.get(pk=profile.pk)
+        profile.timezone_str = "Asia/Calcutta"
+        profile.save(update_fields=["timezone_str"])
+
+        out = StringIO()
+        call_command("resolve_birth_places", stdout=out)
+        self.assertIn("Resolved 1 of 1", out.getvalue())
+        profile.refresh_from_db()
+        self.assertAlmostEqual(profile.latitude, 19.076)
+        self.assertEqual(profile.timezone_str, "Asia/Calcutta")
+
+
+def _moon_birth_details(nakshatra, pada):
+    return {"data": {"planets": [{"planet": "Moon", "nakshatra": nakshatra, "nakshatra_pada": pada}]}}
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class CompatibilityTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="match@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("astrology-compatibility")
+
+    def _profile_with_moon(self, nakshatra, pada, **overrides):
+        profile = _make_profile(**overrides)
+        NatalChartCache.objects.create(
+            birth_profile=profile, birth_details_data=_moon_birth_details(nakshatra, pada)
+        )
+        return profile
+
+    def test_table_matches_koota_rules(self):
+        """Verify the precomputed table: 36-point scale, same-nakshatra nadi dosha and symmetric pair scoring."""
+        from .compatibility import KOOTAS, MAX_SCORE, PADAS, moon_pada, score, score_all_pairs
+
+        self.assertEqual(sum(maximum for _, maximum in KOOTAS), MAX_SCORE)
+        self.assertEqual(moon_pada(_moon_birth_details("Purva Phalguni", 2)), 41)
+        # Sign + degree fallback: 12 degrees of Taurus is Rohini pada 1
+        self.assertEqual(
+            moon_pada({"data": {"planets": [{"planet": "Moon", "sign": "Taurus", "degree": 12}]}}), 12
+        )
+
+        same = score(41, 41)
+        self.assertTrue(same["nadi_dosha"])
+        self.assertEqual(same["kootas"]["nadi"]["score"], 0)
+        self.assertEqual(same["kootas"]["yoni"]["score"], 4)
+        for groom in range(0, PADAS, 7):
+            for bride in range(0, PADAS, 5):
+                result = score(groom, bride)
+                self.assertLessEqual(result["total"], MAX_SCORE)
+                self.assertEqual(
+                    result["total"], sum(k["score"] for k in result["kootas"].values())
+                )
+                self.assertEqual(
+                    result["kootas"]["yoni"]["score"], score(bride, groom)["kootas"]["yoni"]["score"]
+                )
+
+        padas = [0, 41, 77, 107]
+        pairs = score_all_pairs(padas, grooms=[False, True, False, True])
+        self.assertEqual(len(pairs), 6)
+        self.assertIn((0, 1, score(41, 0)["total"]), pairs)
+        self.assertIn((2, 3, score(107, 77)["total"]), pairs)
+
+    def test_endpoint_scores_owned_profiles(self):
+        """Verify the endpoint scores the user's own and guest profiles and refuses anyone else's."""
+        from .compatibility import score
+
+        own = self._profile_with_moon("Rohini", 1, user=self.user)
+        guest = self._profile_with_moon("Magha", 3, created_by=self.user, guest_name="Guest")
+        response = self.client.post(self.url, {"profile_a": own.id, "profile_b": guest.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["profile_a"]["nakshatra"], "Rohini")
+        self.assertEqual(response.data["profile_b"]["moon_sign"], "Leo")
+        self.assertEqual(response.data["total"], score(12, 38)["total"])
+        self.assertEqual(len(response.data["kootas"]), 8)
+
+        other = User.objects.create_user(id=str(uuid.uuid4()), email="stranger@example.com")
+        foreign = self._profile_with_moon("Ashwini", 1, user=other)
+        response = self.client.post(self.url, {"profile_a": own.id, "profile_b": foreign.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        uncharted = _make_profile(created_by=self.user, guest_name="No chart")
+        response = self.client.post(self.url, {"profile_a": own.id, "profile_b": uncharted.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["profile_ids"], [uncharted.id])
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class ChartWheelTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="wheel@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.profile = _make_profile(user=self.user)
+        birth_details, divisional = _chart_fixture()
+        NatalChartCache.objects.create(
+            birth_profile=self.profile, birth_details_data=birth_details, divisional_data=divisional
+        )
+
+    def test_token_and_layouts(self):
+        """Verify the token encodes ascendant, signs and retrograde flags, and both styles place grahas by sign."""
+        from .chart_wheel import NORTH, SOUTH, chart_token, layout
+
+        token = chart_token([
+            {"planet": "Ascendant", "sign": "Leo"},
+            {"planet": "Sun", "sign": "Leo", "degree": 3.2},
+            {"planet": "Saturn", "sign": "Aqu", "is_retrograde": "Yes"},
+            {"planet": "Uranus", "sign": "Ari"},
+        ])
+        self.assertEqual(token, "ee-----K--")
+
+        _, south = layout(token, SOUTH, "D1")
+        self.assertIn((0.5, 0.5, "D1", "label"), south)
+        # Leo sits in the right column, third row; Aquarius in the left column, second row
+        self.assertEqual({t[2] for t in south if 0.75 < t[0] < 1 and 0.5 < t[1] < 0.75}, {"Leo", "Asc", "Su"})
+        self.assertTrue(any(t[2] == "Sa(R)" and t[0] < 0.25 and 0.25 < t[1] < 0.5 for t in south))
+
+        _, north = layout(token, NORTH, "D1")
+        # House 1 (top diamond) carries the ascendant sign number and the Sun
+        self.assertIn((0.5, 0.43, "5", "sign"), north)
+        self.assertEqual({t[2] for t in north if t[3] != "sign" and 0.3 < t[0] < 0.7 and t[1] < 0.35}, {"Asc", "Su"})
+
+    def test_profile_redirects_to_cached_image(self):
+        """Verify the profile endpoint redirects to an immutable image URL rendered once for identical charts."""
+        from . import chart_wheel
+
+        response = self.client.get(
+            reverse("astrology-chart-wheel", args=["D9"]), {"style": "south", "image_format": "png"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        image_url = response["Location"]
+        self.assertEqual(
+            image_url,
+            reverse(
+                "astrology-chart-wheel-image",
+                args=[chart_wheel.RENDER_VERSION, "south", "D9", "ae--------", "png"],
+            ),
+        )
+
+        self.client.force_authenticate(user=None)
+        with mock.patch.object(chart_wheel, "render_png", wraps=chart_wheel.render_png) as render:
+            response = self.client.get(image_url)
+            self.client.get(image_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        self.assertEqual(render.call_count, 1)
+
+        response = self.client.get(image_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        svg = self.client.get(
+            reverse("astrology-chart-wheel-image", args=[chart_wheel.RENDER_VERSION, "north", "D1", "ae--------", "svg"])
+        )
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", svg.content)
+
+        # A URL of an older renderer leads to the current rendering
+        stale = self.client.get(
+            reverse("astrology-chart-wheel-image", args=[chart_wheel.RENDER_VERSION - 1, "north", "D1", "ae--------", "svg"])
+        )
+        self.assertEqual(stale.status_code, status.HTTP_302_FOUND)
+        self.assertNotIn("immutable", stale.get("Cache-Control", ""))
+        self.assertIn(f"/v{chart_wheel.RENDER_VERSION}/", stale["Location"])
+
+    def test_invalid_requests(self):
+        """Verify unknown styles, charts and tokens are rejected and missing charts are 404."""
+        from .chart_wheel import RENDER_VERSION
+
+        self.assertEqual(
+            self.client.get(reverse("astrology-chart-wheel", args=["D1"]), {"style": "east"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get(reverse("astrology-chart-wheel", args=["D99"])).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get(reverse("astrology-chart-wheel-image", args=[RENDER_VERSION, "north", "D1", "zz", "svg"])).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        NatalChartCache.objects.all().delete()
+        self.assertEqual(
+            self.client.get(reverse("astrology-chart-wheel", args=["D1"])).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class ReportBuildTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="report@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.profile = _make_profile(user=self.user)
+        self.report = AstrologyReport.objects.create(
+            birth_profile=self.profile, preview_url="https://example.com/preview.pdf"
+        )
+        self.payment = ReportPayment.objects.create(
+            report=self.report, user=self.user, stripe_payment_intent_id="pi_report", amount_cents=999
+        )
+
+        patcher = mock.patch("astrology.report_jobs._get_executor", return_value=_InlineExecutor())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            "astrology.report_generator.generate_report", return_value=(b"%PDF", "Preview text")
+        )
+        self.generate_report = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            "astrology.report_generator.upload_report_to_supabase",
+            return_value="https://example.com/report.pdf",
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _confirm(self):
+        intent = mock.Mock(status="succeeded")
+        with mock.patch("stripe.PaymentIntent.retrieve", return_value=intent):
+            return self.client.post(
+                reverse("astrology-report-confirm"), {"payment_intent_id": "pi_report"}, format="json"
+            )
+
+    def test_confirm_queues_build_and_returns_immediately(self):
+        """Verify confirmation returns 202 GENERATING and the build runs only after the commit."""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self._confirm()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], AstrologyReport.Status.GENERATING)
+        self.assertEqual(response.data["progress"]["stage"], "queued")
+        self.generate_report.assert_not_called()
+
+        # Progress is on the report row, so a worker with an empty cache sees it too
+        cache.clear()
+        reports = self.client.get(reverse("astrology-reports")).data
+        self.assertEqual(reports[0]["status"], AstrologyReport.Status.GENERATING)
+        self.assertEqual(reports[0]["progress"]["stage"], "queued")
+
+        for callback in callbacks:
+            callback()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, AstrologyReport.Status.READY)
+        self.assertEqual(self.report.report_url, "https://example.com/report.pdf")
+        reports = self.client.get(reverse("astrology-reports")).data
+        self.assertEqual(reports[0]["progress"]["stage"], "ready")
+        self.assertIsNotNone(reports[0]["download_url"])
+
+    def test_webhook_and_confirm_build_once(self):
+        """Verify the webhook queues the build and a later confirmation does not build again."""
+        from stripe_payments.services import StripeWebhookService
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StripeWebhookService.handle_payment_intent_succeeded(
+                {"object": {"id": "pi_report", "metadata": {"payment_type": "report"}}}
+            )
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, ReportPayment.Status.COMPLETED)
+        self.assertEqual(self.generate_report.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._confirm()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], AstrologyReport.Status.READY)
+        self.assertEqual(self.generate_report.call_count, 1)
+
+    def test_duplicate_triggers_while_queued_are_ignored(self):
+        """Verify a second trigger while a build is queued does not queue another."""
+        from .report_jobs import enqueue_report_build
+
+        self.payment.status = ReportPayment.Status.COMPLETED
+        self.payment.save(update_fields=["status"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(enqueue_report_build(self.report.id))
+            self.assertFalse(enqueue_report_build(self.report.id))
+        self.assertEqual(self.generate_report.call_count, 1)
+
+    def test_status_view_requeues_only_stale_claims(self):
+        """Verify polling restarts a GENERATING build only once its claim has expired."""
+        from datetime import timedelta
+
+        from django.utils import timezone as dj_timezone
+
+        self.payment.status = ReportPayment.Status.COMPLETED
+        self.payment.save(update_fields=["status"])
+        self.report.status = AstrologyReport.Status.GENERATING
+        self.report.build_started_at = dj_timezone.now()
+        self.report.save(update_fields=["status", "build_started_at"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("astrology-reports"))
+        self.generate_report.assert_not_called()
+
+        AstrologyReport.objects.filter(id=self.report.id).update(
+            build_started_at=dj_timezone.now() - timedelta(hours=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("astrology-reports"))
+        self.assertEqual(self.generate_report.call_count, 1)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, AstrologyReport.Status.READY)
+        self.assertIsNone(self.report.build_started_at)
+
+    def test_failed_build_is_recorded(self):
+        """Verify a rendering error marks the report FAILED and releases the build claim."""
+        self.generate_report.side_effect = RuntimeError("boom")
+        with self.captureOnCommitCallbacks(execute=True):
+            self._confirm()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, AstrologyReport.Status.FAILED)
+
+        self.generate_report.side_effect = None
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._confirm()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, AstrologyReport.Status.READY)
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY, ASTROLOGY_REPORT_URL_TTL=120)
+class ReportDownloadTests(APITestCase):
+    STORED_URL = "https://ref.supabase.co/storage/v1/object/public/astro-reports/7/full-abc.pdf"
+
+    def setUp(self):
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="download@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.profile = _make_profile(user=self.user)
+        self.report = AstrologyReport.objects.create(
+            birth_profile=self.profile,
+            status=AstrologyReport.Status.READY,
+            report_url=self.STORED_URL,
+        )
+        self.payment = ReportPayment.objects.create(
+            report=self.report,
+            user=self.user,
+            stripe_payment_intent_id="pi_download",
+            amount_cents=999,
+            status=ReportPayment.Status.COMPLETED,
+        )
+        self.url = reverse("astrology-report-download", kwargs={"report_type": "full"})
+
+    def test_storage_path_parsing(self):
+        """Verify stored public URLs map back to their bucket and object path."""
+        from .report_generator import report_storage_path
+
+        self.assertEqual(report_storage_path(self.STORED_URL), ("astro-reports", "7/full-abc.pdf"))
+        self.assertIsNone(report_storage_path("https://example.com/report.pdf"))
+
+    def test_redirects_to_signed_url(self):
+        """Verify a paid download is a non-cacheable redirect to a signed URL."""
+        signed = "https://ref.supabase.co/storage/v1/object/sign/astro-reports/7/full-abc.pdf?token=t"
+        with mock.patch(
+            "astrology.report_generator.create_signed_report_url", return_value=signed
+        ) as sign:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(response["Location"], signed)
+        self.assertEqual(response["Cache-Control"], "private, no-store")
+        self.assertEqual(sign.call_args.kwargs["expires_in"], 120)
+
+    def test_payment_gate_kept(self):
+        """Verify unpaid reports are refused before any URL is signed."""
+        self.payment.status = ReportPayment.Status.PENDING
+        self.payment.save(update_fields=["status"])
+        with mock.patch("astrology.report_generator.create_signed_report_url") as sign:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_402_PAYMENT_REQUIRED)
+        sign.assert_not_called()
+
+    def test_streams_range_when_signing_fails(self):
+        """Verify the fallback streams from storage and passes the Range request through."""
+        upstream = mock.Mock(
+            status_code=206,
+            headers={"Content-Range": "bytes 0-3/10", "Content-Length": "4", "Accept-Ranges": "bytes"},
+        )
+        upstream.iter_content.return_value = iter([b"%P", b"DF"])
+        with mock.patch(
+            "astrology.report_generator.create_signed_report_url", side_effect=ValueError("no storage")
+        ), mock.patch("requests.get", return_value=upstream) as get:
+            response = self.client.get(self.url, HTTP_RANGE="bytes=0-3")
+            body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(body, b"%PDF")
+        self.assertEqual(response["Content-Range"], "bytes 0-3/10")
+        self.assertEqual(get.call_args.kwargs["headers"], {"Range": "bytes=0-3"})
+        self.assertTrue(get.call_args.kwargs["stream"])
+        upstream.close.assert_called_once()
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class ReportRenderTests(APITestCase):
+    def test_cover_is_per_profile_and_body_is_shared(self):
+        """Verify each render gets its own cover while the body pages are laid out once."""
+        from . import report_generator
+
+        first = report_generator.generate_preview(_make_profile(guest_name="Asha Rao"))
+        second = report_generator.generate_preview(_make_profile(guest_name="Vikram Sen"))
+        self.assertTrue(first[0].startswith(b"%PDF"))
+        self.assertNotEqual(first[0], second[0])
+        self.assertEqual(first[1], second[1])
+        self.assertTrue(first[1].startswith("## Executive Summary"))
+
+        pdf_bytes, _ = report_generator.generate_report(_make_profile())
+        pages = report_generator._FULL_BODY_PAGES.page_count + 1
+        self.assertEqual(len(re.findall(rb"/Type /Page\b", pdf_bytes)), pages)
+
+    def test_render_benchmark_matches_reference(self):
+        """Verify the render benchmark paginates previews and full reports like the platypus reference."""
+        _make_profile()
+        for extra in ([], ["--full"]):
+            out = StringIO()
+            call_command("benchmark_report_render", "--repeat", "1", *extra, stdout=out)
+            self.assertIn("speedup:", out.getvalue())
+
+
+@override_settings(
+    FIELD_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY,
+    ASTROLOGY_REPORT_FROM_DATA=True,
+    ASTROLOGY_REPORT_RENDER_PROCESSES=0,
+)
+class ReportPipelineTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.profile = _make_profile(guest_name="Data Report")
+        for category, text in (
+            ("marriage", "Venus is strong.\n\nJupiter aspects the 7th & blesses <unions>."),
+            ("mental_health", "The Moon is calm."),
+        ):
+            AstrologyInsight.objects.create(
+                birth_profile=self.profile, category=category, insight_text=text
+            )
+        birth_details, divisional = _chart_fixture()
+        NatalChartCache.objects.create(
+            birth_profile=self.profile, birth_details_data=birth_details, divisional_data=divisional
+        )
+        DashaPeriod.objects.create(
+            birth_profile=self.profile, level="mahadasha", lord="Venus",
+            start_date=date(2020, 1, 1), end_date=date(2040, 1, 1),
+        )
+
+    def test_sections_from_stored_data(self):
+        """Verify insights come first in category order, then one table per varga, then the dasha timeline."""
+        from .charts import DIVISIONAL_CHARTS
+        from .report_pipeline import DASHA, INSIGHT, VARGA, collect_sections
+
+        sections = collect_sections(self.profile)
+        self.assertEqual([s.title for s in sections[:2]], ["Mental Health", "Marriage Timing"])
+        self.assertEqual([s.kind for s in sections].count(INSIGHT), 2)
+        self.assertEqual([s.kind for s in sections].count(VARGA), len(DIVISIONAL_CHARTS))
+        self.assertEqual(sections[-1].kind, DASHA)
+        self.assertEqual(sections[2].content["rows"][0][:3], ["Sun", "Leo", "10.50°"])
+        self.assertEqual(sections[2].content["wheel"], "ae--------")
+
+    def test_only_changed_sections_are_laid_out_again(self):
+        """Verify a rebuild reuses cached fragments and lays out only the edited insight."""
+        from . import report_pipeline
+        from .report_generator import generate_report
+
+        with mock.patch.object(
+            report_pipeline, "render_fragment", wraps=report_pipeline.render_fragment
+        ) as render:
+            pdf_bytes, preview_text = generate_report(self.profile)
+            first_count = render.call_count
+            self.assertEqual(first_count, len(report_pipeline.collect_sections(self.profile)))
+            self.assertTrue(pdf_bytes.startswith(b"%PDF"))
+            self.assertIn("## Mental Health", preview_text)
+
+            generate_report(self.profile)
+            self.assertEqual(render.call_count, first_count)
+
+            AstrologyInsight.objects.filter(category="marriage").update(insight_text="Revised reading.")
+            generate_report(self.profile)
+            self.assertEqual(render.call_count, first_count + 1)
+            self.assertEqual(render.call_args.args[0].content, "Revised reading.")
+
+    @override_settings(ASTROLOGY_REPORT_RENDER_PROCESSES=2)
+    def test_sections_laid_out_in_process_pool(self):
+        """Verify fragments laid out in worker processes match in-process ones."""
+        from .report_pipeline import _render_missing, collect_sections, render_fragment
+
+        sections = collect_sections(self.profile)[:3]
+        try:
+            fragments = _render_missing(sections)
+        finally:
+            from . import report_pipeline
+            report_pipeline._discard_pool()
+        self.assertEqual(len(fragments), 3)
+        self.assertEqual(
+            [len(pickle.loads(f)) for f in fragments],
+            [len(pickle.loads(render_fragment(s))) for s in sections],
+        )
+
+    def test_placeholder_without_data(self):
+        """Verify a profile with no insights or charts still gets the placeholder report."""
+        from .report_generator import _PREVIEW_TEXT, generate_report
+
+        _, preview_text = generate_report(_make_profile())
+        self.assertEqual(preview_text, _PREVIEW_TEXT)
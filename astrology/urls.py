@@ -1,18 +1,28 @@
 from django.urls import path
 from .views import (
     BirthProfileView, NatalChartView, TransitView, DashaView, NakshatraPredictionView,
-    AstrologyInsightView, AstrologyInsightChatView,
+    AstrologyInsightView, AstrologyInsightBundleView, InsightProgressView,
+    AstrologyInsightChatView,
     AstrologyAccessView, AstrologyAccessRevokeView, TeacherStudentDashboardsView,
-    GuestProfileListView, GuestProfileDetailView, FestivalCalendarView,
+    GuestProfileListView, GuestProfileDetailView, FestivalCalendarView, UpcomingFestivalsView,
+    PlaceAutocompleteView, CompatibilityView, ChartWheelView, ChartWheelImageView,
     ReportStatusView, InitiateReportPaymentView, ConfirmReportPaymentView, DownloadReportView,
 )
 
 urlpatterns = [
     path('birth-profile/', BirthProfileView.as_view(), name='astrology-birth-profile'),
     path('natal-chart/', NatalChartView.as_view(), name='astrology-natal-chart'),
+    path('natal-chart/wheel/<str:chart>/', ChartWheelView.as_view(), name='astrology-chart-wheel'),
+    path(
+        'charts/wheel/v<int:version>/<str:style>/<str:chart>/<str:token>.<str:fmt>',
+        ChartWheelImageView.as_view(),
+        name='astrology-chart-wheel-image',
+    ),
     path('transits/', TransitView.as_view(), name='astrology-transits'),
     path('dasha/', DashaView.as_view(), name='astrology-dasha'),
     path('nakshatra-predictions/', NakshatraPredictionView.as_view(), name='astrology-nakshatra-predictions'),
+    path('insights/', AstrologyInsightBundleView.as_view(), name='astrology-insight-bundle'),
+    path('insights/progress/', InsightProgressView.as_view(), name='astrology-insight-progress'),
     path('insights/<str:category>/', AstrologyInsightView.as_view(), name='astrology-insight'),
     path('insights/<str:category>/chat/', AstrologyInsightChatView.as_view(), name='astrology-insight-chat'),
 
@@ -27,6 +37,13 @@ urlpatterns = [
 
     # Festival calendar
     path('festival-calendar/', FestivalCalendarView.as_view(), name='astrology-festival-calendar'),
+    path('festivals/upcoming/', UpcomingFestivalsView.as_view(), name='astrology-festivals-upcoming'),
+
+    # Birth-place autocomplete (offline gazetteer)
+    path('places/autocomplete/', PlaceAutocompleteView.as_view(), name='astrology-place-autocomplete'),
+
+    # Ashtakoota compatibility
+    path('compatibility/', CompatibilityView.as_view(), name='astrology-compatibility'),
 
     # ── Astrology Reports ────────────────────────────────────────────────────
     # Note: purchase/ and confirm-payment/ MUST be registered before
@@ -6,27 +6,42 @@ Views:
   2. NatalChartView              — GET combined D1+D9, cached permanently
   3. TransitView                 — GET today's transits, invalidated daily
   4. AstrologyInsightView        — GET Gemini AI insight per category
+     AstrologyInsightBundleView  — GET all ready insights + statuses in one call
+     InsightProgressView         — GET short-poll for background generation events
   5. AstrologyAccessView         — Student manages access grants (GET/POST)
   6. AstrologyAccessRevokeView   — Student revokes a specific grant (DELETE)
   7. TeacherStudentDashboardsView — Teacher lists students they can view (GET)
+  8. FestivalCalendarView        — POST yearly festival calendar, filtered in SQL
+     UpcomingFestivalsView       — GET festivals in the next N days
+  9. PlaceAutocompleteView       — GET birth-place suggestions from the offline gazetteer
+ 10. CompatibilityView           — POST Ashtakoota match between two birth profiles
+ 11. ChartWheelView              — GET redirect to a profile's chart diagram
+     ChartWheelImageView         — GET content-addressed chart diagram (SVG / PNG)
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
 
+import hashlib
+import json
 import logging
 import pytz
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
+from core.encryption import BLIND_INDEX_MAX_PREFIX, blind_index, normalize_search_tokens
 from core.models import User
 
 from .models import (
     BirthProfile,
+    DashaPeriod,
+    GuestNameIndexToken,
     NatalChartCache,
     TransitCache,
     NakshatraPredictionCache,
@@ -34,128 +49,33 @@ from .models import (
     AstrologyDashboardAccess,
     AstrologyChat,
     FestivalCalendarCache,
+    Festival,
     AstrologyReport,
     ReportPayment,
 )
+from .charts import build_chart_payload
 from .serializers import (
     BirthProfileSerializer,
     AstrologyAccessSerializer,
     StudentDashboardSummarySerializer,
     AstrologyChatSerializer,
     FestivalCalendarRequestSerializer,
+    UpcomingFestivalsRequestSerializer,
+    PlaceAutocompleteRequestSerializer,
+    CompatibilityRequestSerializer,
 )
 from .services import AstrologyAPIClient, AstrologyAPIError, GeminiAIService
 
 logger = logging.getLogger(__name__)
 
+# Read size when streaming a report PDF through from storage
+_REPORT_STREAM_CHUNK_BYTES = 64 * 1024
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-ZODIAC_SIGNS = [
-    "Ari",
-    "Tau",
-    "Gem",
-    "Can",
-    "Leo",
-    "Vir",
-    "Lib",
-    "Sco",
-    "Sag",
-    "Cap",
-    "Aqu",
-    "Pis",
-]
-
-SIGN_LORDS = {
-    "Ari": "Mars",
-    "Tau": "Venus",
-    "Gem": "Mercury",
-    "Can": "Moon",
-    "Leo": "Sun",
-    "Vir": "Mercury",
-    "Lib": "Venus",
-    "Sco": "Mars",
-    "Sag": "Jupiter",
-    "Cap": "Saturn",
-    "Aqu": "Saturn",
-    "Pis": "Jupiter",
-}
-
-
-def _calculate_house(asc_sign: str, planet_sign: str) -> int:
-    """Calculates the house number (1-12) based on Ascendant and Planet signs."""
-    try:
-        asc_idx = ZODIAC_SIGNS.index(asc_sign)
-        plt_idx = ZODIAC_SIGNS.index(planet_sign)
-        return ((plt_idx - asc_idx) % 12) + 1
-    except ValueError:
-        return 1
-
-
-def _build_ui_tables(positions: list, full_planets: list) -> dict:
-    """Builds Graha and Bhava details explicitly mapped for the UI."""
-    asc_pos = next((p for p in positions if p.get("planet") == "Ascendant"), None)
-    asc_sign = asc_pos.get("sign", "Ari") if asc_pos else "Ari"
-
-    planet_map = {p.get("planet"): p for p in full_planets}
-    graha_details = []
-    bhava_details = {
-        i: {"bhava": i, "residents": [], "owner": "", "rashi": ""} for i in range(1, 13)
-    }
-
-    # Pre-fill Bhava details based on Ascendant
-    try:
-        asc_idx = ZODIAC_SIGNS.index(asc_sign)
-        for i in range(12):
-            sign = ZODIAC_SIGNS[(asc_idx + i) % 12]
-            bhava_details[i + 1]["rashi"] = sign
-            bhava_details[i + 1]["owner"] = SIGN_LORDS.get(sign, "")
-    except ValueError:
-        pass
-
-    for pos in positions:
-        p_name = pos.get("planet")
-        p_sign = pos.get("sign")
-
-        if p_name == "Ascendant":
-            continue
-
-        house_num = _calculate_house(asc_sign, p_sign)
-
-        if 1 <= house_num <= 12:
-            bhava_details[house_num]["residents"].append(p_name)
-
-        full_p = planet_map.get(p_name, {})
-
-        # Which houses does this planet own in this specific chart?
-        ruled_houses = [
-            h_num
-            for h_num, h_data in bhava_details.items()
-            if h_data["owner"] == p_name
-        ]
-
-        graha_details.append(
-            {
-                "graha": p_name,
-                "longitude_rashi": p_sign,
-                "longitude_degree": pos.get("degree"),
-                "current_bhava": house_num,
-                "rules_bhavas": ruled_houses,
-                "nakshatra": full_p.get("nakshatra"),
-                "nakshatra_pada": full_p.get("nakshatra_pada"),
-                "nakshatra_lord": full_p.get("nakshatra_lord"),
-                "nakshatra_sublord": full_p.get("nakshatra_sublord"),
-            }
-        )
-
-    return {
-        "graha_details": graha_details,
-        "bhava_details": list(bhava_details.values()),
-    }
-
-
 def _is_transit_stale(cache: TransitCache, timezone_str: str) -> bool:
     """
     Returns True if the cached transit date no longer matches today's date
@@ -166,6 +86,16 @@ def _is_transit_stale(cache: TransitCache, timezone_str: str) -> bool:
     return cache.cached_for_date != today_local
 
 
+def _profile_today(profile: BirthProfile):
+    """Today's date in the profile's timezone (UTC until the natal chart backfills it)."""
+    tz = pytz.timezone(profile.timezone_str) if profile.timezone_str else pytz.utc
+    return datetime.now(tz).date()
+
+
+def _utc_today():
+    return datetime.now(pytz.utc).date()
+
+
 def _build_natal_response(
     birth_details: dict, divisional: dict, profile: BirthProfile
 ) -> dict:
@@ -173,60 +103,34 @@ def _build_natal_response(
     Shapes the raw API responses into a clean, frontend-friendly payload
     that carries everything the circular chart needs, plus structured UI tables.
     """
-    bd_data = birth_details.get("data", {})
-    div_data = divisional.get("data", {})
-    planets_list = bd_data.get("planets", [])
-
-    response_dict = {
-        "birth_profile": BirthProfileSerializer(profile).data,
-        "planets": planets_list,
-        "ascendant": bd_data.get("ascendant"),
-        "moon_sign": bd_data.get("moon_sign"),
-        "sun_sign": bd_data.get("sun_sign"),
-        "nakshatra": bd_data.get("nakshatra"),
-        "ayanamsa": bd_data.get("ayanamsa"),
-        "ayanamsa_value": bd_data.get("ayanamsa_value"),
-        "calculation_info": bd_data.get("calculation_info"),
-        "vargottama_planets": div_data.get("vargottama_planets", []),
-    }
-
-    # Dynamic divisional charts extraction
-    requested_div_charts = [
-        "D1",
-        "D2",
-        "D3",
-        "D4",
-        "D7",
-        "D9",
-        "D10",
-        "D12",
-        "D16",
-        "D20",
-        "D24",
-        "D27",
-        "D30",
-        "D40",
-        "D45",
-        "D60",
-    ]
-    charts = {c["chart"]: c for c in div_data.get("charts", [])}
-
-    for chart_code in requested_div_charts:
-        chart_obj = charts.get(chart_code, {})
-        chart_tables = _build_ui_tables(chart_obj.get("positions", []), planets_list)
-
-        key_name = f"{chart_code.lower()}_chart"
-        response_dict[key_name] = {
-            "name": chart_obj.get("name", chart_code),
-            "purpose": chart_obj.get("purpose", ""),
-            "positions": chart_obj.get("positions", []),
-            "graha_details": chart_tables["graha_details"],
-            "bhava_details": chart_tables["bhava_details"],
-        }
-
+    response_dict = {"birth_profile": BirthProfileSerializer(profile).data}
+    response_dict.update(build_chart_payload(birth_details, divisional))
     return response_dict
 
 
+def _serve_natal_payload(request, cache: NatalChartCache, profile: BirthProfile):
+    """
+    Serves the pre-serialized chart payload with the birth profile spliced in,
+    answering 304 when the client already holds this version.
+    """
+    fingerprint = f"{cache.chart_payload_hash}:{profile.id}:{profile.updated_at.isoformat()}"
+    etag = quote_etag(hashlib.sha256(fingerprint.encode()).hexdigest()[:32])
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        profile_json = json.dumps(
+            BirthProfileSerializer(profile).data, cls=DjangoJSONEncoder
+        )
+        # chart_payload is a JSON object literal; prepend the profile key to it
+        body = '{"birth_profile":' + profile_json + "," + cache.chart_payload[1:]
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
 # ---------------------------------------------------------------------------
 # Views
 # ---------------------------------------------------------------------------
@@ -279,6 +183,15 @@ def _resolve_profile(request):
             status=status.HTTP_403_FORBIDDEN,
         )
 
+    # Fast path: a single query resolves the grant and the profile together.
+    # The step-by-step lookups below only run to build a precise error.
+    profile = BirthProfile.objects.filter(
+        user_id=student_id,
+        user__astrology_access_grants__teacher=request.user,
+    ).first()
+    if profile is not None:
+        return profile, None
+
     try:
         target_student = User.objects.get(pk=student_id)
     except User.DoesNotExist:
@@ -398,6 +311,7 @@ class BirthProfileView(APIView):
             # Clear caches — birth data changed so charts must be recomputed
             NatalChartCache.objects.filter(birth_profile=profile).delete()
             TransitCache.objects.filter(birth_profile=profile).delete()
+            DashaPeriod.objects.filter(birth_profile=profile).delete()
             AstrologyInsight.objects.filter(birth_profile=profile).delete()
             AstrologyChat.objects.filter(birth_profile=profile).delete()
             profile = serializer.save(timezone_str="")  # reset timezone too
@@ -421,7 +335,9 @@ class NatalChartView(APIView):
 
     Supports ?student_id=X for teachers with delegated access.
     Data is computed once (on first request) and cached permanently in
-    NatalChartCache. Subsequent calls are DB-only (no external API hit).
+    NatalChartCache. Subsequent calls are DB-only (no external API hit) and
+    serve the payload pre-serialized at cache-fill time, with an ETag so
+    unchanged charts answer 304.
     timezone_str is backfilled from the API response on first call.
     """
 
@@ -436,28 +352,13 @@ class NatalChartView(APIView):
         try:
             cache = profile.natal_cache
 
-            # Verify if the cache has all the required divisional charts (e.g. check for 'D60')
-            div_data = cache.divisional_data.get("data", {})
-            cached_charts = {c["chart"] for c in div_data.get("charts", [])}
-            required_charts = {
-                "D1",
-                "D2",
-                "D3",
-                "D4",
-                "D7",
-                "D9",
-                "D10",
-                "D12",
-                "D16",
-                "D20",
-                "D24",
-                "D27",
-                "D30",
-                "D40",
-                "D45",
-                "D60",
-            }
-            if not required_charts.issubset(cached_charts):
+            if not cache.chart_payload_is_current:
+                # Payload predates the current shape (or was never built)
+                cache.refresh_chart_payload()
+                cache.save(update_fields=list(NatalChartCache.CHART_PAYLOAD_FIELDS))
+
+            # An empty payload means the cache is missing required divisional charts
+            if not cache.chart_payload:
                 logger.info(
                     f"Cached charts list is incomplete for user {profile.display_name}. Triggering cache miss..."
                 )
@@ -465,11 +366,7 @@ class NatalChartView(APIView):
 
             msg = f"Natal chart retrieved from DATABASE cache for user: {profile.display_name}"
             logger.info(msg)
-            return Response(
-                _build_natal_response(
-                    cache.birth_details_data, cache.divisional_data, profile
-                )
-            )
+            return _serve_natal_payload(request, cache, profile)
         except NatalChartCache.DoesNotExist:
             msg = f"Natal chart CACHE MISS for user: {profile.display_name}. Calling Astrology.io API..."
             logger.info(msg)
@@ -497,14 +394,16 @@ class NatalChartView(APIView):
             profile.timezone_str = timezone_str
             profile.save(update_fields=["timezone_str"])
 
-        # Persist cache
-        NatalChartCache.objects.update_or_create(
+        # Persist cache (saving rebuilds the stored chart payload)
+        cache, _ = NatalChartCache.objects.update_or_create(
             birth_profile=profile,
             defaults={
                 "birth_details_data": birth_details,
                 "divisional_data": divisional,
             },
         )
+        if cache.chart_payload:
+            return _serve_natal_payload(request, cache, profile)
 
         return Response(_build_natal_response(birth_details, divisional, profile))
 
@@ -613,7 +512,9 @@ class DashaView(APIView):
 
         # Ensure natal cache exists (natal chart must be fetched first)
         try:
-            natal_cache = profile.natal_cache
+            natal_cache = NatalChartCache.objects.defer("chart_payload").get(
+                birth_profile=profile
+            )
         except NatalChartCache.DoesNotExist:
             return Response(
                 {
@@ -626,7 +527,11 @@ class DashaView(APIView):
             logger.info(
                 f"Dasha data retrieved from DATABASE cache for user: {profile.display_name}"
             )
-            return Response(self._shape_response(natal_cache.dasha_data))
+            # The cached current_period is from fetch time; re-derive it for today
+            dasha_data = DashaPeriod.refresh_current_period(
+                profile.id, natal_cache.dasha_data, _profile_today(profile)
+            )
+            return Response(self._shape_response(dasha_data))
 
         # Cache miss — fetch from API
         logger.info(
@@ -824,12 +729,15 @@ class AstrologyInsightView(APIView):
 
             # Safely grab the base natal component needed to run advanced queries.
             try:
-                natal_cache = profile.natal_cache
+                natal_cache = NatalChartCache.objects.defer("chart_payload").get(
+                    birth_profile=profile
+                )
             except NatalChartCache.DoesNotExist:
                 return Response(
                     {"detail": "Please fetch the base natal chart first."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+            natal_cache.load_blobs()
 
             client = AstrologyAPIClient()
             data_to_pass = {
@@ -862,7 +770,9 @@ class AstrologyInsightView(APIView):
                 ]:
                     if not natal_cache.dasha_data:
                         natal_cache.dasha_data = client.get_vimshottari_dasha(profile)
-                    data_to_pass["dasha"] = natal_cache.dasha_data
+                    data_to_pass["dasha"] = DashaPeriod.refresh_current_period(
+                        profile.id, natal_cache.dasha_data, _profile_today(profile)
+                    )
 
                 if category == "btr":
                     if not natal_cache.kp_data:
@@ -889,7 +799,9 @@ class AstrologyInsightView(APIView):
                         )
                         data_to_pass["transits"] = transit_data
 
-                natal_cache.save()
+                natal_cache.save(
+                    update_fields=["ashtakvarga_data", "dasha_data", "kp_data"]
+                )
             except AstrologyAPIError as e:
                 return Response(
                     {"detail": f"Failed to fetch extended astrology data: {str(e)}"},
@@ -930,6 +842,12 @@ class AstrologyInsightView(APIView):
                 defaults={"insight_text": generated_text},
             )
 
+            # Let progress pollers know if a background run is waiting on it
+            from .tasks import get_insight_progress, record_insight_progress
+
+            if get_insight_progress(profile.id)["state"] == "running":
+                record_insight_progress(profile.id, category, "ready")
+
             return Response(
                 {"category": category, "insight_text": new_insight.insight_text}
             )
@@ -937,6 +855,137 @@ class AstrologyInsightView(APIView):
             cache.delete(lock_key)
 
 
+class AstrologyInsightBundleView(APIView):
+    """
+    GET — Returns every ready insight for the profile plus a per-category
+    generation status, so the dashboard needs one request instead of one per
+    category.
+
+    Supports ?student_id=X / ?guest_profile_id=X like the other views, and
+    ?categories=a,b,c to restrict the bundle to a subset of categories.
+
+    Status values per category:
+      - "ready"      — insight_text is included in `insights`
+      - "generating" — a foreground view or the background task holds the lock
+      - "pending"    — not generated yet; GET /insights/<category>/ to generate
+
+    Never triggers generation itself. Responses carry an ETag derived from the
+    insight timestamps and statuses; a matching If-None-Match returns 304.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        valid_categories = [c[0] for c in AstrologyInsight.CATEGORY_CHOICES]
+
+        requested = request.query_params.get("categories")
+        if requested:
+            categories = [c.strip() for c in requested.split(",") if c.strip()]
+            invalid = [c for c in categories if c not in valid_categories]
+            if invalid:
+                return Response(
+                    {
+                        "detail": f"Invalid categories: {invalid}. Valid options: {valid_categories}"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            categories = valid_categories
+
+        profile, err = _resolve_profile(request)
+        if err:
+            return err
+
+        # One query for every requested insight
+        rows = AstrologyInsight.objects.filter(
+            birth_profile=profile, category__in=categories
+        ).values_list("category", "insight_text", "updated_at")
+        insights = {}
+        versions = {}
+        for category, insight_text, updated_at in rows:
+            insights[category] = insight_text
+            versions[category] = updated_at.isoformat()
+
+        # One cache round-trip for the generation locks of the missing ones
+        from django.core.cache import cache
+
+        missing = [c for c in categories if c not in insights]
+        lock_keys = {f"generating_insight_{profile.id}_{c}": c for c in missing}
+        locked = {lock_keys[k] for k in cache.get_many(list(lock_keys))}
+
+        statuses = {}
+        for category in categories:
+            if category in insights:
+                statuses[category] = "ready"
+            elif category in locked:
+                statuses[category] = "generating"
+            else:
+                statuses[category] = "pending"
+
+        fingerprint = json.dumps(
+            [profile.id, statuses, versions], sort_keys=True
+        ).encode()
+        etag = quote_etag(hashlib.sha256(fingerprint).hexdigest()[:32])
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and etag in parse_etags(if_none_match):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(
+                {
+                    "birth_profile_id": profile.id,
+                    "insights": insights,
+                    "status": statuses,
+                    "ready_count": len(insights),
+                    "total_count": len(categories),
+                }
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class InsightProgressView(APIView):
+    """
+    GET — Background insight generation progress for a profile.
+
+    Query params:
+      since    int  optional — last event `seq` the client has seen (default 0)
+
+    Returns immediately with the run's state and the events newer than
+    `since` (possibly none). Clients poll every few seconds while the state
+    is "running", with `since` set to the returned `seq`. Progress is read
+    from InsightProgressEvent rows, so any worker can answer the poll.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        from .tasks import get_insight_progress
+
+        try:
+            since = int(request.query_params.get("since", 0))
+        except ValueError:
+            return Response(
+                {"detail": "since must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        profile, err = _resolve_profile(request)
+        if err:
+            return err
+
+        progress = get_insight_progress(profile.id)
+        return Response(
+            {
+                "birth_profile_id": profile.id,
+                "state": progress["state"],
+                "seq": progress["seq"],
+                "events": [e for e in progress["events"] if e["seq"] > since],
+            }
+        )
+
+
 # ---------------------------------------------------------------------------
 # Chat History Views
 # ---------------------------------------------------------------------------
@@ -1023,18 +1072,23 @@ class AstrologyInsightChatView(APIView):
 
         # 2. Extract structured static data
         try:
-            natal_cache = profile.natal_cache
+            natal_cache = NatalChartCache.objects.defer("chart_payload").get(
+                birth_profile=profile
+            )
         except NatalChartCache.DoesNotExist:
             return Response(
                 {"detail": "Missing natal cache."}, status=status.HTTP_400_BAD_REQUEST
             )
+        natal_cache.load_blobs()
 
         structured_data = {
             "birth_details": natal_cache.birth_details_data,
             "divisional_data": natal_cache.divisional_data,
         }
         if natal_cache.dasha_data:
-            structured_data["dasha"] = natal_cache.dasha_data
+            structured_data["dasha"] = DashaPeriod.refresh_current_period(
+                profile.id, natal_cache.dasha_data, _profile_today(profile)
+            )
         if natal_cache.ashtakvarga_data:
             structured_data["ashtakvarga"] = natal_cache.ashtakvarga_data
         if natal_cache.kp_data:
@@ -1266,15 +1320,19 @@ class GuestProfileListView(APIView):
 
         search = request.query_params.get("search")
         if search:
-            search_lower = search.lower()
-            # guest_name is encrypted, so we must decrypt (evaluate) and filter in Python
-            profiles = [
-                p
-                for p in profiles_qs
-                if p.guest_name and search_lower in p.guest_name.lower()
-            ]
-        else:
-            profiles = list(profiles_qs)
+            # guest_name is encrypted, so match against its blind index instead:
+            # every search word must be a prefix of some word in the name.
+            words = normalize_search_tokens(search)
+            if not words:
+                # Nothing searchable (e.g. only punctuation) matches no name
+                profiles_qs = profiles_qs.none()
+            for word in words:
+                profiles_qs = profiles_qs.filter(
+                    guest_name_tokens__token=blind_index(
+                        word[:BLIND_INDEX_MAX_PREFIX], GuestNameIndexToken.NAMESPACE
+                    )
+                )
+        profiles = profiles_qs
 
         paginator = GuestProfilePagination()
         page = paginator.paginate_queryset(profiles, request)
@@ -1384,6 +1442,7 @@ class GuestProfileDetailView(APIView):
             # Clear caches because birth data might have changed
             NatalChartCache.objects.filter(birth_profile=profile).delete()
             TransitCache.objects.filter(birth_profile=profile).delete()
+            DashaPeriod.objects.filter(birth_profile=profile).delete()
             AstrologyInsight.objects.filter(birth_profile=profile).delete()
             AstrologyChat.objects.filter(birth_profile=profile).delete()
             profile = serializer.save(timezone_str="")  # reset timezone too
@@ -1413,11 +1472,16 @@ class FestivalCalendarView(APIView):
     """
     POST — Returns the Hindu festival calendar for a given year.
     Supports optional filters: festival_type, language, region.
-    Caches the results in the database (FestivalCalendarCache) to prevent repeated external API requests.
+    The unfiltered calendar is fetched once per (year, language) and
+    normalized into Festival rows; filters are applied in SQL, so filter
+    combinations never cost another external API request. Serving the
+    current year prefetches the next one in the background.
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        from .festivals import filtered_calendar_data, get_year_calendar, prefetch_year_async
+
         serializer = FestivalCalendarRequestSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -1427,47 +1491,257 @@ class FestivalCalendarView(APIView):
         language = serializer.validated_data.get("language") or "en"
         region = serializer.validated_data.get("region") or ""
 
-        # 1. Check database cache first
-        cache_entry = FestivalCalendarCache.objects.filter(
-            year=year,
-            festival_type=festival_type,
-            language=language,
-            region=region
-        ).first()
+        try:
+            calendar = get_year_calendar(year, language)
+        except AstrologyAPIError as e:
+            return Response(
+                {"detail": f"Astrology API error: {str(e)}"},
+                status=status.HTTP_502_BAD_GATEWAY,
+            )
+        logger.info(f"Festival calendar served from DATABASE for year {year} (type: {festival_type}, lang: {language}, region: {region})")
 
-        if cache_entry:
-            logger.info(f"Festival calendar retrieved from DATABASE cache for year {year} (type: {festival_type}, lang: {language}, region: {region})")
-            return Response(cache_entry.calendar_data)
+        if year == _utc_today().year:
+            prefetch_year_async(year + 1, language)
+
+        if not festival_type and not region:
+            return Response(calendar.calendar_data)
+        return Response(filtered_calendar_data(calendar, festival_type, region))
+
+
+class UpcomingFestivalsView(APIView):
+    """
+    GET — Festivals in the next ?days= days (default 30, max 366) from today (UTC).
+    Optional filters: festival_type, language, region.
+
+    Served from the Festival table with one date-range query, even across a
+    year boundary; any year in the window that is not cached yet is fetched
+    first, and the following year is prefetched in the background.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        from .festivals import filter_festivals, get_year_calendar, prefetch_year_async
+
+        serializer = UpcomingFestivalsRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        days = serializer.validated_data.get("days") or 30
+        festival_type = serializer.validated_data.get("festival_type") or ""
+        language = serializer.validated_data.get("language") or "en"
+        region = serializer.validated_data.get("region") or ""
+
+        start = _utc_today()
+        end = start + timedelta(days=days)
 
-        # 2. Call external API
-        client = AstrologyAPIClient()
         try:
-            raw_response = client.get_festival_calendar(
-                year=year,
-                festival_type=festival_type or None,
-                language=language or None,
-                region=region or None
-            )
+            for year in range(start.year, end.year + 1):
+                get_year_calendar(year, language)
         except AstrologyAPIError as e:
             return Response(
                 {"detail": f"Astrology API error: {str(e)}"},
                 status=status.HTTP_502_BAD_GATEWAY,
             )
+        prefetch_year_async(end.year + 1, language)
 
-        festival_data = raw_response.get("data", {})
+        festivals = filter_festivals(
+            Festival.objects.filter(
+                language=language, festival_date__gte=start, festival_date__lte=end
+            ),
+            festival_type,
+            region,
+        ).order_by("festival_date", "id")
+        results = list(festivals.values_list("details", flat=True))
 
-        # 3. Store in database cache
-        FestivalCalendarCache.objects.update_or_create(
-            year=year,
-            festival_type=festival_type,
-            language=language,
-            region=region,
-            defaults={
-                "calendar_data": festival_data
+        return Response(
+            {
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "count": len(results),
+                "festivals": results,
             }
         )
 
-        return Response(festival_data)
+
+class PlaceAutocompleteView(APIView):
+    """
+    GET ?q=<prefix>&country=<ISO code>&limit=<n> — City suggestions for the
+    birth-place form, most populous first, with coordinates and timezone.
+    Answered from the bundled gazetteer; no external geocoding call.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        from .gazetteer import get_gazetteer
+
+        serializer = PlaceAutocompleteRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        places = get_gazetteer().autocomplete(
+            serializer.validated_data["q"],
+            country_code=serializer.validated_data.get("country") or "",
+            limit=serializer.validated_data.get("limit") or 10,
+        )
+        return Response({"results": [place.as_dict() for place in places]})
+
+
+class CompatibilityView(APIView):
+    """
+    POST — Ashtakoota (36-point) compatibility between two birth profiles the
+    user owns: their own profile or guest profiles they created.
+
+    Body: { "profile_a": <groom profile id>, "profile_b": <bride profile id> }
+    Both profiles need a cached natal chart; the score is read from the
+    precomputed pada table in astrology.compatibility.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        from .compatibility import describe_pada, load_moon_padas, score
+
+        serializer = CompatibilityRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = [serializer.validated_data["profile_a"], serializer.validated_data["profile_b"]]
+        owned = set(
+            BirthProfile.objects.filter(
+                Q(user=request.user) | Q(user__isnull=True, created_by=request.user),
+                id__in=ids,
+            ).values_list("id", flat=True)
+        )
+        if not owned.issuperset(ids):
+            return Response({"detail": "Birth profile not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        padas = load_moon_padas(ids)
+        missing = [profile_id for profile_id in ids if profile_id not in padas]
+        if missing:
+            return Response(
+                {
+                    "detail": "Natal chart not generated yet for these profiles.",
+                    "profile_ids": missing,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        groom, bride = padas[ids[0]], padas[ids[1]]
+        return Response(
+            {
+                "profile_a": {"id": ids[0], **describe_pada(groom)},
+                "profile_b": {"id": ids[1], **describe_pada(bride)},
+                **score(groom, bride),
+            }
+        )
+
+
+class ChartWheelView(APIView):
+    """
+    GET — Chart diagram of one divisional chart of the profile.
+
+    Supports ?student_id=X for teachers with delegated access.
+    Query params: style (north | south, default north), image_format
+    (svg | png, default svg; not "format", which DRF reserves). Answers 302 to the diagram's content-addressed URL
+    (ChartWheelImageView), built from the positions in
+    NatalChartCache.divisional_data; the redirect itself is not cached.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, chart):
+        from django.urls import reverse
+        from . import chart_wheel
+
+        style = request.query_params.get("style", chart_wheel.NORTH)
+        fmt = request.query_params.get("image_format", "svg")
+        error = chart_wheel.validate("-" * chart_wheel.TOKEN_LENGTH, style, chart, fmt)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile, err = _resolve_profile(request)
+        if err:
+            return err
+
+        try:
+            natal_cache = NatalChartCache.objects.defer("chart_payload").get(birth_profile=profile)
+        except NatalChartCache.DoesNotExist:
+            return Response(
+                {"detail": "Natal chart not generated yet. Call /natal-chart/ first."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        natal_cache.load_blobs("divisional")
+        positions = chart_wheel.divisional_positions(natal_cache.divisional_data, chart)
+        if not positions:
+            return Response(
+                {"detail": f"Chart {chart} is not available for this profile."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        token = chart_wheel.chart_token(positions)
+        http_response = HttpResponseRedirect(
+            reverse(
+                "astrology-chart-wheel-image",
+                kwargs={
+                    "version": chart_wheel.RENDER_VERSION,
+                    "style": style,
+                    "chart": chart,
+                    "token": token,
+                    "fmt": fmt,
+                },
+            )
+        )
+        http_response["Cache-Control"] = "private, no-cache"
+        return http_response
+
+
+class ChartWheelImageView(APIView):
+    """
+    GET — Chart diagram for a chart token (see astrology.chart_wheel).
+
+    The image is a pure function of its URL — renderer version, style,
+    chart code and the token of sign placements, nothing that identifies a
+    profile — so it is served without authentication and cached for a year
+    by browsers and CDNs. Identical charts across profiles share one URL and
+    one rendering. A URL of an older RENDER_VERSION redirects to the current
+    one, so bumping the version never serves a changed image under a URL
+    that was already cached as immutable.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, version, style, chart, token, fmt):
+        from django.urls import reverse
+        from . import chart_wheel
+
+        if version != chart_wheel.RENDER_VERSION:
+            return HttpResponseRedirect(
+                reverse(
+                    "astrology-chart-wheel-image",
+                    kwargs={
+                        "version": chart_wheel.RENDER_VERSION,
+                        "style": style,
+                        "chart": chart,
+                        "token": token,
+                        "fmt": fmt,
+                    },
+                )
+            )
+
+        error = chart_wheel.validate(token, style, chart, fmt)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = quote_etag(chart_wheel.image_etag(token, style, chart, fmt))
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and etag in parse_etags(if_none_match):
+            http_response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            http_response = HttpResponse(
+                chart_wheel.get_chart_image(token, style, chart, fmt),
+                content_type=chart_wheel.FORMATS[fmt],
+            )
+        http_response["ETag"] = etag
+        http_response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return http_response
 
 
 # ===========================================================================
@@ -1541,11 +1815,15 @@ class ReportStatusView(APIView):
     teacher).
 
     The preview_content field is always included regardless of payment status.
+    While a paid report is GENERATING, "progress" holds the build stage
+    (queued → rendering → uploading → ready | failed).
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        from .report_jobs import enqueue_report_build, get_report_progress, is_build_stale
+
         birth_profile_id = request.query_params.get("birth_profile_id")
         profile, err = _resolve_birth_profile_for_report(request, birth_profile_id)
         if err:
@@ -1565,12 +1843,23 @@ class ReportStatusView(APIView):
         data = []
         for report in reports:
             payment = getattr(report, "payment", None)
+            if (
+                report.status == AstrologyReport.Status.GENERATING
+                and report.is_paid
+                and is_build_stale(report)
+            ):
+                # Restarts a build whose worker died (e.g. a deploy) once its
+                # claim has expired
+                if enqueue_report_build(report.id):
+                    report.refresh_from_db(fields=["status", "build_stage", "build_stage_at"])
+            progress = get_report_progress(report)
             data.append(
                 {
                     "id": report.id,
                     "report_type": report.report_type,
                     "report_type_display": report.get_report_type_display(),
                     "status": report.status,
+                    "progress": progress,
                     "is_paid": report.is_paid,
                     "preview_content": report.preview_content,
                     "preview_url": report.preview_url or None,
@@ -1708,14 +1997,16 @@ class ConfirmReportPaymentView(APIView):
     POST /api/astrology/reports/confirm-payment/
 
     Called by the frontend AFTER Stripe.js has confirmed the card payment.
-    Verifies the PaymentIntent, marks the payment as COMPLETED, generates
-    the PDF, uploads it to Supabase Storage, and returns the report status.
+    Verifies the PaymentIntent, marks the payment as COMPLETED and queues the
+    PDF build (astrology.report_jobs), then returns straight away; poll
+    GET /api/astrology/reports/ for build progress. The Stripe webhook queues
+    the same build, so whichever arrives first starts it.
 
     Request body:
       payment_intent_id  string  required
 
-    Response 200:
-      report_id, status ("ready" | "generating" | "failed"), preview_content, message
+    Response 200 (report already built) / 202 (build queued or running):
+      report_id, status ("ready" | "generating"), progress, preview_content, message
     """
 
     permission_classes = [IsAuthenticated]
@@ -1723,7 +2014,7 @@ class ConfirmReportPaymentView(APIView):
     def post(self, request):
         import stripe as stripe_lib
         from django.utils import timezone as dj_timezone
-        from .report_generator import generate_report, upload_report_to_supabase
+        from .report_jobs import enqueue_report_build, get_report_progress
 
         intent_id = request.data.get("payment_intent_id", "").strip()
         if not intent_id:
@@ -1760,87 +2051,70 @@ class ConfirmReportPaymentView(APIView):
                 }
             )
 
-        # 3. Verify with Stripe that the payment actually succeeded
-        try:
-            intent = stripe_lib.PaymentIntent.retrieve(intent_id)
-        except Exception as e:
-            logger.error(f"Stripe retrieve failed for {intent_id}: {e}")
-            return Response(
-                {"detail": "Could not verify payment with Stripe."},
-                status=status.HTTP_502_BAD_GATEWAY,
-            )
+        # 3. Verify with Stripe that the payment actually succeeded — unless
+        #    the webhook has already recorded it
+        if report_payment.status != ReportPayment.Status.COMPLETED:
+            try:
+                intent = stripe_lib.PaymentIntent.retrieve(intent_id)
+            except Exception as e:
+                logger.error(f"Stripe retrieve failed for {intent_id}: {e}")
+                return Response(
+                    {"detail": "Could not verify payment with Stripe."},
+                    status=status.HTTP_502_BAD_GATEWAY,
+                )
 
-        if intent.status != "succeeded":
-            return Response(
-                {
-                    "detail": f"Payment not yet confirmed (status: {intent.status}). "
-                              "Complete the payment on the frontend first."
-                },
-                status=status.HTTP_402_PAYMENT_REQUIRED,
-            )
+            if intent.status != "succeeded":
+                return Response(
+                    {
+                        "detail": f"Payment not yet confirmed (status: {intent.status}). "
+                                  "Complete the payment on the frontend first."
+                    },
+                    status=status.HTTP_402_PAYMENT_REQUIRED,
+                )
 
-        # 4. Mark payment as COMPLETED
+        # 4. Mark payment as COMPLETED and queue the PDF build (a no-op if
+        #    the webhook already queued it)
         with transaction.atomic():
-            report_payment.status = ReportPayment.Status.COMPLETED
-            report_payment.paid_at = dj_timezone.now()
-            report_payment.save(update_fields=["status", "paid_at", "updated_at"])
-
-            report.status = AstrologyReport.Status.GENERATING
-            report.save(update_fields=["status", "updated_at"])
-
-        # 5. Generate PDF + upload to Supabase Storage
-        try:
-            pdf_bytes, preview_text = generate_report(report.birth_profile)
-            public_url = upload_report_to_supabase(
-                pdf_bytes,
-                birth_profile_id=report.birth_profile_id,
-                report_type=report.report_type,
-            )
-
-            report.report_url = public_url
-            report.preview_content = preview_text
-            report.status = AstrologyReport.Status.READY
-            report.generated_at = dj_timezone.now()
-            report.save(update_fields=["report_url", "preview_content", "status", "generated_at", "updated_at"])
-
-            logger.info(f"AstrologyReport #{report.id} generated and stored at {public_url}")
-
-            return Response(
-                {
-                    "report_id": report.id,
-                    "status": report.status,
-                    "preview_content": report.preview_content,
-                    "preview_url": report.preview_url or None,
-                    "message": "Your report is ready to download.",
-                }
-            )
+            if report_payment.status != ReportPayment.Status.COMPLETED:
+                report_payment.status = ReportPayment.Status.COMPLETED
+                report_payment.paid_at = dj_timezone.now()
+                report_payment.save(update_fields=["status", "paid_at", "updated_at"])
+            enqueue_report_build(report.id)
+        # The stage was set by whichever trigger (this one or the webhook) queued the build
+        report.refresh_from_db(fields=["build_stage", "build_stage_at"])
 
-        except Exception as e:
-            logger.error(f"Report generation failed for report #{report.id}: {e}")
-            report.status = AstrologyReport.Status.FAILED
-            report.save(update_fields=["status", "updated_at"])
-            return Response(
-                {
-                    "report_id": report.id,
-                    "status": AstrologyReport.Status.FAILED,
-                    "detail": "Report generation failed. Your payment is recorded — please contact support.",
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return Response(
+            {
+                "report_id": report.id,
+                "status": AstrologyReport.Status.GENERATING,
+                "progress": get_report_progress(report),
+                "preview_content": report.preview_content,
+                "preview_url": report.preview_url or None,
+                "message": "Payment confirmed. Your report is being generated.",
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
 
 
 class DownloadReportView(APIView):
     """
     GET /api/astrology/reports/<report_type>/download/
 
-    Payment gate: streams the PDF only if the user has a COMPLETED ReportPayment
+    Payment gate: serves the PDF only if the user has a COMPLETED ReportPayment
     and the report status is READY.
 
+    The file itself comes straight from Supabase Storage: the response is a
+    302 to a signed URL valid for ASTROLOGY_REPORT_URL_TTL seconds. If the
+    URL cannot be signed, the PDF is streamed through instead, passing the
+    Range header on so interrupted downloads can resume.
+
     Query params:
       birth_profile_id  int  optional — teacher can access a guest profile's report
 
     Response codes:
-      200  PDF bytes  (application/pdf)
+      302  Redirect to a signed download URL
+      200  PDF bytes  (application/pdf), streamed
+      206  Requested byte range of the PDF, streamed
       202  Generating — report is being built, poll again shortly
       402  Payment required
       404  No report found for this profile + type
@@ -1850,6 +2124,8 @@ class DownloadReportView(APIView):
 
     def get(self, request, report_type):
         import requests as http_requests
+        from django.conf import settings as dj_settings
+        from .report_generator import create_signed_report_url
 
         if report_type not in AstrologyReport.ReportType.values:
             return Response(
@@ -1904,9 +2180,38 @@ class DownloadReportView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        # Fetch PDF from Supabase Storage and stream to client
+        display_name = profile.display_name.replace(" ", "_")[:40]
+        filename = f"vedic-astrology-report-{display_name}.pdf"
+
+        # Hand the download to Supabase Storage with a short-lived signed URL
         try:
-            resp = http_requests.get(report.report_url, timeout=30)
+            signed_url = create_signed_report_url(
+                report.report_url,
+                filename,
+                expires_in=getattr(dj_settings, "ASTROLOGY_REPORT_URL_TTL", 300),
+            )
+        except Exception as e:
+            logger.warning(f"Could not sign download URL for report #{report.id}, streaming instead: {e}")
+        else:
+            http_response = HttpResponseRedirect(signed_url)
+            # The signed URL expires; never let a cache replay this redirect
+            http_response["Cache-Control"] = "private, no-store"
+            return http_response
+
+        # Fallback: stream the PDF from storage without buffering it
+        upstream_headers = {}
+        if request.META.get("HTTP_RANGE"):
+            upstream_headers["Range"] = request.META["HTTP_RANGE"]
+        try:
+            resp = http_requests.get(
+                report.report_url, headers=upstream_headers, stream=True, timeout=30
+            )
+            if resp.status_code == 416:
+                resp.close()
+                http_response = HttpResponse(status=416)
+                if "Content-Range" in resp.headers:
+                    http_response["Content-Range"] = resp.headers["Content-Range"]
+                return http_response
             resp.raise_for_status()
         except Exception as e:
             logger.error(f"Failed to fetch report PDF from Supabase for report #{report.id}: {e}")
@@ -1915,12 +2220,18 @@ class DownloadReportView(APIView):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-        display_name = profile.display_name.replace(" ", "_")[:40]
-        filename = f"vedic-astrology-report-{display_name}.pdf"
+        def chunks():
+            try:
+                yield from resp.iter_content(chunk_size=_REPORT_STREAM_CHUNK_BYTES)
+            finally:
+                resp.close()
 
-        http_response = HttpResponse(
-            resp.content,
-            content_type="application/pdf",
+        http_response = StreamingHttpResponse(
+            chunks(), status=resp.status_code, content_type="application/pdf"
         )
+        for header in ("Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified"):
+            if header in resp.headers:
+                http_response[header] = resp.headers[header]
         http_response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        http_response["Cache-Control"] = "private"
         return http_response
@@ -1,4 +1,168 @@
-from typing import Dict
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set
+from django.conf import settings
 from fastapi import WebSocket
 
-active_connections: Dict[str, WebSocket] = {}
+logger = logging.getLogger(__name__)
+
+# Close code for evicted sockets: 1013 "Try Again Later"
+EVICTED_CLOSE_CODE = 1013
+
+
+class ClientConnection:
+    """
+    One live WebSocket with its own outbound queue, drained by a writer task.
+
+    Broadcasting only enqueues, so a slow recipient never delays the others
+    or the sender. A client whose queue stays at or above
+    CHAT_WS_QUEUE_HIGH_WATER for CHAT_WS_SLOW_CLIENT_GRACE_SECONDS (or
+    reaches twice the mark) is evicted: its socket is closed and later
+    messages are refused. A {"type": "ping"} goes out every
+    CHAT_WS_HEARTBEAT_SECONDS, and the client answers with any frame
+    ({"type": "pong"} will do): a peer that sends nothing for twice the
+    heartbeat interval is treated as dead and evicted, as is one that
+    cannot take a frame within CHAT_WS_SEND_TIMEOUT_SECONDS. A successful
+    send alone proves nothing; a half-open peer's frames just pile up in the
+    kernel's send buffer.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.high_water = getattr(settings, "CHAT_WS_QUEUE_HIGH_WATER", 100)
+        self.grace = getattr(settings, "CHAT_WS_SLOW_CLIENT_GRACE_SECONDS", 10)
+        self.send_timeout = getattr(settings, "CHAT_WS_SEND_TIMEOUT_SECONDS", 10)
+        self.heartbeat = getattr(settings, "CHAT_WS_HEARTBEAT_SECONDS", 25)
+        self.closed = False
+        self.last_seen = time.monotonic()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._over_since: Optional[float] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._write())]
+        if self.heartbeat:
+            self._tasks.append(asyncio.create_task(self._ping()))
+
+    def enqueue(self, message: dict) -> bool:
+        """Queues message for the writer; False when the client is closed or was just evicted."""
+        if self.closed:
+            return False
+        backlog = self._queue.qsize()
+        if backlog >= self.high_water:
+            now = time.monotonic()
+            if self._over_since is None:
+                self._over_since = now
+            if backlog >= 2 * self.high_water or now - self._over_since >= self.grace:
+                self.evict(f"{backlog} messages queued")
+                return False
+        else:
+            self._over_since = None
+        self._queue.put_nowait(message)
+        if self._over_since is None and backlog + 1 >= self.high_water:
+            self._over_since = time.monotonic()
+        return True
+
+    async def _write(self):
+        while True:
+            message = await self._queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.evict(f"send failed: {e!r}")
+                return
+
+    def touch(self):
+        """Records an inbound frame from the client (any frame proves it alive)."""
+        self.last_seen = time.monotonic()
+
+    async def _ping(self):
+        while not self.closed:
+            await asyncio.sleep(self.heartbeat)
+            idle = time.monotonic() - self.last_seen
+            if idle > 2 * self.heartbeat:
+                self.evict(f"no frames from the client for {idle:.0f}s")
+                return
+            self.enqueue({"type": "ping"})
+
+    def evict(self, reason: str):
+        if self.closed:
+            return
+        logger.warning(f"Evicting chat socket: {reason}")
+        self.close()
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=EVICTED_CLOSE_CODE)
+        except Exception:
+            pass  # Already closed by the peer
+
+    def close(self):
+        """Stops the writer and heartbeat; queued messages are dropped."""
+        self.closed = True
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+
+
+class ConnectionRegistry:
+    """
+    Live connections of this process, indexed chat_id → user_id → connections.
+
+    A user may hold several sockets on one chat (one per tab or device).
+    Broadcasting touches only the sockets of the target chat, and empty
+    entries are pruned on removal so the index never outgrows the live
+    connections. All access happens on the event loop, so no locking.
+    """
+
+    def __init__(self):
+        self._chats: Dict[str, Dict[str, Set[ClientConnection]]] = {}
+
+    def add(self, chat_id: str, user_id: str, connection: ClientConnection):
+        self._chats.setdefault(chat_id, {}).setdefault(user_id, set()).add(connection)
+
+    def remove(self, chat_id: str, user_id: str, connection: ClientConnection):
+        users = self._chats.get(chat_id)
+        if not users:
+            return
+        connections = users.get(user_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del users[user_id]
+            if not users:
+                del self._chats[chat_id]
+
+    def has_chat(self, chat_id: str) -> bool:
+        return chat_id in self._chats
+
+    def recipients(self, chat_id: str, exclude_user: Optional[str] = None) -> List[tuple]:
+        """(user_id, connection) pairs on chat_id, optionally skipping one user's connections."""
+        return [
+            (user_id, connection)
+            for user_id, connections in self._chats.get(chat_id, {}).items()
+            if user_id != exclude_user
+            for connection in connections
+        ]
+
+    def broadcast(self, chat_id: str, message: dict, exclude_user: Optional[str] = None):
+        """
+        Queues message for every connection on chat_id except exclude_user's.
+        Never waits on a socket; connections that refuse it (closed or
+        evicted) are dropped from the registry.
+        """
+        for user_id, connection in self.recipients(chat_id, exclude_user):
+            if not connection.enqueue(message):
+                self.remove(chat_id, user_id, connection)
+
+    def __len__(self) -> int:
+        return sum(len(connections) for users in self._chats.values() for connections in users.values())
+
+
+active_connections = ConnectionRegistry()
@@ -1,6 +1,7 @@
 from fastapi import HTTPException
 from core.supabase_client import get_admin_client
 from core.authentication import SupabaseTokenAuthentication
+from chat.services.db import execute
 
 async def get_current_user(token: str) -> dict:
     """Verify Supabase JWT locally using JWKS — zero network calls, cryptographically secure."""
@@ -9,17 +10,16 @@ async def get_current_user(token: str) -> dict:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     return payload
 
-def assert_participant(chat_id: str, user_id: str):
+async def assert_participant(chat_id: str, user_id: str):
     """
     Raises HTTP 403 if user_id is not a participant of chat_id.
-    Uses the Supabase admin client (bypasses RLS) for the check.
+    Uses the Supabase admin client (bypasses RLS) for the check, off the event loop.
     """
-    result = (
+    result = await execute(
         get_admin_client()
         .table("chats")
         .select("participant1, participant2")
         .eq("id", chat_id)
-        .execute()
     )
     if not result.data:
         raise HTTPException(status_code=404, detail="Chat not found")
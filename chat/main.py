@@ -1,9 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from chat.routers.chats import router as chats_router
 from chat.routers.messages import router as messages_router
+from chat.pubsub import backplane
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cross-worker message fan-out (chat.pubsub)
+    await backplane.start()
+    yield
+    await backplane.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"]
 app.add_middleware(
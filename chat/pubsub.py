@@ -0,0 +1,258 @@
+"""
+Pub/sub backplane for chat message fan-out across workers and hosts.
+
+Senders publish a message for a chat_id instead of writing to sockets
+directly. Every worker subscribes to the chats its local sockets are on
+and delivers what it receives to them through its ConnectionRegistry, so
+a recipient gets messages live whichever worker holds its socket.
+
+Backends (CHAT_PUBSUB_BACKEND):
+  memory    — in-process; a single worker, and tests. Backplanes sharing
+              a `bus` list behave like separate workers.
+  postgres  — LISTEN/NOTIFY with one channel per chat on
+              CHAT_PUBSUB_DATABASE_URL. This needs a direct (session)
+              connection: transaction-mode poolers drop LISTEN.
+"""
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Optional, Set
+
+from django.conf import settings
+
+from chat.connections import ConnectionRegistry, active_connections
+from chat.services.db import execute, run_db
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads are capped at 8000 bytes; larger messages travel by id
+_MAX_NOTIFY_BYTES = 7900
+_RECONNECT_DELAY = 2.0
+
+
+def _envelope(chat_id: str, message: dict, exclude_user: Optional[str]) -> dict:
+    return {"chat_id": chat_id, "exclude_user": exclude_user, "message": message}
+
+
+class Backplane(abc.ABC):
+    """Base backplane: subscription bookkeeping and local delivery."""
+
+    def __init__(self, registry: ConnectionRegistry):
+        self.registry = registry
+        self._chats: Set[str] = set()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def subscribe(self, chat_id: str):
+        """Starts receiving chat_id's messages; a no-op when already subscribed."""
+        if chat_id not in self._chats:
+            self._chats.add(chat_id)
+            await self._listen(chat_id)
+
+    async def unsubscribe(self, chat_id: str):
+        if chat_id in self._chats:
+            self._chats.discard(chat_id)
+            await self._unlisten(chat_id)
+
+    @abc.abstractmethod
+    async def publish(self, chat_id: str, message: dict, exclude_user: Optional[str] = None):
+        """Sends message to every socket on chat_id, on any worker, except exclude_user's."""
+
+    async def _listen(self, chat_id: str):
+        pass
+
+    async def _unlisten(self, chat_id: str):
+        pass
+
+    async def _deliver(self, envelope: dict):
+        chat_id = envelope["chat_id"]
+        if chat_id in self._chats:
+            self.registry.broadcast(chat_id, envelope["message"], exclude_user=envelope["exclude_user"])
+
+
+class InMemoryBackplane(Backplane):
+    def __init__(self, registry: ConnectionRegistry, bus: Optional[list] = None):
+        super().__init__(registry)
+        self._bus = bus if bus is not None else []
+        self._bus.append(self)
+
+    async def publish(self, chat_id: str, message: dict, exclude_user: Optional[str] = None):
+        envelope = _envelope(chat_id, message, exclude_user)
+        for backplane in list(self._bus):
+            await backplane._deliver(envelope)
+
+
+class PostgresBackplane(Backplane):
+    """
+    LISTEN/NOTIFY backplane on psycopg2. A dedicated autocommit connection
+    holds the LISTENs and is read from the event loop (add_reader); NOTIFYs
+    go out on a second connection from the chat DB thread pool. The worker
+    receives its own NOTIFYs, so local sockets are served the same way as
+    remote ones.
+    """
+
+    def __init__(self, registry: ConnectionRegistry, dsn: str):
+        super().__init__(registry)
+        self._dsn = dsn
+        self._loop = None
+        self._listen_conn = None
+        self._notify_conn = None
+        # Keeps LISTEN / UNLISTEN in the order the subscriptions changed
+        self._command_lock = asyncio.Lock()
+
+    @staticmethod
+    def channel(chat_id: str) -> str:
+        # Hashed: chat ids are caller-supplied and identifiers max out at 63 bytes
+        return "chat_" + hashlib.sha1(chat_id.encode()).hexdigest()
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self._dsn)
+        conn.autocommit = True
+        return conn
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._listen_conn = await run_db(self._connect)
+        self._loop.add_reader(self._listen_conn.fileno(), self._on_readable)
+        for chat_id in self._chats:
+            await self._listen(chat_id)
+
+    async def stop(self):
+        for conn in (self._listen_conn, self._notify_conn):
+            if conn is None:
+                continue
+            if conn is self._listen_conn and self._loop is not None:
+                self._loop.remove_reader(conn.fileno())
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._listen_conn = self._notify_conn = None
+
+    def _run(self, conn, statement, params=None):
+        with conn.cursor() as cursor:
+            cursor.execute(statement, params)
+
+    async def _listen(self, chat_id: str):
+        await self._channel_command("LISTEN", chat_id)
+
+    async def _unlisten(self, chat_id: str):
+        await self._channel_command("UNLISTEN", chat_id)
+
+    async def _channel_command(self, command: str, chat_id: str):
+        from psycopg2 import sql
+
+        if self._listen_conn is None:
+            return  # (re)start LISTENs to every subscribed chat
+        statement = sql.SQL(command + " {}").format(sql.Identifier(self.channel(chat_id)))
+        async with self._command_lock:
+            try:
+                await run_db(self._run, self._listen_conn, statement)
+            except Exception as e:
+                logger.error(f"Chat backplane {command} failed for chat {chat_id}: {e}")
+                self._schedule_reconnect()
+
+    def _notify(self, channel: str, payload: str):
+        import psycopg2
+
+        for attempt in (1, 2):
+            try:
+                if self._notify_conn is None or self._notify_conn.closed:
+                    self._notify_conn = self._connect()
+                self._run(self._notify_conn, "SELECT pg_notify(%s, %s)", (channel, payload))
+                return
+            except psycopg2.OperationalError:
+                # Stale connection: reconnect once
+                self._notify_conn = None
+                if attempt == 2:
+                    raise
+
+    async def publish(self, chat_id: str, message: dict, exclude_user: Optional[str] = None):
+        payload = json.dumps(_envelope(chat_id, message, exclude_user), separators=(",", ":"))
+        if len(payload.encode()) > _MAX_NOTIFY_BYTES:
+            payload = json.dumps(_envelope(chat_id, {"id": message["id"]}, exclude_user) | {"by_id": True})
+        await run_db(self._notify, self.channel(chat_id), payload)
+
+    def _on_readable(self):
+        try:
+            self._listen_conn.poll()
+        except Exception as e:
+            logger.error(f"Chat backplane connection lost: {e}")
+            self._schedule_reconnect()
+            return
+        while self._listen_conn.notifies:
+            notify = self._listen_conn.notifies.pop(0)
+            self._loop.create_task(self._receive(notify.payload))
+
+    async def _receive(self, payload: str):
+        try:
+            envelope = json.loads(payload)
+            if envelope.pop("by_id", False):
+                envelope["message"] = await _load_message(envelope["message"]["id"])
+            await self._deliver(envelope)
+        except Exception as e:
+            logger.error(f"Chat backplane failed to deliver a message: {e}")
+
+    def _schedule_reconnect(self):
+        if self._listen_conn is None:
+            return
+        self._loop.remove_reader(self._listen_conn.fileno())
+        try:
+            self._listen_conn.close()
+        except Exception:
+            pass
+        self._listen_conn = None
+        self._loop.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while self._listen_conn is None:
+            await asyncio.sleep(_RECONNECT_DELAY)
+            try:
+                await self.start()
+                logger.info("Chat backplane reconnected")
+            except Exception as e:
+                logger.error(f"Chat backplane reconnect failed: {e}")
+                self._listen_conn = None
+
+
+async def _load_message(message_id: str) -> dict:
+    """A message in the broadcast shape, read back for payloads too large to NOTIFY."""
+    from core.supabase_client import get_admin_client
+
+    result = await execute(
+        get_admin_client()
+        .table("messages")
+        .select("*, attachments:message_attachments(*)")
+        .eq("id", message_id)
+    )
+    row = result.data[0]
+    return {
+        "id": row["id"],
+        "sender_id": row["sender_id"],
+        "content": row["content"],
+        "attachments": [
+            {key: a[key] for key in ("file_url", "file_name", "file_type", "file_size")}
+            for a in row.get("attachments") or []
+        ],
+        "timestamp": row["timestamp"],
+    }
+
+
+def _create_backplane() -> Backplane:
+    backend = getattr(settings, "CHAT_PUBSUB_BACKEND", "memory")
+    if backend == "postgres":
+        return PostgresBackplane(active_connections, settings.CHAT_PUBSUB_DATABASE_URL)
+    if backend != "memory":
+        raise ValueError(f"Unknown CHAT_PUBSUB_BACKEND: {backend}")
+    return InMemoryBackplane(active_connections)
+
+
+backplane = _create_backplane()
@@ -6,8 +6,10 @@ from pydantic import BaseModel
 from django.conf import settings
 
 from core.supabase_client import get_admin_client
-from chat.connections import active_connections
-from chat.dependencies import get_current_user
+from chat.connections import ClientConnection, active_connections
+from chat.pubsub import backplane
+from chat.dependencies import assert_participant, get_current_user
+from chat.services.db import execute
 from chat.services.email import send_teacher_notification_email
 from chat.services.users import get_user_details
 
@@ -137,11 +139,25 @@ async def websocket_endpoint(
         await websocket.close(code=1008)
         return
 
-    key = f"{chat_id}:{user_id}"
-    active_connections[key] = websocket
+    # Only participants may receive the chat's messages
     try:
+        await assert_participant(chat_id, user_id)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "content": e.detail})
+        await websocket.close(code=1008)
+        return
+
+    # Outbound frames (broadcasts, heartbeat pings) go through the connection's queue
+    connection = ClientConnection(websocket)
+    connection.start()
+    active_connections.add(chat_id, user_id, connection)
+    try:
+        await backplane.subscribe(chat_id)
         while True:
             data = await websocket.receive_json()
+            connection.touch()
+            if data.get("type") == "pong":
+                continue
             message_content = data.get("content", "").strip()
 
             if not message_content:
@@ -152,15 +168,17 @@ async def websocket_endpoint(
             timestamp = datetime.now(timezone.utc).isoformat()
 
             # Persist text-only message
-            get_admin_client().table("messages").insert(
-                {
-                    "id": msg_id,
-                    "chat_id": chat_id,
-                    "sender_id": user_id,
-                    "content": message_content,
-                    "timestamp": timestamp,
-                }
-            ).execute()
+            await execute(
+                get_admin_client().table("messages").insert(
+                    {
+                        "id": msg_id,
+                        "chat_id": chat_id,
+                        "sender_id": user_id,
+                        "content": message_content,
+                        "timestamp": timestamp,
+                    }
+                )
+            )
 
             # Broadcast to other participant(s) in the chat
             outgoing = {
@@ -170,9 +188,13 @@ async def websocket_endpoint(
                 "attachments": [],
                 "timestamp": timestamp,
             }
-            for k, ws in active_connections.items():
-                if k.startswith(f"{chat_id}:") and k != key:
-                    await ws.send_json(outgoing)
+            await backplane.publish(chat_id, outgoing, exclude_user=user_id)
 
     except WebSocketDisconnect:
-        active_connections.pop(key, None)
+        pass
+    finally:
+        # Every exit path — disconnect, eviction, bad frame, failed insert — drops this socket only
+        connection.close()
+        active_connections.remove(chat_id, user_id, connection)
+        if not active_connections.has_chat(chat_id):
+            await backplane.unsubscribe(chat_id)
@@ -1,13 +1,15 @@
 import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
 from django.conf import settings
 
 from core.supabase_client import get_admin_client
-from chat.connections import active_connections
+from chat.pubsub import backplane
 from chat.dependencies import get_current_user, assert_participant
+from chat.services.db import execute, run_db
 from chat.services.file_upload import validate_file, sanitize_filename
+from chat.services.history import NEWER, OLDER, fetch_page, page_size
 
 router = APIRouter()
 
@@ -40,7 +42,7 @@ async def send_message(
     user_id = user["sub"]
 
     # 2. Participant guard
-    assert_participant(chat_id, user_id)
+    await assert_participant(chat_id, user_id)
 
     # 3. Basic content validation
     content_text = (content or "").strip() or None
@@ -82,7 +84,8 @@ async def send_message(
     for file_bytes, original_name, detected_mime, safe_ext in validated_files:
         storage_path = f"{chat_id}/{user_id}/{uuid.uuid4()}.{safe_ext}"
         try:
-            get_admin_client().storage.from_(bucket).upload(
+            await run_db(
+                get_admin_client().storage.from_(bucket).upload,
                 path=storage_path,
                 file=file_bytes,
                 file_options={"content-type": detected_mime},
@@ -101,7 +104,7 @@ async def send_message(
             # Rollback: delete every successfully uploaded file in this batch
             for path in uploaded_paths:
                 try:
-                    get_admin_client().storage.from_(bucket).remove([path])
+                    await run_db(get_admin_client().storage.from_(bucket).remove, [path])
                 except Exception:
                     pass  # Best-effort cleanup
             raise HTTPException(
@@ -113,15 +116,17 @@ async def send_message(
     msg_id = str(uuid.uuid4())
     timestamp = datetime.now(timezone.utc).isoformat()
 
-    get_admin_client().table("messages").insert(
-        {
-            "id": msg_id,
-            "chat_id": chat_id,
-            "sender_id": user_id,
-            "content": content_text,
-            "timestamp": timestamp,
-        }
-    ).execute()
+    await execute(
+        get_admin_client().table("messages").insert(
+            {
+                "id": msg_id,
+                "chat_id": chat_id,
+                "sender_id": user_id,
+                "content": content_text,
+                "timestamp": timestamp,
+            }
+        )
+    )
 
     # 7. Persist attachments to DB
     if attachment_meta:
@@ -137,7 +142,7 @@ async def send_message(
             }
             for a in attachment_meta
         ]
-        get_admin_client().table("message_attachments").insert(attachment_rows).execute()
+        await execute(get_admin_client().table("message_attachments").insert(attachment_rows))
 
     # 8. Build outgoing payload
     outgoing = {
@@ -148,33 +153,46 @@ async def send_message(
         "timestamp": timestamp,
     }
 
-    # 9. Broadcast to other participant(s) connected via WebSocket
-    for k, ws in active_connections.items():
-        if k.startswith(f"{chat_id}:") and not k.endswith(f":{user_id}"):
-            try:
-                await ws.send_json(outgoing)
-            except Exception:
-                pass  # Don't fail if the recipient's socket is momentarily down
+    # 9. Broadcast to other participant(s) connected via WebSocket, on any worker
+    # (a recipient socket that fails is dropped; the send still succeeds)
+    await backplane.publish(chat_id, outgoing, exclude_user=user_id)
 
     return outgoing
 
 
 @router.get("/messages/{chat_id}")
-def get_messages(chat_id: str):
+async def get_messages(
+    chat_id: str,
+    token: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+):
     """
-    Returns all messages for a chat, with their attachments nested inline.
-    Each message object:
+    Returns one page of a chat's history, oldest first, with attachments
+    nested inline. Participants only.
+
+    - no cursor      : the latest messages
+    - before=<cursor>: older history, scrolling back from before_cursor
+    - after=<cursor> : sync since cursor — messages newer than the last one
+                       the client holds; a reconnecting client pages with
+                       after_cursor until has_more is false
+
+    limit defaults to CHAT_HISTORY_PAGE_SIZE and is capped at
+    CHAT_HISTORY_MAX_PAGE_SIZE. Response:
       {
-        id, chat_id, sender_id, content, timestamp,
-        attachments: [ { id, file_url, file_name, file_type, file_size, uploaded_at }, ... ]
+        messages: [ { id, chat_id, sender_id, content, timestamp, attachments: [...] }, ... ],
+        has_more,        # more messages further in the paging direction
+        before_cursor,   # cursor of the first message (None if empty)
+        after_cursor,    # cursor of the last message (the given one if none are newer)
       }
     """
-    messages = (
-        get_admin_client()
-        .table("messages")
-        .select("*, attachments:message_attachments(*)")
-        .eq("chat_id", chat_id)
-        .order("timestamp")
-        .execute()
-    )
-    return messages.data
+    user = await get_current_user(token)
+    await assert_participant(chat_id, user["sub"])
+
+    if before and after:
+        raise HTTPException(status_code=400, detail="Pass either before or after, not both.")
+
+    if after:
+        return await fetch_page(chat_id, after, NEWER, page_size(limit))
+    return await fetch_page(chat_id, before, OLDER, page_size(limit))
@@ -0,0 +1,41 @@
+"""
+Non-blocking Supabase access for the async chat endpoints.
+
+The Supabase client is synchronous: every .execute() or storage call blocks
+on an HTTP round trip. Called from an `async def` endpoint, that stalls the
+event loop and every socket it serves. run_db() runs such calls on a
+bounded, process-wide thread pool (CHAT_DB_WORKERS) instead, so the loop
+keeps delivering messages while requests wait on Supabase. The pooled HTTP
+connections of the shared admin client are reused across threads.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "CHAT_DB_WORKERS", 16),
+                thread_name_prefix="chat-db",
+            )
+        return _executor
+
+
+async def run_db(fn, *args, **kwargs):
+    """Awaits fn(*args, **kwargs) run on the chat DB thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def execute(query):
+    """Awaits a built Supabase query, e.g. `await execute(client.table(...).select(...))`."""
+    return await run_db(query.execute)
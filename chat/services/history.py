@@ -0,0 +1,87 @@
+"""
+Keyset pagination of chat history on (timestamp, id).
+
+A cursor is an opaque, URL-safe token for one message's (timestamp, id).
+Pages are read with `WHERE chat_id = ? AND timestamp <= T AND (timestamp < T
+OR (timestamp = T AND id < X)) ORDER BY timestamp DESC, id DESC LIMIT n`
+(or >= / > / ASC going forward). The plain `timestamp <= T` bound lets the
+messages (chat_id, timestamp, id) index seek straight to the cursor, so the
+cost of a page does not grow with the length of the chat.
+"""
+import base64
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.conf import settings
+from fastapi import HTTPException
+
+from core.supabase_client import get_admin_client
+from chat.services.db import execute
+
+OLDER = "older"
+NEWER = "newer"
+
+
+def encode_cursor(message: dict) -> str:
+    raw = f"{message['timestamp']}|{message['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """(timestamp, id) of a cursor; HTTP 400 unless both parse, so they are safe to put in a filter."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, message_id = raw.split("|")
+        datetime.fromisoformat(timestamp)
+        uuid.UUID(message_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return timestamp, message_id
+
+
+def page_size(limit: Optional[int]) -> int:
+    default = getattr(settings, "CHAT_HISTORY_PAGE_SIZE", 50)
+    return min(limit or default, getattr(settings, "CHAT_HISTORY_MAX_PAGE_SIZE", 200))
+
+
+async def fetch_page(chat_id: str, cursor: Optional[str], direction: str, limit: int) -> dict:
+    """
+    Up to `limit` messages of the chat beyond `cursor` in `direction`
+    (OLDER: before it, or the latest messages without a cursor; NEWER:
+    after it), always returned oldest first with their attachments.
+    `has_more` tells whether more messages lie further in that direction.
+    """
+    descending = direction == OLDER
+    query = (
+        get_admin_client()
+        .table("messages")
+        .select("*, attachments:message_attachments(*)")
+        .eq("chat_id", chat_id)
+    )
+    if cursor:
+        timestamp, message_id = decode_cursor(cursor)
+        op = "lt" if descending else "gt"
+        # The plain range bound is what the index seek starts from; Postgres
+        # cannot seek on the OR, which only settles ties on the timestamp
+        bound = query.lte if descending else query.gte
+        query = bound("timestamp", timestamp).or_(
+            f'timestamp.{op}."{timestamp}",and(timestamp.eq."{timestamp}",id.{op}.{message_id})'
+        )
+    result = await execute(
+        query.order("timestamp", desc=descending)
+        .order("id", desc=descending)
+        .limit(limit + 1)
+    )
+
+    rows = result.data[:limit]
+    if descending:
+        rows.reverse()
+    return {
+        "messages": rows,
+        "has_more": len(result.data) > limit,
+        # Older history continues before the first message; a reconnecting
+        # client syncs forward from the last one it holds
+        "before_cursor": encode_cursor(rows[0]) if rows else None,
+        "after_cursor": encode_cursor(rows[-1]) if rows else (None if descending else cursor),
+    }
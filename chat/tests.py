@@ -0,0 +1,409 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from chat.connections import EVICTED_CLOSE_CODE, ClientConnection, ConnectionRegistry, active_connections
+from chat.main import app
+
+
+async def _token_user(token):
+    return {"sub": token}
+
+
+def _chat_client(participant1="student", participant2="teacher"):
+    """A Supabase admin client whose chats lookup returns one chat of the two participants."""
+    client = mock.Mock()
+    client.table.return_value.select.return_value.eq.return_value.execute.return_value = mock.Mock(
+        data=[{"participant1": participant1, "participant2": participant2}]
+    )
+    return client
+
+
+class _Socket:
+    def __init__(self, stall=False):
+        self.sent = []
+        self.stall = stall
+        self.close_code = None
+
+    async def send_json(self, message):
+        if self.stall:
+            await asyncio.sleep(3600)
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class _Recipient:
+    """A registered connection that records what is queued for it."""
+
+    def __init__(self, accepts=True):
+        self.sent = []
+        self.accepts = accepts
+
+    def enqueue(self, message):
+        if self.accepts:
+            self.sent.append(message)
+        return self.accepts
+
+
+class ConnectionRegistryTests(SimpleTestCase):
+    def test_index_and_cleanup(self):
+        """Verify sockets are indexed per chat and user, and removing the last one prunes both levels."""
+        registry = ConnectionRegistry()
+        tab1, tab2, other = object(), object(), object()
+        registry.add("c1", "u1", tab1)
+        registry.add("c1", "u1", tab2)
+        registry.add("c2", "u2", other)
+        self.assertEqual(len(registry), 3)
+        self.assertEqual({ws for _, ws in registry.recipients("c1")}, {tab1, tab2})
+        self.assertEqual(registry.recipients("c1", exclude_user="u1"), [])
+
+        registry.remove("c1", "u1", tab1)
+        self.assertEqual(registry.recipients("c1"), [("u1", tab2)])
+        registry.remove("c1", "u1", tab2)
+        registry.remove("c1", "u1", tab2)
+        self.assertEqual(registry._chats, {"c2": {"u2": {other}}})
+
+    def test_broadcast_drops_refusing_connections(self):
+        """Verify a closed or evicted recipient is removed while the others still get the message."""
+        registry = ConnectionRegistry()
+        good, bad = _Recipient(), _Recipient(accepts=False)
+        registry.add("c1", "u2", good)
+        registry.add("c1", "u3", bad)
+        registry.add("c1", "u1", _Recipient())
+        registry.broadcast("c1", {"id": "m1"}, exclude_user="u1")
+        self.assertEqual(good.sent, [{"id": "m1"}])
+        self.assertEqual({user for user, _ in registry.recipients("c1")}, {"u1", "u2"})
+
+
+@mock.patch("chat.routers.chats.get_admin_client")
+@mock.patch("chat.dependencies.get_admin_client", _chat_client)
+@mock.patch("chat.routers.chats.get_current_user", _token_user)
+class ChatSocketTests(SimpleTestCase):
+    def test_every_tab_receives_and_disconnects_clean_up(self, admin_client):
+        """Verify a message reaches all of the recipient's tabs and every exit path unregisters the socket."""
+        with TestClient(app) as client:
+            with client.websocket_connect("/ws/chat/c1?token=teacher") as tab1, \
+                    client.websocket_connect("/ws/chat/c1?token=student") as sender:
+                with client.websocket_connect("/ws/chat/c1?token=teacher") as tab2:
+                    sender.send_json({"content": "hello"})
+                    self.assertEqual(tab1.receive_json()["content"], "hello")
+                    self.assertEqual(tab2.receive_json()["content"], "hello")
+                    self.assertEqual(len(active_connections), 3)
+                self.assertEqual(len(active_connections), 2)
+
+                # A malformed frame ends that socket's loop; it is unregistered all the same
+                with self.assertRaises(json.JSONDecodeError):
+                    with client.websocket_connect("/ws/chat/c1?token=teacher") as tab3:
+                        tab3.send_text("not json")
+                        tab3.receive_json()
+                sender.send_json({"content": "again"})
+                self.assertEqual(tab1.receive_json()["content"], "again")
+                self.assertEqual(len(active_connections), 2)
+        self.assertEqual(len(active_connections), 0)
+        self.assertEqual(admin_client.return_value.table.return_value.insert.call_count, 2)
+
+    def test_non_participant_is_refused(self, admin_client):
+        """Verify a socket of a user outside the chat is closed with 1008 before it is registered."""
+        with TestClient(app) as client:
+            with client.websocket_connect("/ws/chat/c1?token=outsider") as ws:
+                self.assertEqual(ws.receive_json()["type"], "error")
+                with self.assertRaises(WebSocketDisconnect) as closed:
+                    ws.receive_json()
+            self.assertEqual(closed.exception.code, 1008)
+            self.assertEqual(len(active_connections), 0)
+
+
+class _SlowQuery:
+    """A Supabase query whose execute() blocks like a network round trip."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def execute(self):
+        import time
+
+        time.sleep(self.delay)
+        return mock.Mock(data=[{"participant1": "student", "participant2": "teacher"}])
+
+
+class NonBlockingDatabaseTests(SimpleTestCase):
+    def test_concurrent_sends_do_not_stall_event_loop(self):
+        """Verify blocking Supabase calls of concurrent sends run off the loop, keeping its lag well under one call."""
+        import time
+
+        from chat.routers.messages import send_message
+
+        delay = 0.1
+        client = mock.Mock()
+        client.table.return_value.select.return_value.eq.return_value = _SlowQuery(delay)
+        client.table.return_value.insert.return_value = _SlowQuery(delay)
+
+        async def scenario():
+            lags = []
+            sending = True
+
+            async def monitor():
+                while sending:
+                    start = time.perf_counter()
+                    await asyncio.sleep(0.005)
+                    lags.append(time.perf_counter() - start - 0.005)
+
+            watcher = asyncio.create_task(monitor())
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(send_message("c1", "student", content=f"hi {i}", files=None) for i in range(8))
+            )
+            elapsed = time.perf_counter() - start
+            sending = False
+            await watcher
+            return results, lags, elapsed
+
+        with mock.patch("chat.dependencies.get_admin_client", return_value=client), \
+                mock.patch("chat.routers.messages.get_admin_client", return_value=client), \
+                mock.patch("chat.routers.messages.get_current_user", _token_user):
+            results, lags, elapsed = asyncio.run(scenario())
+
+        self.assertEqual([r["content"] for r in results], [f"hi {i}" for i in range(8)])
+        # Serialized on the loop this would take 16 calls * delay and lag by a full call
+        self.assertLess(max(lags), delay / 2)
+        self.assertLess(elapsed, 8 * 2 * delay / 2)
+
+
+class BackplaneTests(SimpleTestCase):
+    def test_messages_reach_sockets_on_other_workers(self):
+        """Verify a message published on one worker is delivered to subscribed sockets on every worker."""
+        from chat.pubsub import InMemoryBackplane
+
+        bus = []
+        worker_a, worker_b = ConnectionRegistry(), ConnectionRegistry()
+        backplane_a, backplane_b = InMemoryBackplane(worker_a, bus), InMemoryBackplane(worker_b, bus)
+        sender_tab, recipient, bystander = _Recipient(), _Recipient(), _Recipient()
+        worker_a.add("c1", "student", sender_tab)
+        worker_b.add("c1", "teacher", recipient)
+        worker_b.add("c2", "other", bystander)
+
+        async def scenario():
+            await backplane_a.subscribe("c1")
+            await backplane_b.subscribe("c1")
+            await backplane_b.subscribe("c2")
+            await backplane_a.publish("c1", {"id": "m1"}, exclude_user="student")
+            await backplane_b.unsubscribe("c1")
+            await backplane_a.publish("c1", {"id": "m2"}, exclude_user="student")
+
+        asyncio.run(scenario())
+        self.assertEqual(recipient.sent, [{"id": "m1"}])
+        self.assertEqual(sender_tab.sent, [])
+        self.assertEqual(bystander.sent, [])
+
+    def test_postgres_payloads(self):
+        """Verify NOTIFY channels are valid identifiers and oversized messages travel by id."""
+        from chat import pubsub
+
+        registry = ConnectionRegistry()
+        recipient = _Recipient()
+        registry.add("c1", "teacher", recipient)
+        backplane = pubsub.PostgresBackplane(registry, "postgresql://unused")
+        self.assertLessEqual(len(backplane.channel("x" * 500)), 63)
+
+        sent = []
+        large = {"id": "m1", "content": "x" * 10000}
+
+        async def scenario():
+            await backplane.subscribe("c1")
+            with mock.patch.object(backplane, "_notify", lambda channel, payload: sent.append(payload)):
+                await backplane.publish("c1", large, exclude_user="student")
+            with mock.patch.object(pubsub, "_load_message", mock.AsyncMock(return_value=large)):
+                await backplane._receive(sent[0])
+
+        asyncio.run(scenario())
+        self.assertLess(len(sent[0]), 200)
+        self.assertEqual(recipient.sent, [large])
+
+
+@override_settings(
+    CHAT_WS_QUEUE_HIGH_WATER=3,
+    CHAT_WS_SLOW_CLIENT_GRACE_SECONDS=0.05,
+    CHAT_WS_SEND_TIMEOUT_SECONDS=0.05,
+    CHAT_WS_HEARTBEAT_SECONDS=0,
+)
+class SendQueueTests(SimpleTestCase):
+    @override_settings(CHAT_WS_SEND_TIMEOUT_SECONDS=10)
+    def test_stalled_client_does_not_delay_others_and_is_evicted(self):
+        """Verify a stalled recipient neither blocks the broadcast nor others, and is evicted past the high-water mark."""
+        registry = ConnectionRegistry()
+        fast_socket, stalled_socket = _Socket(), _Socket(stall=True)
+
+        async def scenario():
+            fast, stalled = ClientConnection(fast_socket), ClientConnection(stalled_socket)
+            fast.start()
+            stalled.start()
+            registry.add("c1", "fast", fast)
+            registry.add("c1", "slow", stalled)
+            for i in range(4):
+                registry.broadcast("c1", {"id": i})
+            await asyncio.sleep(0.01)
+            self.assertEqual([m["id"] for m in fast_socket.sent], [0, 1, 2, 3])
+            self.assertFalse(stalled.closed)
+
+            await asyncio.sleep(0.1)
+            registry.broadcast("c1", {"id": 4})
+            await asyncio.sleep(0.01)
+            for connection in (fast, stalled):
+                connection.close()
+            return stalled
+
+        stalled = asyncio.run(scenario())
+        self.assertTrue(stalled.closed)
+        self.assertEqual(stalled_socket.close_code, EVICTED_CLOSE_CODE)
+        self.assertEqual([user for user, _ in registry.recipients("c1")], ["fast"])
+        self.assertEqual(fast_socket.sent[-1], {"id": 4})
+
+    def test_burst_past_twice_high_water_evicts_immediately(self):
+        """Verify a backlog reaching twice the high-water mark evicts without waiting for the grace period."""
+        async def scenario():
+            connection = ClientConnection(_Socket(stall=True))
+            results = [connection.enqueue({"id": i}) for i in range(8)]
+            await asyncio.sleep(0)
+            return connection, results
+
+        connection, results = asyncio.run(scenario())
+        self.assertEqual(results, [True] * 6 + [False, False])
+        self.assertTrue(connection.closed)
+
+    @override_settings(CHAT_WS_HEARTBEAT_SECONDS=0.01, CHAT_WS_SEND_TIMEOUT_SECONDS=10)
+    def test_heartbeat_evicts_silent_peers(self):
+        """Verify a client answering pings stays, and a half-open peer that takes frames but sends none is evicted."""
+        live_socket, half_open_socket = _Socket(), _Socket()
+
+        async def scenario():
+            live, half_open = ClientConnection(live_socket), ClientConnection(half_open_socket)
+            live.start()
+            half_open.start()
+            for _ in range(15):
+                await asyncio.sleep(0.01)
+                live.touch()  # the client's pong
+            self.assertFalse(live.closed)
+            live.close()
+            return half_open
+
+        half_open = asyncio.run(scenario())
+        self.assertIn({"type": "ping"}, live_socket.sent)
+        self.assertIn({"type": "ping"}, half_open_socket.sent)
+        self.assertTrue(half_open.closed)
+        self.assertEqual(half_open_socket.close_code, EVICTED_CLOSE_CODE)
+
+    @override_settings(CHAT_WS_HEARTBEAT_SECONDS=0.01)
+    def test_heartbeat_detects_stalled_peer(self):
+        """Verify a peer that stops taking frames is evicted."""
+        dead_socket = _Socket(stall=True)
+
+        async def scenario():
+            dead = ClientConnection(dead_socket)
+            dead.start()
+            await asyncio.sleep(0.15)
+            return dead
+
+        dead = asyncio.run(scenario())
+        self.assertTrue(dead.closed)
+        self.assertEqual(dead_socket.close_code, EVICTED_CLOSE_CODE)
+
+
+class _FakeQuery:
+    """A Supabase query builder that records its calls and returns fixed rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return call
+
+    def execute(self):
+        return mock.Mock(data=list(self.rows))
+
+
+def _history_rows(count, newest_first=True):
+    rows = [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "chat_id": "c1",
+            "sender_id": "student",
+            "content": f"m{i}",
+            "timestamp": f"2026-01-01T00:00:{i:02d}+00:00",
+            "attachments": [],
+        }
+        for i in range(count)
+    ]
+    return rows[::-1] if newest_first else rows
+
+
+@override_settings(CHAT_HISTORY_PAGE_SIZE=3, CHAT_HISTORY_MAX_PAGE_SIZE=5)
+class MessageHistoryTests(SimpleTestCase):
+    def _get(self, rows, participants=("student", "teacher"), **params):
+        chats = _FakeQuery([{"participant1": participants[0], "participant2": participants[1]}])
+        messages = _FakeQuery(rows)
+        client = mock.Mock()
+        client.table.side_effect = lambda name: chats if name == "chats" else messages
+        with mock.patch("chat.dependencies.get_admin_client", return_value=client), \
+                mock.patch("chat.services.history.get_admin_client", return_value=client), \
+                mock.patch("chat.routers.messages.get_current_user", _token_user):
+            response = TestClient(app).get("/messages/c1", params={"token": "student", **params})
+        return response, messages.calls
+
+    def test_latest_page_and_scrolling_back(self):
+        """Verify the latest page is read newest first with limit + 1, returned oldest first with an older-page cursor."""
+        from chat.services.history import decode_cursor
+
+        response, calls = self._get(_history_rows(4))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([m["content"] for m in body["messages"]], ["m1", "m2", "m3"])
+        self.assertTrue(body["has_more"])
+        self.assertIn(("order", ("timestamp",), {"desc": True}), calls)
+        self.assertIn(("limit", (4,), {}), calls)
+        self.assertFalse(any(name == "or_" for name, _, _ in calls))
+        self.assertEqual(decode_cursor(body["before_cursor"]), ("2026-01-01T00:00:01+00:00", body["messages"][0]["id"]))
+
+        response, calls = self._get(_history_rows(1), before=body["before_cursor"])
+        self.assertFalse(response.json()["has_more"])
+        keyset = next(args[0] for name, args, _ in calls if name == "or_")
+        self.assertEqual(
+            keyset,
+            'timestamp.lt."2026-01-01T00:00:01+00:00",'
+            'and(timestamp.eq."2026-01-01T00:00:01+00:00",id.lt.00000000-0000-0000-0000-000000000001)',
+        )
+        # The sargable bound the index seek starts from
+        self.assertIn(("lte", ("timestamp", "2026-01-01T00:00:01+00:00"), {}), calls)
+
+    def test_sync_since_cursor(self):
+        """Verify after= reads forward in ascending order and echoes the cursor when nothing is newer."""
+        from chat.services.history import encode_cursor
+
+        cursor = encode_cursor(_history_rows(1)[0])
+        response, calls = self._get(_history_rows(3, newest_first=False)[1:], after=cursor, limit=50)
+        body = response.json()
+        self.assertEqual([m["content"] for m in body["messages"]], ["m1", "m2"])
+        self.assertIn(("order", ("timestamp",), {"desc": False}), calls)
+        self.assertIn(("gte", ("timestamp", "2026-01-01T00:00:00+00:00"), {}), calls)
+        # limit is capped at CHAT_HISTORY_MAX_PAGE_SIZE
+        self.assertIn(("limit", (6,), {}), calls)
+        self.assertEqual(body["after_cursor"], encode_cursor(body["messages"][-1]))
+
+        body = self._get([], after=cursor)[0].json()
+        self.assertEqual(body, {"messages": [], "has_more": False, "before_cursor": None, "after_cursor": cursor})
+
+    def test_rejects_outsiders_and_bad_cursors(self):
+        """Verify non-participants get 403 and malformed or conflicting cursors get 400."""
+        self.assertEqual(self._get([], participants=("a", "b"))[0].status_code, 403)
+        self.assertEqual(self._get([], before="bm90LWEtY3Vyc29y")[0].status_code, 400)
+        self.assertEqual(self._get([], before="x", after="y")[0].status_code, 400)
@@ -1,4 +1,10 @@
-from cryptography.fernet import Fernet
+import hashlib
+import hmac
+import re
+import unicodedata
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, MultiFernet
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 import logging
@@ -8,6 +14,23 @@ logger = logging.getLogger(__name__)
 class EncryptionError(Exception):
     pass
 
+@lru_cache(maxsize=8)
+def _build_encryptor(key: str, old_keys: tuple):
+    """
+    Builds the Fernet (or MultiFernet when old keys are configured) for a key set.
+    Cached per process: constructing Fernet objects on every field access adds
+    up quickly when a single BirthProfile row decrypts a dozen columns.
+    """
+    try:
+        fernets = [Fernet(k.encode()) for k in (key, *old_keys)]
+    except Exception as e:
+        logger.error(f"Failed to initialize Fernet with provided key: {e}")
+        return None
+    if len(fernets) == 1:
+        return fernets[0]
+    # MultiFernet encrypts with the first key and decrypts with any of them
+    return MultiFernet(fernets)
+
 def get_encryptor():
     key = getattr(settings, "FIELD_ENCRYPTION_KEY", None)
     if not key:
@@ -19,11 +42,8 @@ def get_encryptor():
         # Fallback to local default for development if not set
         logger.warning("FIELD_ENCRYPTION_KEY is not set. Data will not be encrypted properly.")
         return None
-    try:
-        return Fernet(key.encode())
-    except Exception as e:
-        logger.error(f"Failed to initialize Fernet with provided key: {e}")
-        return None
+    old_keys = tuple(getattr(settings, "FIELD_ENCRYPTION_OLD_KEYS", None) or ())
+    return _build_encryptor(key, old_keys)
 
 def encrypt_value(value: str) -> str:
     if not value:
@@ -44,3 +64,49 @@ def decrypt_value(ciphertext: str) -> str:
     except Exception as e:
         logger.error(f"Decryption failed: {e}")
         return ciphertext
+
+
+# ---------------------------------------------------------------------------
+# Blind indexes — searchable keyed hashes of encrypted values
+# ---------------------------------------------------------------------------
+
+BLIND_INDEX_MAX_PREFIX = 20
+
+def _blind_index_key() -> bytes:
+    key = getattr(settings, "FIELD_BLIND_INDEX_KEY", None)
+    if key:
+        return key.encode()
+    # Fall back to a key derived from the encryption key, kept separate by the label
+    encryption_key = getattr(settings, "FIELD_ENCRYPTION_KEY", None)
+    if encryption_key:
+        return hmac.new(encryption_key.encode(), b"blind-index", hashlib.sha256).digest()
+    if not settings.DEBUG:
+        raise ImproperlyConfigured(
+            "FIELD_BLIND_INDEX_KEY or FIELD_ENCRYPTION_KEY must be set in production."
+        )
+    return b"insecure-development-blind-index-key"
+
+def normalize_search_tokens(value: str) -> list:
+    """Case-folds, strips accents and splits a name into alphanumeric tokens."""
+    if not value:
+        return []
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return [t for t in re.split(r"[\W_]+", stripped.casefold()) if t]
+
+def blind_index(value: str, namespace: str) -> str:
+    """Keyed HMAC of a normalized token. `namespace` keeps fields from sharing hashes."""
+    digest = hmac.new(_blind_index_key(), f"{namespace}:{value}".encode(), hashlib.sha256)
+    return digest.hexdigest()[:32]
+
+def blind_index_prefixes(value: str, namespace: str) -> set:
+    """
+    Blind-index hashes for every prefix (up to BLIND_INDEX_MAX_PREFIX chars) of
+    every token in `value`. Stored per row, they let a search for "ash ra"
+    match "Asha Rao" without decrypting anything.
+    """
+    return {
+        blind_index(token[:i], namespace)
+        for token in normalize_search_tokens(value)
+        for i in range(1, min(len(token), BLIND_INDEX_MAX_PREFIX) + 1)
+    }
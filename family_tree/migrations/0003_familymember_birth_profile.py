@@ -0,0 +1,20 @@
+# Generated by Django 6.0.3 on 2026-10-18 23:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('astrology', '0025_birthprofile_coordinates'),
+        ('family_tree', '0002_familymember_connected_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='familymember',
+            name='birth_profile',
+            field=models.OneToOneField(blank=True, help_text='Guest birth profile created for this member by the batch chart endpoint.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='family_member', to='astrology.birthprofile'),
+        ),
+    ]
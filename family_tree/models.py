@@ -33,6 +33,14 @@ class FamilyMember(models.Model):
         related_name="linked_family_member_nodes",
         help_text="Optional link to a real registered user of the application."
     )
+    birth_profile = models.OneToOneField(
+        "astrology.BirthProfile",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="family_member",
+        help_text="Guest birth profile created for this member by the batch chart endpoint."
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
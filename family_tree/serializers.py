@@ -18,9 +18,9 @@ class FamilyMemberSerializer(serializers.ModelSerializer):
             'birth_date', 'birth_time', 'birth_place',
             'connected_user_id', 'connected_user_email',
             'is_connected', 'connected_user_details',
-            'created_at', 'updated_at'
+            'birth_profile', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'birth_profile', 'created_at', 'updated_at']
 
     def get_is_connected(self, obj):
         return obj.connected_user is not None
@@ -202,3 +202,11 @@ class FamilyRelationshipSerializer(serializers.ModelSerializer):
                     if p.relative.id not in visited:
                         queue.append(p.relative)
         return False
+
+
+class FamilyChartBatchRequestSerializer(serializers.Serializer):
+    generate_insights = serializers.BooleanField(
+        required=False,
+        default=True,
+        help_text="Queue insight generation for every charted member (default true)"
+    )
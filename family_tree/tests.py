@@ -1,8 +1,17 @@
+import threading
 import uuid
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from cryptography.fernet import Fernet
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from core.models import User
+from astrology.compatibility import score
+from astrology.models import BirthProfile, NatalBatchJob, NatalChartCache
+from astrology.services import AstrologyAPIClient
 from .models import FamilyMember, FamilyRelationship
 
 class FamilyTreeTests(APITestCase):
@@ -346,3 +355,209 @@ class FamilyTreeTests(APITestCase):
 
     def member_url_for_list(self):
         return self.member_list_url
+
+
+class _InlineThread:
+    """Runs the batch worker in the test thread so it sees the test transaction."""
+
+    def __init__(self, target, args=()):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+def _api_response(name):
+    return {"success": True, "data": {"source": name}}
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=Fernet.generate_key().decode())
+class FamilyChartBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="batch@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("family-member-charts")
+
+        birth = {"birth_date": date(1990, 5, 15), "birth_time": time(12, 30)}
+        self.twin_a = FamilyMember.objects.create(user=self.user, name="Twin A", birth_place="Mumbai, India", **birth)
+        self.twin_b = FamilyMember.objects.create(user=self.user, name="Twin B", birth_place="Bombay", **birth)
+        self.parent = FamilyMember.objects.create(
+            user=self.user, name="Parent", birth_place="Karachi, PK",
+            birth_date=date(1960, 1, 1), birth_time=time(6, 0),
+        )
+        self.unknown_time = FamilyMember.objects.create(
+            user=self.user, name="No Time", birth_place="Delhi", birth_date=date(1992, 1, 1)
+        )
+
+        for method in ("get_birth_details", "get_divisional_chart", "get_ashtakvarga",
+                       "get_vimshottari_dasha", "get_kp_system"):
+            patcher = mock.patch.object(
+                AstrologyAPIClient, method, side_effect=lambda profile, m=method: _api_response(m)
+            )
+            setattr(self, method, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            "astrology.batch.threading", SimpleNamespace(Thread=_InlineThread, Lock=threading.Lock)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_dedupes_identical_births(self):
+        """Verify one batch creates every profile and fetches identical births only once."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"generate_insights": False}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["total"], 3)
+        self.assertEqual(response.data["skipped"][0]["member_id"], str(self.unknown_time.id))
+
+        self.assertEqual(self.get_birth_details.call_count, 2)
+        self.assertEqual(NatalChartCache.objects.count(), 3)
+
+        twin = FamilyMember.objects.select_related("birth_profile").get(pk=self.twin_b.pk)
+        self.assertEqual(twin.birth_profile.city, "Mumbai")
+        self.assertEqual(twin.birth_profile.guest_name, "Twin B")
+        self.assertEqual(str(twin.birth_profile.created_by_id), str(self.user.id))
+
+        status_url = reverse("family-member-charts-status", kwargs={"job_id": response.data["job_id"]})
+        job = self.client.get(status_url).data
+        self.assertEqual(job["state"], "finished")
+        self.assertEqual((job["unique_births"], job["fetched"], job["failed"]), (2, 3, 0))
+        self.assertEqual({item["status"] for item in job["items"]}, {"ready"})
+
+    def test_rerun_reuses_profiles_and_charts(self):
+        """Verify a second batch reuses the members' profiles and cached charts and queues insights."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"member_ids": [str(self.parent.id)], "generate_insights": False}, format="json")
+        profile_id = FamilyMember.objects.get(pk=self.parent.pk).birth_profile_id
+
+        with mock.patch("astrology.tasks.generate_all_insights_async") as insights:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, {"member_ids": [str(self.parent.id)]}, format="json")
+        self.assertEqual(response.data["items"][0]["birth_profile_id"], profile_id)
+        self.assertEqual(self.get_birth_details.call_count, 1)
+        insights.assert_called_once_with(profile_id)
+
+        job = self.client.get(
+            reverse("family-member-charts-status", kwargs={"job_id": response.data["job_id"]})
+        ).data
+        self.assertEqual(job["reused"], 1)
+
+    def test_job_state_is_stored_in_database(self):
+        """Verify the job is read back from its NatalBatchJob row and expires an hour after its last update."""
+        from django.core.cache import cache
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"member_ids": [str(self.parent.id)], "generate_insights": False}, format="json")
+        cache.clear()
+        status_url = reverse("family-member-charts-status", kwargs={"job_id": response.data["job_id"]})
+        job = self.client.get(status_url).data
+        self.assertEqual((job["state"], job["fetched"]), ("finished", 1))
+        self.assertEqual(job["items"][0]["member_id"], str(self.parent.id))
+
+        NatalBatchJob.objects.filter(job_id=response.data["job_id"]).update(
+            updated_at=NatalBatchJob.objects.get().updated_at - timedelta(hours=2)
+        )
+        self.assertEqual(self.client.get(status_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_generate_insights_parses_form_booleans(self):
+        """Verify "false" from a form or query string turns insight generation off."""
+        with mock.patch("astrology.tasks.generate_all_insights_async") as insights:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    self.url, {"generate_insights": "false"}, format="multipart"
+                )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        insights.assert_not_called()
+
+        response = self.client.post(self.url, {"generate_insights": "maybe"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_error_marks_job_failed(self):
+        """Verify an error outside the per-profile fetches ends the job as failed instead of running forever."""
+        with mock.patch("astrology.batch.fetch_natal_shared", side_effect=RuntimeError("pool down")):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    self.url, {"member_ids": [str(self.parent.id)], "generate_insights": False}, format="json"
+                )
+        job = self.client.get(
+            reverse("family-member-charts-status", kwargs={"job_id": response.data["job_id"]})
+        ).data
+        self.assertEqual(job["state"], "failed")
+
+    def test_place_unknown_to_gazetteer_keeps_free_text(self):
+        """Verify a birth place the gazetteer does not know is charted from its free-text city / country."""
+        member = FamilyMember.objects.create(
+            user=self.user, name="Farmer", birth_place="Smallville, USA",
+            birth_date=date(1970, 3, 3), birth_time=time(9, 15),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, {"member_ids": [str(member.id)], "generate_insights": False}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["skipped"], [])
+        profile = FamilyMember.objects.select_related("birth_profile").get(pk=member.pk).birth_profile
+        self.assertEqual((profile.city, profile.country_code), ("Smallville", "US"))
+        self.assertIsNone(profile.latitude)
+
+    def test_job_handle_is_private(self):
+        """Verify other users cannot read a batch job, and unknown members are rejected."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"member_ids": [str(self.parent.id)], "generate_insights": False}, format="json")
+        other = User.objects.create_user(id=str(uuid.uuid4()), email="other@example.com")
+        self.client.force_authenticate(user=other)
+        status_url = reverse("family-member-charts-status", kwargs={"job_id": response.data["job_id"]})
+        self.assertEqual(self.client.get(status_url).status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.post(self.url, {"member_ids": [str(self.parent.id)]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(FIELD_ENCRYPTION_KEY=Fernet.generate_key().decode())
+class FamilyCompatibilityTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(id=str(uuid.uuid4()), email="match@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("family-compatibility")
+
+        self.bride = self._member("Bride", "female", "Rohini", 1)
+        self.groom = self._member("Groom", "male", "Magha", 3)
+        self.sibling = self._member("Sibling", "female", "Swati", 2)
+        self.uncharted = self._member("Uncharted", "male")
+        FamilyMember.objects.create(user=self.user, name="No Profile")
+
+    def _member(self, name, gender, nakshatra=None, pada=None):
+        profile = BirthProfile.objects.create(
+            birth_year=1990, birth_month=5, birth_day=15, birth_hour=12, birth_minute=30,
+            city="Mumbai", country_code="IN", created_by=self.user, guest_name=name,
+        )
+        if nakshatra:
+            NatalChartCache.objects.create(
+                birth_profile=profile,
+                birth_details_data={"data": {"planets": [
+                    {"planet": "Moon", "nakshatra": nakshatra, "nakshatra_pada": pada}
+                ]}},
+            )
+        return FamilyMember.objects.create(user=self.user, name=name, gender=gender, birth_profile=profile)
+
+    def test_all_pairs_scored(self):
+        """Verify every charted pair is scored once, with the male member on the groom's side."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([m["name"] for m in response.data["members"]], ["Bride", "Groom", "Sibling"])
+        self.assertEqual(response.data["unscored"], [str(self.uncharted.id)])
+        self.assertEqual(len(response.data["pairs"]), 3)
+
+        pair = next(
+            p for p in response.data["pairs"] if {p["a"], p["b"]} == {str(self.bride.id), str(self.groom.id)}
+        )
+        # Groom Magha pada 3 (38) against bride Rohini pada 1 (12)
+        self.assertEqual(pair["total"], score(38, 12)["total"])
+
+    def test_member_filter(self):
+        """Verify member_ids limits the pairs and malformed ids are rejected."""
+        response = self.client.get(self.url, {"member_ids": f"{self.bride.id},{self.sibling.id}"})
+        self.assertEqual(len(response.data["pairs"]), 1)
+
+        response = self.client.get(self.url, {"member_ids": "not-a-uuid"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -2,7 +2,8 @@ from django.urls import path
 from .views import (
     FamilyTreeView, FamilyMemberListView, FamilyMemberDetailView,
     FamilyRelationshipView, FamilyRelationshipRemoveView,
-    FamilyTreeUsersListView
+    FamilyTreeUsersListView, FamilyChartBatchView, FamilyChartBatchStatusView,
+    FamilyCompatibilityView
 )
 
 urlpatterns = [
@@ -16,6 +17,13 @@ urlpatterns = [
     path('members/', FamilyMemberListView.as_view(), name='family-member-list'),
     path('members/<uuid:pk>/', FamilyMemberDetailView.as_view(), name='family-member-detail'),
 
+    # Batch natal chart generation
+    path('members/charts/', FamilyChartBatchView.as_view(), name='family-member-charts'),
+    path('members/charts/<str:job_id>/', FamilyChartBatchStatusView.as_view(), name='family-member-charts-status'),
+
+    # Ashtakoota compatibility across the tree
+    path('compatibility/', FamilyCompatibilityView.as_view(), name='family-compatibility'),
+
     # Relationships management
     path('relationships/', FamilyRelationshipView.as_view(), name='family-relationship'),
     path('relationships/remove/', FamilyRelationshipRemoveView.as_view(), name='family-relationship-remove'),
@@ -2,11 +2,21 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Q
 from core.models import User
+from astrology.batch import get_batch_job, start_natal_batch
+from astrology.compatibility import describe_pada, load_moon_padas, score_all_pairs
+from astrology.gazetteer import get_gazetteer, split_place_text
+from astrology.models import BirthProfile
 
 from .models import FamilyMember, FamilyRelationship
-from .serializers import FamilyMemberSerializer, FamilyRelationshipSerializer
+from .serializers import (
+    FamilyChartBatchRequestSerializer,
+    FamilyMemberSerializer,
+    FamilyRelationshipSerializer,
+)
 
 class FamilyTreeView(APIView):
     """
@@ -249,3 +259,154 @@ class FamilyTreeUsersListView(APIView):
             })
 
         return Response(data, status=status.HTTP_200_OK)
+
+
+def _birth_profile_fields(member):
+    """
+    Maps a FamilyMember onto BirthProfile fields.
+    Returns (fields, None), or (None, reason) when the member can't be charted.
+    """
+    if not (member.birth_date and member.birth_time and member.birth_place):
+        return None, "birth_date, birth_time and birth_place are all required."
+
+    place = get_gazetteer().lookup_text(member.birth_place)
+    if place is not None:
+        city, country_code = place.name, place.country_code
+    else:
+        # Unknown to the gazetteer: keep the free-text city / country, which
+        # the natal chart API resolves itself (as for any BirthProfile)
+        city, country_code = split_place_text(member.birth_place)
+
+    name = member.name
+    if not name and member.connected_user:
+        name = member.connected_user.get_full_name() or member.connected_user.email
+    return {
+        "guest_name": name or "",
+        "birth_year": member.birth_date.year,
+        "birth_month": member.birth_date.month,
+        "birth_day": member.birth_date.day,
+        "birth_hour": member.birth_time.hour,
+        "birth_minute": member.birth_time.minute,
+        "city": city,
+        "country_code": country_code,
+    }, None
+
+
+class FamilyChartBatchView(APIView):
+    """
+    POST — Creates guest birth profiles for family members and generates
+    their natal charts as one batch job.
+
+    Expected Payload (all optional; defaults to every member):
+      {
+        "member_ids": ["uuid-1", "uuid-2"],
+        "generate_insights": true
+      }
+
+    Profiles are created in a single transaction; members that already have
+    one reuse it. Natal fetches run through the shared bounded pipeline in
+    astrology.batch, with identical births fetched once. Returns 202 with the
+    batch job handle to poll at members/charts/<job_id>/.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = FamilyChartBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        generate_insights = serializer.validated_data["generate_insights"]
+        member_ids = request.data.get("member_ids")
+
+        members = FamilyMember.objects.filter(user=request.user).select_related(
+            "birth_profile", "connected_user"
+        )
+        if member_ids is not None:
+            if not isinstance(member_ids, list) or not member_ids:
+                return Response(
+                    {"detail": "member_ids must be a non-empty list."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                members = members.filter(pk__in=member_ids)
+                if members.count() != len(set(member_ids)):
+                    raise FamilyMember.DoesNotExist
+            except (FamilyMember.DoesNotExist, ValidationError):
+                return Response({"detail": "One or more family members not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        items, skipped = [], []
+        with transaction.atomic():
+            for member in members:
+                if member.birth_profile_id is None:
+                    fields, error = _birth_profile_fields(member)
+                    if error:
+                        skipped.append({"member_id": str(member.id), "detail": error})
+                        continue
+                    member.birth_profile = BirthProfile.objects.create(
+                        user=None, created_by=request.user, **fields
+                    )
+                    member.save(update_fields=["birth_profile", "updated_at"])
+                items.append({"member_id": str(member.id), "birth_profile_id": member.birth_profile_id})
+
+            if not items:
+                return Response(
+                    {"detail": "No family member has enough birth data for a chart.", "skipped": skipped},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            job = start_natal_batch(request.user.id, items, generate_insights=generate_insights)
+
+        return Response({**job, "skipped": skipped}, status=status.HTTP_202_ACCEPTED)
+
+
+class FamilyChartBatchStatusView(APIView):
+    """
+    GET — Progress of a batch chart job started by FamilyChartBatchView.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_batch_job(job_id)
+        if job is None or job["user_id"] != str(request.user.id):
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+
+class FamilyCompatibilityView(APIView):
+    """
+    GET — Ashtakoota scores for every pair of family members with a natal
+    chart (see FamilyChartBatchView), optionally limited with
+    ?member_ids=uuid-1,uuid-2. Males take the groom's side of the
+    asymmetric kootas; otherwise the earlier-created member does.
+
+    All Moon positions are read in one query and every pair is scored from
+    the precomputed pada table in a single pass.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        members = FamilyMember.objects.filter(user=request.user, birth_profile__isnull=False)
+        member_ids = [m for m in request.query_params.get("member_ids", "").split(",") if m]
+        if member_ids:
+            try:
+                members = members.filter(pk__in=member_ids)
+            except ValidationError:
+                return Response({"detail": "member_ids must be UUIDs."}, status=status.HTTP_400_BAD_REQUEST)
+        members = list(members)
+
+        padas = load_moon_padas(m.birth_profile_id for m in members)
+        scored = [m for m in members if m.birth_profile_id in padas]
+        pairs = score_all_pairs(
+            [padas[m.birth_profile_id] for m in scored],
+            grooms=[m.gender == FamilyMember.Gender.MALE for m in scored],
+        )
+
+        return Response({
+            "members": [
+                {"id": str(m.id), "name": m.name, **describe_pada(padas[m.birth_profile_id])}
+                for m in scored
+            ],
+            "unscored": [str(m.id) for m in members if m.birth_profile_id not in padas],
+            "pairs": [
+                {"a": str(scored[i].id), "b": str(scored[j].id), "total": total}
+                for i, j, total in pairs
+            ],
+        })
@@ -55,6 +55,24 @@ SUPABASE_USER_UPLOADS_BUCKET = os.getenv("SUPABASE_USER_UPLOADS_BUCKET", "user-u
 SUPABASE_ASTRO_REPORTS_BUCKET = os.getenv("SUPABASE_ASTRO_REPORTS_BUCKET", "astro-reports")
 # Price in cents. $9.99 dummy value — update via env var before launch.
 ASTROLOGY_REPORT_PRICE_CENTS = int(os.getenv("ASTROLOGY_REPORT_PRICE_CENTS", "999"))
+# Seconds a signed report download URL stays valid
+ASTROLOGY_REPORT_URL_TTL = int(os.getenv("ASTROLOGY_REPORT_URL_TTL", "300"))
+# Build paid reports from stored insights / charts / dashas (astrology.report_pipeline)
+ASTROLOGY_REPORT_FROM_DATA = os.getenv("ASTROLOGY_REPORT_FROM_DATA", "False") == "True"
+# Worker processes laying out report sections in parallel (0 = in the calling thread)
+ASTROLOGY_REPORT_RENDER_PROCESSES = int(os.getenv("ASTROLOGY_REPORT_RENDER_PROCESSES", "2"))
+# Cached astrology API responses at least this large (serialized JSON bytes)
+# are stored zlib-compressed. 0 stores every blob uncompressed.
+ASTROLOGY_BLOB_COMPRESS_MIN_BYTES = int(os.getenv("ASTROLOGY_BLOB_COMPRESS_MIN_BYTES", "1024"))
+# Days of past TransitCache rows kept by `manage.py purge_transit_cache`
+ASTROLOGY_TRANSIT_RETENTION_DAYS = int(os.getenv("ASTROLOGY_TRANSIT_RETENTION_DAYS", "30"))
+# Offline gazetteer used to geocode birth places. Empty uses the bundled
+# astrology/data/gazetteer.tsv; see `manage.py build_gazetteer`.
+ASTROLOGY_GAZETTEER_PATH = os.getenv("ASTROLOGY_GAZETTEER_PATH", "")
+# Concurrent astrology API fetches shared by all batch natal chart jobs
+ASTROLOGY_NATAL_FETCH_WORKERS = int(os.getenv("ASTROLOGY_NATAL_FETCH_WORKERS", "4"))
+# Paid report PDFs built concurrently in the background (astrology.report_jobs)
+ASTROLOGY_REPORT_BUILD_WORKERS = int(os.getenv("ASTROLOGY_REPORT_BUILD_WORKERS", "2"))
 
 # ─── Chat File Uploads ─────────────────────────────────────────────────────────
 CHAT_UPLOADS_BUCKET = os.getenv("CHAT_UPLOADS_BUCKET", "chat-uploads")
@@ -75,6 +93,24 @@ CHAT_ALLOWED_MIME_TYPES = [
     "video/mp4", "video/quicktime",
 ]
 CHAT_VIDEO_MIME_TYPES = ["video/mp4", "video/quicktime"]
+# Threads running blocking Supabase calls for the async chat endpoints (chat.services.db)
+CHAT_DB_WORKERS = int(os.getenv("CHAT_DB_WORKERS", "16"))
+# Chat fan-out across uvicorn workers/hosts (chat.pubsub): "memory" (single worker) or "postgres"
+CHAT_PUBSUB_BACKEND = os.getenv("CHAT_PUBSUB_BACKEND", "memory")
+# Direct (session-mode) Postgres URL for LISTEN/NOTIFY; defaults to DATABASE_URL
+CHAT_PUBSUB_DATABASE_URL = os.getenv("CHAT_PUBSUB_DATABASE_URL", os.getenv("DATABASE_URL", ""))
+# Chat history page size (GET /messages/{chat_id}) and its cap
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "50"))
+CHAT_HISTORY_MAX_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_MAX_PAGE_SIZE", "200"))
+# Per-socket outbound queue (chat.connections): a client at or over the high-water
+# mark for the grace period (or at twice the mark) is evicted
+CHAT_WS_QUEUE_HIGH_WATER = int(os.getenv("CHAT_WS_QUEUE_HIGH_WATER", "100"))
+CHAT_WS_SLOW_CLIENT_GRACE_SECONDS = float(os.getenv("CHAT_WS_SLOW_CLIENT_GRACE_SECONDS", "10"))
+# A socket that cannot take a frame within this many seconds is treated as dead
+CHAT_WS_SEND_TIMEOUT_SECONDS = float(os.getenv("CHAT_WS_SEND_TIMEOUT_SECONDS", "10"))
+# Seconds between {"type": "ping"} heartbeats on chat sockets (0 = off); a
+# client sending no frame (e.g. {"type": "pong"}) for twice this is disconnected
+CHAT_WS_HEARTBEAT_SECONDS = float(os.getenv("CHAT_WS_HEARTBEAT_SECONDS", "25"))
 
 
 # ─── URLs for Supabase Auth email redirects ───────────────────────────────────
@@ -84,6 +120,16 @@ BASE_URL = os.getenv("BASE_URL", "")
 
 # ─── Encryption ───────────────────────────────────────────────────────────────
 FIELD_ENCRYPTION_KEY = os.getenv("FIELD_ENCRYPTION_KEY", "")
+# Comma-separated retired keys, still accepted for decryption during a key
+# rotation. New values are always encrypted with FIELD_ENCRYPTION_KEY; run
+# `manage.py reencrypt_fields` to move existing rows onto it.
+FIELD_ENCRYPTION_OLD_KEYS = [
+    key.strip() for key in os.getenv("FIELD_ENCRYPTION_OLD_KEYS", "").split(",") if key.strip()
+]
+# HMAC key for blind indexes (searchable hashes of encrypted fields). Falls
+# back to a key derived from FIELD_ENCRYPTION_KEY. Changing it requires
+# `manage.py rebuild_guest_name_index`.
+FIELD_BLIND_INDEX_KEY = os.getenv("FIELD_BLIND_INDEX_KEY", "")
 
 # ─── Google OAuth ─────────────────────────────────────────────────────────────
 GOOGLE_OAUTH_CLIENT_ID = os.getenv("GOOGLE_OAUTH_CLIENT_ID", "")
@@ -445,17 +445,13 @@ class StripeWebhookService:
 
         Called when Stripe confirms payment_intent.succeeded with
         metadata[payment_type] == 'report'.  Marks the ReportPayment as
-        COMPLETED so the report becomes downloadable even if the user closed
-        the tab before our /confirm-payment/ endpoint was called.
-
-        Report generation itself is intentionally NOT triggered here —
-        the full PDF build (which includes Supabase upload) requires a
-        synchronous response context that webhooks don't provide cleanly.
-        Generation is triggered by ConfirmReportPaymentView.  If payment is
-        confirmed via webhook before /confirm-payment/ is called, the view
-        will detect the COMPLETED status and generate the PDF at that point.
+        COMPLETED and queues the PDF build, so the report is generated even
+        if the user closed the tab before our /confirm-payment/ endpoint was
+        called.  The build is queued idempotently (astrology.report_jobs):
+        if ConfirmReportPaymentView already queued it, this is a no-op.
         """
         from astrology.models import ReportPayment
+        from astrology.report_jobs import enqueue_report_build
 
         intent_id = payment_intent["id"]
         try:
@@ -470,6 +466,7 @@ class StripeWebhookService:
                     f"ReportPayment #{report_payment.id} marked COMPLETED via webhook "
                     f"(PaymentIntent {intent_id})"
                 )
+            enqueue_report_build(report_payment.report_id)
         except ReportPayment.DoesNotExist:
             logger.warning(
                 f"Webhook: no ReportPayment found for PaymentIntent {intent_id}"